@@ -1,60 +1,175 @@
 # admin.py
+from django.conf import settings
 from django.contrib import admin
-from .models import Session, Position, Nomination, Voter, Vote, FormLabel
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+from .counts import forget_session
+from .models import Session, Position, Nomination, Voter, Vote, FormLabel, EligibleMember
+from .results import thaw_results
+from .stats import refresh_candidates
+
+
+# --- Changelists for large tables ---
+ESTIMATE_THRESHOLD = getattr(settings, 'ELECTION_ADMIN_ESTIMATE_THRESHOLD', 10000)
+ESTIMATE_TTL = getattr(settings, 'ELECTION_ADMIN_ESTIMATE_TTL', 60)
+ESTIMATE_REFRESH = getattr(settings, 'ELECTION_ADMIN_ESTIMATE_REFRESH', 3600)
+ANALYSIS_LIMIT = 1000
+LARGE_TABLES = (Nomination, Voter, Vote, EligibleMember)
+
+
+def estimated_count(model):
+    """
+    Cheap row count of a whole table: (count, exact). Uses planner statistics
+    where the database keeps them, otherwise an exact COUNT(*) that is cached
+    for ESTIMATE_TTL seconds.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            row = cursor.fetchone()
+            if row and row[0] > 0:
+                return row[0], False
+        elif connection.vendor == 'sqlite':
+            # Filled in by ANALYZE only (see refresh_estimates); the first number is the row count
+            cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0]), False
+
+    key = f'election:admin_count:{table}'
+    count = cache.get(key)
+    if count is not None:
+        return count, False
+    count = model._default_manager.count()
+    cache.set(key, count, ESTIMATE_TTL)
+    return count, True
+
+
+def refresh_estimates(models=None):
+    """
+    Re-ANALYZE the large tables so estimated_count follows their growth.
+    SQLite never updates sqlite_stat1 on its own; the scheduler calls this
+    every ESTIMATE_REFRESH seconds. analysis_limit bounds the rows sampled
+    per index, so the write lock is held briefly even on a big table.
+    """
+    if connection.vendor != 'sqlite':
+        return []  # PostgreSQL's autovacuum keeps reltuples current
+    tables = [model._meta.db_table for model in (models or LARGE_TABLES)]
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+        for table in tables:
+            cursor.execute(f'ANALYZE "{table}"')
+    return tables
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Unfiltered changelists of big tables page through an estimated total
+    instead of running COUNT(*) on every page load; filtered ones (e.g. by
+    session, which is indexed) still count exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate, exact = estimated_count(queryset.model)
+            if exact or estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
 
 @admin.register(Session)
 class SessionAdmin(admin.ModelAdmin):
-    list_display = ('name', 'status', 'start_nomination', 'end_nomination', 'start_voting', 'end_voting')
-    list_filter = ('status',)
+    list_display = ('name', 'status', 'auto_transitions', 'start_nomination', 'end_nomination', 'start_voting', 'end_voting')
+    list_filter = ('status', 'auto_transitions')
     search_fields = ('name',)
     actions = ['open_nominations', 'close_nominations', 'open_voting', 'close_voting']
 
+    def set_status(self, queryset, status):
+        """Bulk status change; update() sends no post_save, so do what the signals would."""
+        session_ids = list(queryset.values_list('id', flat=True))
+        queryset.update(status=status)
+        for session_id in session_ids:
+            forget_session(session_id)
+        return session_ids
+
     def open_nominations(self, request, queryset):
-        queryset.update(status="Nominations Open")
+        self.set_status(queryset, "Nominations Open")
     open_nominations.short_description = "Open Nominations"
 
     def close_nominations(self, request, queryset):
-        queryset.update(status="Closed")
+        self.set_status(queryset, "Closed")
     close_nominations.short_description = "Close Nominations"
 
     def open_voting(self, request, queryset):
-        queryset.update(status="Voting Open")
+        # Drop results frozen at an earlier close
+        thaw_results(self.set_status(queryset, "Voting Open"))
     open_voting.short_description = "Open Voting"
 
     def close_voting(self, request, queryset):
-        queryset.update(status="Closed")
+        self.set_status(queryset, "Closed")
     close_voting.short_description = "Close Voting"
 
 
 @admin.register(Position)
 class PositionAdmin(admin.ModelAdmin):
-    list_display = ('name',)
+    list_display = ('name', 'session', 'order', 'counting_method', 'seats')
+    list_filter = ('session', 'counting_method')
+    list_select_related = ('session',)
 
 
 @admin.register(Nomination)
-class NominationAdmin(admin.ModelAdmin):
+class NominationAdmin(LargeTableAdmin):
     list_display = ('full_name', 'email', 'desired_position', 'approved', 'session')
     list_filter = ('approved', 'desired_position', 'session')
+    list_select_related = ('desired_position', 'session')
+    search_fields = ('full_name', 'email')
+    autocomplete_fields = ('session',)
     actions = ['approve_nominations', 'reject_nominations']
 
     def approve_nominations(self, request, queryset):
-        queryset.update(approved=True)
+        self.moderate(queryset, approved=True)
     approve_nominations.short_description = "Approve selected nominations"
 
     def reject_nominations(self, request, queryset):
-        queryset.update(approved=False)
+        self.moderate(queryset, approved=False)
     reject_nominations.short_description = "Reject selected nominations"
 
+    @staticmethod
+    def moderate(queryset, approved):
+        # Sessions first: the queryset may filter on the field being updated
+        session_ids = set(queryset.values_list('session_id', flat=True))
+        queryset.update(approved=approved)
+        # update() sends no signals
+        for session_id in session_ids:
+            refresh_candidates(session_id)
+
 @admin.register(Voter)
-class VoterAdmin(admin.ModelAdmin):
+class VoterAdmin(LargeTableAdmin):
     list_display = ('full_name', 'email', 'session', 'voted_at')
     list_filter = ('session',)
+    list_select_related = ('session',)
+    search_fields = ('full_name', 'email')
+    autocomplete_fields = ('session',)
 
 
 @admin.register(Vote)
-class VoteAdmin(admin.ModelAdmin):
+class VoteAdmin(LargeTableAdmin):
     list_display = ('voter', 'candidate_name', 'position', 'session', 'created_at')
     list_filter = ('session','position')
+    list_select_related = ('voter', 'nominee', 'position', 'session')
+    autocomplete_fields = ('session', 'voter', 'nominee')
 
     def candidate_name(self, obj):
         return obj.nominee.full_name if obj.nominee else "-"
@@ -67,3 +182,12 @@ class VoteAdmin(admin.ModelAdmin):
 class FormLabelAdmin(admin.ModelAdmin):
     list_display = ('form_type', 'field_name', 'label_text')
     list_filter = ('form_type',)
+
+
+@admin.register(EligibleMember)
+class EligibleMemberAdmin(LargeTableAdmin):
+    list_display = ('email', 'member_id', 'full_name', 'session')
+    list_filter = ('session',)
+    list_select_related = ('session',)
+    autocomplete_fields = ('session',)
+    search_fields = ('email', 'member_id', 'full_name')
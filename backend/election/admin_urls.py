@@ -8,8 +8,17 @@ urlpatterns = [
     path('votes/', admin_views.votes_list, name='admin_votes'),
     path('results/', admin_views.results_view, name='admin_results'),
     path('voting-control/', admin_views.voting_control, name='admin_voting_control'),
+    path('api/admission/', admin_views.admission_api, name='admin_admission_api'),
+    path('throttling/', admin_views.throttling_view, name='admin_throttling'),
     path('publish-results/<int:session_id>/', admin_views.publish_results, name='admin_publish_results'),
     path('edit-session/<int:session_id>/', admin_views.edit_session, name='admin_edit_session'),
     path('candidate/<int:candidate_id>/', admin_views.candidate_detail, name='admin_candidate_detail'),
     path('voter/<int:voter_id>/', admin_views.voter_detail, name='admin_voter_detail'),  # Add this line
+    path('search/', admin_views.search_api, name='admin_search_api'),
+    path('api/turnout/', admin_views.turnout_api, name='admin_turnout_api'),
+    path('breakdown/', admin_views.breakdown_view, name='admin_breakdown'),
+    path('api/breakdown/', admin_views.breakdown_api, name='admin_breakdown_api'),
+    path('duplicates/', admin_views.duplicates_view, name='admin_duplicates'),
+    path('archives/', admin_views.archive_list, name='admin_archives'),
+    path('archives/<str:name>/', admin_views.archive_detail, name='admin_archive_detail'),
 ]
\ No newline at end of file
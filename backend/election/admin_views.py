@@ -1,7 +1,20 @@
 from django.shortcuts import render, redirect
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.core.paginator import Paginator
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.contrib.admin.views.decorators import staff_member_required
 from django.db.models import Count, Q
-from .models import Session, Position, Voter, Nomination, Vote
+from . import admission, cube, dedupe, throttle
+from .archive import list_archives, read_summary
+from .models import Session, Position, Voter, Nomination, Vote, DuplicateCandidate
+from .results import get_results, freeze_results
+from .scoping import get_panel_session
+from .search import filter_matching, fts_available, search
+from .stats import get_stats
+from .turnout import GRANULARITIES, series
+from .uploads import capped_photo_upload
 from django.contrib import messages
 
 
@@ -10,38 +23,19 @@ from django.contrib import messages
 def admin_dashboard(request):
     """Custom admin dashboard with statistics"""
     
-    # Get current active session
-    current_session = Session.objects.filter(
-        status__in=['Nominations Open', 'Voting Open']
-    ).first()
+    # Get current active session (or the one picked with ?session=)
+    current_session = get_panel_session(request)
     
-    if not current_session:
-        current_session = Session.objects.last()
-    
-    # Statistics
-    total_voters = Voter.objects.filter(session=current_session).count() if current_session else 0
-    total_candidates = Nomination.objects.filter(
-        session=current_session, 
-        approved=True
-    ).count() if current_session else 0
-    total_positions = Position.objects.count()
-    
-    # Get limited data for dashboard
-    candidates = Nomination.objects.filter(
-        session=current_session
-    ).annotate(
-        vote_count=Count('votes')
-    ).order_by('-vote_count')[:5]
-    
-    voters = Voter.objects.filter(session=current_session).order_by('-voted_at')[:6]
+    # Statistics: one materialized row, kept current by the vote and moderation paths
+    stats = get_stats(current_session) if current_session else None
     
     context = {
-        'total_voters': total_voters,
-        'total_candidates': total_candidates,
-        'total_positions': total_positions,
+        'total_voters': stats.voters if stats else 0,
+        'total_candidates': stats.approved_candidates if stats else 0,
+        'total_positions': stats.positions if stats else 0,
         'current_session': current_session,
-        'candidates': candidates,
-        'voters': voters,
+        'stats': stats,
+        'candidates': stats.leaders if stats else [],
     }
     
     return render(request, 'admin/dashboard.html', context)
@@ -51,23 +45,20 @@ def admin_dashboard(request):
 def candidate_list(request):
     """List all candidates with search and filter functionality"""
     
-    current_session = Session.objects.filter(
-        status__in=['Nominations Open', 'Voting Open']
-    ).first()
-    
-    if not current_session:
-        current_session = Session.objects.last()
+    current_session = get_panel_session(request)
     
     # Start with base queryset
     candidates = Nomination.objects.filter(
         session=current_session
     ).annotate(
-        vote_count=Count('votes')
+        vote_count=Count('votes', filter=Q(votes__session=current_session))
     )
     
     # Search functionality
     search_query = request.GET.get('search', '')
-    if search_query:
+    if search_query and fts_available():
+        candidates = filter_matching(candidates, search_query, 'nomination', getattr(current_session, 'id', None))
+    elif search_query:
         candidates = candidates.filter(
             Q(full_name__icontains=search_query) |
             Q(email__icontains=search_query) |
@@ -97,7 +88,7 @@ def candidate_list(request):
     candidates = candidates.order_by(sort_by)
     
     # Get positions for filter dropdown
-    positions = Position.objects.all().order_by('order')
+    positions = Position.objects.for_session(current_session).order_by('order')
     
     context = {
         'candidates': candidates,
@@ -117,18 +108,26 @@ def candidate_list(request):
 def voter_list(request):
     """List all voters"""
     
-    current_session = Session.objects.filter(
-        status__in=['Nominations Open', 'Voting Open']
-    ).first()
-    
-    if not current_session:
-        current_session = Session.objects.last()
+    current_session = get_panel_session(request)
     
     voters = Voter.objects.filter(session=current_session).order_by('-voted_at')
     
+    # Search functionality
+    search_query = request.GET.get('search', '')
+    if search_query and fts_available():
+        voters = filter_matching(voters, search_query, 'voter', getattr(current_session, 'id', None))
+    elif search_query:
+        voters = voters.filter(
+            Q(full_name__icontains=search_query) |
+            Q(email__icontains=search_query) |
+            Q(designation__icontains=search_query) |
+            Q(workplace_address__icontains=search_query)
+        )
+    
     context = {
         'voters': voters,
         'current_session': current_session,
+        'search_query': search_query,
     }
     
     return render(request, 'admin/voter_list.html', context)
@@ -138,12 +137,7 @@ def voter_list(request):
 def votes_list(request):
     """List all votes"""
     
-    current_session = Session.objects.filter(
-        status__in=['Nominations Open', 'Voting Open']
-    ).first()
-    
-    if not current_session:
-        current_session = Session.objects.last()
+    current_session = get_panel_session(request)
     
     votes = Vote.objects.filter(session=current_session).select_related(
         'voter', 'nominee', 'position'
@@ -161,31 +155,10 @@ def votes_list(request):
 def results_view(request):
     """Show election results"""
     
-    current_session = Session.objects.filter(
-        status__in=['Voting Open', 'Closed']
-    ).first()
-    
-    if not current_session:
-        current_session = Session.objects.last()
+    current_session = get_panel_session(request, statuses=('Voting Open', 'Closed'))
     
     # Get results by position
-    positions = Position.objects.all().order_by('order')
-    results = []
-    
-    for position in positions:
-        candidates = Nomination.objects.filter(
-            session=current_session,
-            desired_position=position,
-            approved=True
-        ).annotate(
-            vote_count=Count('votes', filter=Q(votes__session=current_session, votes__position=position))
-        ).order_by('-vote_count')
-        
-        if candidates.exists():
-            results.append({
-                'position': position,
-                'candidates': candidates
-            })
+    results = get_results(current_session) if current_session else []
     
     context = {
         'results': results,
@@ -203,11 +176,33 @@ def voting_control(request):
     
     context = {
         'sessions': sessions,
+        'admission': admission.stats(),
     }
     
     return render(request, 'admin/voting_control.html', context)
 
 
+@staff_member_required
+def admission_api(request):
+    """Ballot admission capacity, load and queue depth, polled by the voting control page"""
+    return JsonResponse(admission.stats())
+
+
+@staff_member_required
+def throttling_view(request):
+    """Rate limit rules and the clients being throttled, with a reset for false positives"""
+    if request.method == 'POST' and request.POST.get('key'):
+        throttle.forgive(request.POST['key'])
+        messages.success(request, f'Limits reset for {request.POST.get("client", "the client")}.')
+        return redirect('admin_throttling')
+
+    context = {
+        'throttle': throttle.stats(),
+    }
+
+    return render(request, 'admin/throttling.html', context)
+
+
 @staff_member_required
 def publish_results(request, session_id):
     """Publish election results and close voting"""
@@ -216,6 +211,8 @@ def publish_results(request, session_id):
         session.status = 'Results Published'
         session.voting_open = False
         session.save()
+        freeze_results(session)
+        cube.build(session)
         
         messages.success(request, f'Results published for {session.name}. Voting is now closed.')
     
@@ -233,6 +230,7 @@ def edit_session(request, session_id):
         session.status = request.POST.get('status')
         session.start_voting = request.POST.get('start_voting')
         session.end_voting = request.POST.get('end_voting')
+        session.auto_transitions = request.POST.get('auto_transitions') == 'on'
         session.save()
         
         messages.success(request, f'Session "{session.name}" updated successfully!')
@@ -246,10 +244,17 @@ def edit_session(request, session_id):
 
 
 @staff_member_required
+@capped_photo_upload
 def candidate_detail(request, candidate_id):
     """View and edit candidate details"""
     candidate = Nomination.objects.get(id=candidate_id)
     
+    if request.method == 'POST' and request.upload_errors:
+        # Nothing is saved when the photo was refused
+        for error in request.upload_errors.values():
+            messages.error(request, error)
+        return redirect('admin_candidate_detail', candidate.id)
+
     if request.method == 'POST':
         # Update candidate fields
         candidate.full_name = request.POST.get('full_name')
@@ -268,8 +273,8 @@ def candidate_detail(request, candidate_id):
         messages.success(request, f'Candidate "{candidate.full_name}" updated successfully!')
         return redirect('admin_candidates')
     
-    # Get vote count
-    vote_count = Vote.objects.filter(nominee=candidate).count()
+    # Get vote count (scoped to the candidate's session)
+    vote_count = Vote.objects.filter(session_id=candidate.session_id, nominee=candidate).count()
     
     context = {
         'candidate': candidate,
@@ -303,11 +308,220 @@ def voter_detail(request, voter_id):
         return redirect('admin_voters')
     
     # Get vote count for this voter
-    votes_cast = Vote.objects.filter(voter=voter).count()
+    votes_cast = Vote.objects.filter(session_id=voter.session_id, voter=voter).count()
     
     context = {
         'voter': voter,
         'votes_cast': votes_cast,
     }
     
-    return render(request, 'admin/voter_detail.html', context)
\ No newline at end of file
+    return render(request, 'admin/voter_detail.html', context)
+
+
+@staff_member_required
+def archive_list(request):
+    """Archived sessions (read straight from the archive files)"""
+    archives = []
+    for path in list_archives():
+        try:
+            header, _ = read_summary(path)
+        except ValueError as exc:
+            # One damaged file must not hide the others
+            archives.append({'name': path.name, 'error': str(exc)})
+            continue
+        archives.append({'name': path.name, 'header': header})
+
+    context = {
+        'archives': archives,
+    }
+
+    return render(request, 'admin/archive_list.html', context)
+
+
+@staff_member_required
+def archive_detail(request, name):
+    """Frozen results of an archived session, without rehydrating it"""
+    path = next((p for p in list_archives() if p.name == name), None)
+    if path is None:
+        raise Http404("Archive not found")
+
+    try:
+        header, results = read_summary(path)
+    except ValueError as exc:
+        raise Http404(str(exc))
+
+    context = {
+        'name': name,
+        'header': header,
+        'results': results,
+    }
+
+    return render(request, 'admin/archive_detail.html', context)
+
+
+@staff_member_required
+def search_api(request):
+    """Typeahead search over candidates and voters of the panel session"""
+    query = request.GET.get('q', '')
+    kind = request.GET.get('type', 'nomination')
+    if kind not in ('nomination', 'voter'):
+        return JsonResponse({'error': 'type must be nomination or voter'}, status=400)
+
+    try:
+        limit = min(int(request.GET.get('limit', 10)), 50)
+    except ValueError:
+        limit = 10
+
+    current_session = get_panel_session(request)
+    session_id = getattr(current_session, 'id', None)
+    detail_url = 'admin_candidate_detail' if kind == 'nomination' else 'admin_voter_detail'
+
+    if fts_available():
+        hits = search(query, kind, session_id, limit)
+    else:
+        model = Nomination if kind == 'nomination' else Voter
+        hits = list(
+            model.objects.filter(session_id=session_id, full_name__icontains=query)
+            .values('id', 'session_id', 'full_name', 'email', 'designation', 'workplace_address')[:limit]
+        ) if query else []
+
+    for hit in hits:
+        hit['url'] = reverse(detail_url, args=[hit['id']])
+
+    return JsonResponse({'query': query, 'type': kind, 'results': hits})
+
+
+def _datetime_param(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    # ValueError for well-formed but impossible values, None for anything else
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'{name} must be an ISO 8601 datetime')
+    return parsed
+
+
+@staff_member_required
+def turnout_api(request):
+    """Votes per minute/hour for the dashboard chart: ?granularity=&start=&end=&position="""
+    granularity = request.GET.get('granularity', 'minute')
+    if granularity not in GRANULARITIES:
+        return JsonResponse({'error': 'granularity must be minute or hour'}, status=400)
+
+    try:
+        start = _datetime_param(request, 'start')
+        end = _datetime_param(request, 'end')
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    try:
+        position_id = int(request.GET['position']) if request.GET.get('position') else None
+    except ValueError:
+        return JsonResponse({'error': 'position must be a position id'}, status=400)
+
+    current_session = get_panel_session(request)
+    if not current_session:
+        return JsonResponse({'granularity': granularity, 'buckets': [], 'positions': {}})
+
+    data = series(current_session, granularity, start, end, position_id)
+    data['positions_meta'] = {
+        str(p.id): p.name for p in Position.objects.for_session(current_session)
+    }
+    return JsonResponse(data)
+
+
+def _breakdown_params(request, current_session):
+    positions = list(Position.objects.for_session(current_session).order_by('order', 'id'))
+    try:
+        position_id = int(request.GET.get('position') or (positions[0].id if positions else 0))
+    except ValueError:
+        position_id = 0
+    by = request.GET.get('by', 'gender')
+    filters = {dimension: request.GET.get(dimension, '') for dimension in cube.DIMENSIONS if dimension != by}
+    return positions, position_id, by, filters
+
+
+@staff_member_required
+def breakdown_view(request):
+    """Results broken down by voter gender, designation and training year"""
+    current_session = get_panel_session(request, statuses=('Voting Open', 'Closed', 'Results Published'))
+
+    positions, position_id, by, filters = [], 0, 'gender', {}
+    table, values, status = None, {}, 200
+    if current_session:
+        positions, position_id, by, filters = _breakdown_params(request, current_session)
+        if by not in cube.DIMENSIONS:
+            by = 'gender'
+        try:
+            table = cube.slice_cube(current_session, position_id, by, filters)
+        except ValueError as exc:
+            messages.error(request, str(exc))
+            status = 400
+        values = cube.dimension_values(current_session, position_id)
+
+    context = {
+        'current_session': current_session,
+        'positions': positions,
+        'position_id': position_id,
+        'by': by,
+        'filters': filters,
+        'dimensions': cube.DIMENSIONS,
+        'values': values,
+        'table': table,
+    }
+
+    return render(request, 'admin/breakdown.html', context, status=status)
+
+
+@staff_member_required
+def breakdown_api(request):
+    """Cube slice as JSON: ?position=&by=gender|designation|training_year&<other dimension>="""
+    current_session = get_panel_session(request, statuses=('Voting Open', 'Closed', 'Results Published'))
+    if not current_session:
+        return JsonResponse({'by': None, 'columns': [], 'rows': []})
+
+    _, position_id, by, filters = _breakdown_params(request, current_session)
+    try:
+        data = cube.slice_cube(current_session, position_id, by, filters)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    data['position_id'] = position_id
+    return JsonResponse(data)
+
+
+@staff_member_required
+def duplicates_view(request):
+    """Review likely duplicate voters and nominees, highest score first"""
+    current_session = get_panel_session(request)
+
+    if request.method == 'POST' and current_session:
+        if request.POST.get('action') == 'scan':
+            summary = dedupe.detect(current_session)
+            found = sum(f for _, f in summary.values())
+            messages.success(request, f'Scanned new records: {found} new candidate pairs.')
+        else:
+            status = {'confirm': 'confirmed', 'dismiss': 'dismissed', 'reopen': 'pending'}.get(request.POST.get('action'))
+            if status:
+                DuplicateCandidate.objects.filter(
+                    session=current_session, id=request.POST.get('candidate_id'),
+                ).update(status=status, reviewed_by=request.user, reviewed_at=timezone.now())
+        return redirect(request.get_full_path())
+
+    kind = request.GET.get('kind', '')
+    status = request.GET.get('status', 'pending')
+    candidates = DuplicateCandidate.objects.filter(session=current_session, status=status)
+    if kind in dedupe.KINDS:
+        candidates = candidates.filter(kind=kind)
+    page = Paginator(candidates.order_by('-score', 'id'), 50).get_page(request.GET.get('page'))
+    dedupe.candidate_records(page.object_list)
+
+    context = {
+        'current_session': current_session,
+        'page': page,
+        'kind': kind,
+        'status': status,
+        'kinds': list(dedupe.KINDS),
+        'statuses': DuplicateCandidate.STATUS_CHOICES,
+    }
+
+    return render(request, 'admin/duplicates.html', context)
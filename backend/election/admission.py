@@ -0,0 +1,231 @@
+"""
+Admission control for ballot submissions.
+
+When voting opens everyone submits at once, and past a point extra
+concurrent writers only make SQLite's write lock slower for all of them. Each
+ballot POST must hold two slots while it runs:
+
+* a per-worker slot, a semaphore of ``ELECTION_ADMISSION_PER_WORKER``;
+* a global slot, one of ``ELECTION_ADMISSION_GLOBAL`` keys in the shared
+  cache taken with ``add()``. Slot keys expire after ``SLOT_TTL`` so a worker
+  that dies mid-request cannot leak capacity. Each holder stores its own
+  token in the key and only deletes the key while it still holds that token,
+  so a request that outlives ``SLOT_TTL`` cannot free a slot someone else
+  has taken since.
+
+A submission that finds no free slot gets the waiting page instead. The page
+keeps the submitted form and re-posts it automatically after a short delay,
+so nobody has to fill in the ballot again. Waiting voters hold a ticket in
+a signed cookie (a 503 response does not save the session). Their queue
+position is their ticket number minus the tickets admitted so far.
+Abandoned tickets never get admitted, so the position is an upper bound.
+The panel's queue depth counts only the tickets seen waiting in the last
+minute or so, since every waiting page re-posts well within a minute.
+
+The cookie also records when the page will re-post. That automatic retry
+is exempt, once, from the per-address rate limit (see
+``throttle.RateLimitMiddleware``), so voters behind a busy site don't use
+up their address's ``voting`` tokens while they wait.
+"""
+import random
+import threading
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.shortcuts import render
+from django.utils import timezone
+
+from .sqlite_cache import named_cache
+
+
+ENABLED = getattr(settings, 'ELECTION_ADMISSION_ENABLED', True)
+PER_WORKER = getattr(settings, 'ELECTION_ADMISSION_PER_WORKER', 4)
+GLOBAL = getattr(settings, 'ELECTION_ADMISSION_GLOBAL', 12)
+SLOT_TTL = 30        # seconds; longer than any ballot write
+ACQUIRE_WAIT = 0.5   # seconds a submission may wait for a slot before being queued
+RETRY_MIN, RETRY_MAX = 2, 15
+TICKET_COOKIE = 'admission_ticket'
+TICKET_AGE = 15 * 60
+
+# Shared across worker processes (see sqlite_cache)
+cache = named_cache('default')
+
+_worker_slots = threading.BoundedSemaphore(PER_WORKER)
+_worker_in_flight = 0
+_worker_lock = threading.Lock()
+
+
+def _slot_key(index):
+    return f'election:admission:slot:{index}'
+
+
+def _minute_key(name, moment=None):
+    return f'election:admission:{name}:{(moment or timezone.now()).strftime("%Y%m%d%H%M")}'
+
+
+def _count(key, timeout=None):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+# --- Slots ---
+def _acquire_global():
+    deadline = time.monotonic() + ACQUIRE_WAIT
+    while True:
+        token = random.getrandbits(62)
+        for index in random.sample(range(GLOBAL), GLOBAL):
+            if cache.add(_slot_key(index), token, SLOT_TTL):
+                return index, token
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.05)
+
+
+def _release_global(index, token):
+    key = _slot_key(index)
+    delete_if = getattr(cache, 'delete_if', None)
+    if delete_if is not None:
+        delete_if(key, token)
+    elif cache.get(key) == token:
+        # Backends without a conditional delete: a (much smaller) race remains
+        cache.delete(key)
+
+
+def acquire():
+    """A global slot (index, token), or None when the site is at capacity."""
+    global _worker_in_flight
+    if not _worker_slots.acquire(timeout=ACQUIRE_WAIT):
+        return None
+    slot = _acquire_global()
+    if slot is None:
+        _worker_slots.release()
+        return None
+    with _worker_lock:
+        _worker_in_flight += 1
+    return slot
+
+
+def release(slot):
+    global _worker_in_flight
+    _release_global(*slot)
+    with _worker_lock:
+        _worker_in_flight -= 1
+    _worker_slots.release()
+
+
+# --- Queue ---
+def _read_cookie(request):
+    """(ticket, time of the automatic retry), or (None, None)."""
+    value = request.get_signed_cookie(TICKET_COOKIE, default=None, salt=TICKET_COOKIE, max_age=TICKET_AGE)
+    if not value:
+        return None, None
+    ticket, _, retry_at = value.partition(':')
+    return int(ticket), int(retry_at or 0)
+
+
+def read_ticket(request):
+    return _read_cookie(request)[0]
+
+
+def is_retry(request):
+    """
+    True for the waiting page's automatic re-post, once per waiting page: it
+    must come after the announced delay and is only honoured a single time.
+    """
+    if not ENABLED or request.method != 'POST':
+        return False
+    ticket, retry_at = _read_cookie(request)
+    if ticket is None or time.time() < retry_at - 1:
+        return False
+    return cache.add(f'election:admission:retry:{ticket}:{retry_at}', 1, TICKET_AGE)
+
+
+def queue_position(ticket):
+    return max(1, ticket - (cache.get('election:admission:admitted') or 0))
+
+
+def admitted(request, response):
+    if read_ticket(request) is not None:
+        _count('election:admission:admitted')
+        response.delete_cookie(TICKET_COOKIE)
+
+
+def retry_after(position):
+    # Roughly one wave of GLOBAL ballots per couple of seconds, plus jitter
+    delay = RETRY_MIN + 2 * (position // max(GLOBAL, 1))
+    return min(RETRY_MAX, delay) + random.randint(0, 2)
+
+
+def waiting_response(request):
+    ticket = read_ticket(request) or _count('election:admission:tickets')
+    position = queue_position(ticket)
+    delay = retry_after(position)
+    _count(_minute_key('queued'), 300)
+    # Distinct tickets waiting this minute: abandoned ones drop out of the count
+    if cache.add(f'{_minute_key("waiting")}:{ticket}', 1, 300):
+        _count(_minute_key('waiting'), 300)
+    fields = [(k, v) for k in request.POST for v in request.POST.getlist(k)]
+    response = render(request, 'election/waiting.html', {
+        'position': position,
+        'retry_after': delay,
+        'fields': fields,
+        'action': request.get_full_path(),
+    }, status=503)
+    response['Retry-After'] = str(delay)
+    response.set_signed_cookie(
+        TICKET_COOKIE, f'{ticket}:{int(time.time()) + delay}', salt=TICKET_COOKIE, max_age=TICKET_AGE, httponly=True, samesite='Lax',
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
+    return response
+
+
+def admission_control(view):
+    """Run ``view`` for POSTs only while holding a worker and a global slot."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not ENABLED or request.method != 'POST':
+            return view(request, *args, **kwargs)
+        slot = acquire()
+        if slot is None:
+            return waiting_response(request)
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            release(slot)
+        admitted(request, response)
+        _count(_minute_key('admitted'), 300)
+        return response
+    wrapper.admission_controlled = True
+    return wrapper
+
+
+# --- Panel ---
+def stats():
+    """Capacity, current load and the last minutes of admissions for the panel."""
+    slots = cache.get_many([_slot_key(i) for i in range(GLOBAL)])
+    now = timezone.now()
+    minutes = [now - timedelta(minutes=m) for m in range(5)]
+    # The current minute has only just started: take the larger of it and the last one
+    waiting = [cache.get(_minute_key('waiting', m)) or 0 for m in minutes[:2]]
+    return {
+        'enabled': ENABLED,
+        'global_capacity': GLOBAL,
+        'global_in_flight': len(slots),
+        'worker_capacity': PER_WORKER,
+        'worker_in_flight': _worker_in_flight,
+        'queue_depth': max(waiting),
+        'recent': [
+            {
+                'minute': timezone.localtime(m).strftime('%H:%M'),
+                'admitted': cache.get(_minute_key('admitted', m)) or 0,
+                'queued': cache.get(_minute_key('queued', m)) or 0,
+            }
+            for m in minutes
+        ],
+    }
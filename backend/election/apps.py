@@ -1,6 +1,24 @@
+import os
+
 from django.apps import AppConfig
 
 
 class ElectionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'election'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+    def warm_up(self):
+        """
+        Pre-compile hot templates, prime the URL resolver, open the database
+        connection and load the ballot. Called by the WSGI entry points once
+        the application is ready (not from ready(), which also runs for
+        management commands); set ELECTION_WARMUP=0 to skip it.
+        """
+        if os.environ.get('ELECTION_WARMUP', '1') == '0':
+            return {}
+        from .warmup import warm_up
+
+        return warm_up()
@@ -0,0 +1,253 @@
+"""
+Closed session archives.
+
+An archive is a gzip-compressed JSON Lines file::
+
+    {"type": "header", "format": "kbaa-election-archive", "version": 2, ...}
+    {"type": "results", "data": {...frozen ResultSnapshot data...}}
+    {"type": "session", "fields": {...}}
+    {"type": "position", "fields": {...}}
+    {"type": "eligible", "fields": {...}}
+    {"type": "nomination", "fields": {...}}
+    {"type": "voter", "fields": {...}}
+    {"type": "vote", "fields": {...}}
+    {"type": "ranking", "fields": {...}}
+    {"type": "ledger", "fields": {...}}
+    {"type": "ledger_checkpoint", "fields": {...}}
+    {"type": "receipt", "fields": {...}}
+
+The header describes the session, the record counts and the field names of
+every record type, so the file can be read without this code base. Header and
+results come first: the panel viewer only decompresses those two lines and
+never rehydrates the full data.
+
+The rows are streamed without a transaction (on SQLite one would hold the
+write lock, and block every ballot, for the whole dump). The header counts
+the rows actually written instead: the records go to their own gzip member
+first, and the header member is then put in front of it. Readers see one
+continuous stream, as with ``zcat``.
+
+Purging removes the archived rows and also drops, without archiving, the
+tables derived from them or only needed while the session ran: turnout
+buckets, result cube cells, dedupe keys and duplicate candidates, and the
+outbox (undelivered confirmations included). The session row, its snapshot,
+statistics and transition log stay, as do the positions.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    Position, EligibleMember, Nomination, Voter, Vote, BallotRanking, LedgerEntry, LedgerCheckpoint,
+    BallotReceipt, TurnoutBucket, ResultCubeCell, DedupeKey, DuplicateCandidate, OutboxMessage,
+)
+from .results import freeze_results
+
+
+ARCHIVE_FORMAT = 'kbaa-election-archive'
+ARCHIVE_VERSION = 2
+ARCHIVE_ROOT = Path(getattr(settings, 'ELECTION_ARCHIVE_ROOT', settings.BASE_DIR / 'archives'))
+
+# Record type -> (queryset factory, fields). Order matters for restores.
+SECTIONS = [
+    # Shared positions too (session_id null), with what a recount needs
+    ('position', lambda s: Position.objects.for_session(s),
+     ['id', 'session_id', 'name', 'order', 'counting_method', 'seats']),
+    # The voter roll the session was run against
+    ('eligible', lambda s: EligibleMember.objects.filter(session=s),
+     ['id', 'session_id', 'email', 'member_id', 'full_name', 'created_at']),
+    ('nomination', lambda s: Nomination.objects.filter(session=s),
+     ['id', 'session_id', 'full_name', 'email', 'phone_number', 'gender', 'designation',
+      'workplace_address', 'last_training_date', 'interested', 'desired_position_id',
+      'approved', 'photo', 'created_at']),
+    ('voter', lambda s: Voter.objects.filter(session=s),
+     ['id', 'session_id', 'full_name', 'email', 'gender', 'designation',
+      'workplace_address', 'last_training_date', 'voted_at']),
+    ('vote', lambda s: Vote.objects.filter(session=s),
+     ['id', 'session_id', 'voter_id', 'position_id', 'nominee_id', 'created_at']),
+    # Ranked preferences: without them IRV/STV positions cannot be recounted
+    ('ranking', lambda s: BallotRanking.objects.filter(session=s),
+     ['id', 'session_id', 'voter_id', 'position_id', 'nominee_id', 'rank']),
+    ('ledger', lambda s: LedgerEntry.objects.filter(session=s),
+     ['id', 'session_id', 'seq', 'vote_id', 'voter_id', 'position_id', 'nominee_id',
+      'cast_at', 'prev_hash', 'hash']),
+    ('ledger_checkpoint', lambda s: LedgerCheckpoint.objects.filter(session=s),
+     ['id', 'session_id', 'seq', 'entries', 'merkle_root', 'chain_hash', 'created_at']),
+    ('receipt', lambda s: BallotReceipt.objects.filter(session=s),
+     ['id', 'session_id', 'voter_id', 'code_hash', 'summary', 'created_at']),
+]
+
+# Purged with the archived rows but not archived (see the module docstring)
+DERIVED = [TurnoutBucket, ResultCubeCell, DedupeKey, DuplicateCandidate, OutboxMessage]
+
+SESSION_FIELDS = [
+    'id', 'name', 'start_nomination', 'end_nomination', 'start_voting', 'end_voting',
+    'nomination_open', 'voting_open', 'auto_transitions', 'status', 'created_at',
+]
+
+
+def archive_path(session):
+    stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    return ARCHIVE_ROOT / f'session-{session.id}-{stamp}.jsonl.gz'
+
+
+def _line(record):
+    return (json.dumps(record, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n').encode()
+
+
+def write_archive(session, path=None, chunk_size=2000):
+    """Write the full data of ``session`` to a compressed archive. Returns (path, sha256)."""
+    path = Path(path or archive_path(session))
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    snapshot = freeze_results(session)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    body_path = path.with_suffix(path.suffix + '.body')
+    counts = {}
+    try:
+        with gzip.open(body_path, 'wb') as fh:
+            fh.write(_line({
+                'type': 'session',
+                'fields': {f: getattr(session, f) for f in SESSION_FIELDS},
+            }))
+            for name, factory, fields in SECTIONS:
+                counts[name] = 0
+                for row in factory(session).order_by('pk').values(*fields).iterator(chunk_size=chunk_size):
+                    fh.write(_line({'type': name, 'fields': row}))
+                    counts[name] += 1
+
+        with open(tmp_path, 'wb') as out:
+            with gzip.GzipFile(fileobj=out, mode='wb') as head:
+                head.write(_line(_header(session, counts)))
+                head.write(_line({'type': 'results', 'data': snapshot.data}))
+            with open(body_path, 'rb') as body:
+                shutil.copyfileobj(body, out)
+        os.replace(tmp_path, path)
+    finally:
+        body_path.unlink(missing_ok=True)
+        tmp_path.unlink(missing_ok=True)
+
+    return path, file_sha256(path)
+
+
+def _header(session, counts):
+    return {
+        'type': 'header',
+        'format': ARCHIVE_FORMAT,
+        'version': ARCHIVE_VERSION,
+        'created_at': timezone.now(),
+        'session': {'id': session.id, 'name': session.name, 'status': session.status},
+        'counts': counts,
+        'fields': {
+            'session': SESSION_FIELDS,
+            **{name: fields for name, _, fields in SECTIONS},
+        },
+    }
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def verify_archive(path):
+    """Re-read the whole archive and check the record counts against its header."""
+    counts = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        header = json.loads(fh.readline())
+        for line in fh:
+            record_type = json.loads(line)['type']
+            counts[record_type] = counts.get(record_type, 0) + 1
+    return all(counts.get(name, 0) == expected for name, expected in header['counts'].items())
+
+
+def purge_session_rows(session, batch_size=500):
+    """
+    Delete the archived rows, and the derived ones, from the live tables, one
+    short transaction per batch. Returns {record type or model name: rows deleted}.
+    """
+    deleted = {}
+    for model in DERIVED:
+        deleted[str(model._meta.verbose_name)] = _delete_in_batches(model.objects.filter(session=session), batch_size)
+    for name, factory, _ in reversed(SECTIONS):
+        if name == 'position':
+            # Positions are tiny and may be referenced by snapshots; keep them
+            continue
+        deleted[name] = _delete_in_batches(factory(session), batch_size)
+    return deleted
+
+
+def _delete_in_batches(queryset, batch_size):
+    total = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            queryset.model.objects.filter(pk__in=ids).delete()
+        total += len(ids)
+
+
+def incremental_vacuum(pages=1000):
+    """
+    Return free pages to the OS in small steps (SQLite only).
+    Returns the number of free pages left, or None when not applicable.
+    """
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum')
+        if cursor.fetchone()[0] != 2:  # 2 = INCREMENTAL
+            return None
+        while True:
+            cursor.execute('PRAGMA freelist_count')
+            free = cursor.fetchone()[0]
+            if not free:
+                return 0
+            cursor.execute(f'PRAGMA incremental_vacuum({int(pages)})')
+            cursor.fetchall()
+
+
+def enable_incremental_vacuum():
+    """Switch the SQLite file to incremental auto-vacuum (needs one full VACUUM)."""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        cursor.execute('VACUUM')
+
+
+# --- Read-only access for the panel viewer ---
+def list_archives():
+    if not ARCHIVE_ROOT.exists():
+        return []
+    return sorted(
+        (p for p in ARCHIVE_ROOT.glob('*.jsonl.gz')),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+
+
+def read_summary(path):
+    """
+    Header and frozen results only: the remaining records are never
+    decompressed. Raises ValueError for a truncated, damaged or foreign file.
+    """
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as fh:
+            header = json.loads(fh.readline())
+            if not isinstance(header, dict) or header.get('format') != ARCHIVE_FORMAT:
+                raise ValueError(f'{path.name} is not an election archive')
+            results = json.loads(fh.readline())
+        return header, results['data']
+    except (OSError, EOFError, KeyError, TypeError) as exc:
+        raise ValueError(f'{path.name} cannot be read: {exc}') from exc
@@ -0,0 +1,93 @@
+"""
+Cached ballot catalogue.
+
+The ballot of a session is the ordered list of positions that have approved
+candidates, each with its candidate list. It changes only when nominations or
+positions are edited, so it is built once and served from the cache for every
+voting step instead of re-running one ``exists()`` query per position.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import Position, Nomination
+from .sqlite_cache import named_cache
+
+
+BALLOT_TTL = getattr(settings, 'ELECTION_BALLOT_TTL', 600)
+
+# Shared across worker processes (see sqlite_cache)
+cache = named_cache('ballot')
+
+
+def _generation():
+    return cache.get('election:ballot_generation', 0)
+
+
+def _key(session_id):
+    return f'election:ballot:{_generation()}:{session_id}'
+
+
+def build_ballot(session):
+    """Build the ballot from the database: [{'position': ..., 'candidates': [...]}, ...]"""
+    positions = Position.objects.for_session(session).order_by('order')
+    candidates = Nomination.objects.filter(
+        session=session,
+        approved=True,
+        desired_position__isnull=False,
+    ).order_by('id')
+
+    by_position = defaultdict(list)
+    for candidate in candidates:
+        by_position[candidate.desired_position_id].append(candidate)
+
+    return [
+        {'position': position, 'candidates': by_position[position.id]}
+        for position in positions
+        if by_position[position.id]
+    ]
+
+
+def get_ballot(session):
+    key = _key(session.pk)
+    ballot = cache.get(key)
+    if ballot is None:
+        ballot = build_ballot(session)
+        cache.set(key, ballot, BALLOT_TTL)
+    return ballot
+
+
+def warm_ballot(session):
+    ballot = build_ballot(session)
+    cache.set(_key(session.pk), ballot, BALLOT_TTL)
+    return ballot
+
+
+def invalidate_ballot(session_id=None):
+    """Drop one session's ballot, or every ballot when ``session_id`` is None."""
+    if session_id is None:
+        try:
+            cache.incr('election:ballot_generation')
+        except ValueError:
+            cache.set('election:ballot_generation', 1, None)
+    else:
+        cache.delete(_key(session_id))
+
+
+def find_entry(ballot, position_id):
+    for entry in ballot:
+        if str(entry['position'].id) == str(position_id):
+            return entry
+    return None
+
+
+def next_entry(ballot, position):
+    """Return the ballot entry after ``position``, or None when it was the last one."""
+    for index, entry in enumerate(ballot):
+        if entry['position'].id == position.id:
+            return ballot[index + 1] if index + 1 < len(ballot) else None
+    # Position not on the ballot: continue with the first one ordered after it
+    for entry in ballot:
+        if entry['position'].order > position.order:
+            return entry
+    return None
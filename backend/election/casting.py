@@ -0,0 +1,40 @@
+"""
+The ballot write path, shared by ``voting_view`` and ``manage.py bench_ballots``.
+
+One step of a ballot is a single short transaction: the vote row, the ranked
+preferences for ranked positions, and (through the Vote post_save receivers)
+the ledger entry and rollups. The (voter, position) unique constraint is what
+rejects a second vote, so a stale token or a second tab cannot double-vote
+on any backend. The vote that completes a ballot also queues the voter's
+confirmation email and counts the ballot on the dashboard, in the same
+transaction.
+"""
+from django.db import IntegrityError, transaction
+
+from .models import Voter, Vote, BallotRanking
+from .outbox import queue_ballot_confirmation
+from .stats import record_ballot_completed
+
+
+def upsert_voter(session, email, details):
+    """The session's voter with ``email``, created or updated with ``details``."""
+    return Voter.objects.update_or_create(session=session, email=email, defaults=details)
+
+
+def cast_vote(session, voter, position, nominee, ranking=None, completes_ballot=False):
+    """Record ``voter``'s choice for ``position``; False if they had already voted there."""
+    try:
+        with transaction.atomic():
+            Vote.objects.create(session=session, voter=voter, position=position, nominee=nominee)
+            # Ranked positions also keep the full preference order
+            if position.is_ranked:
+                BallotRanking.objects.bulk_create([
+                    BallotRanking(session=session, voter=voter, position=position, nominee_id=nominee_id, rank=rank)
+                    for rank, nominee_id in enumerate(ranking or [], start=1)
+                ])
+            if completes_ballot:
+                queue_ballot_confirmation(session, voter)
+                record_ballot_completed(session.pk)
+    except IntegrityError:
+        return False
+    return True
@@ -0,0 +1,161 @@
+"""
+Live vote counts for the polling dashboards.
+
+* Tally version: a per-session counter in the shared cache, bumped after
+  every committed vote. It is the ETag of the vote count API, so a dashboard
+  whose counts have not changed gets a 304 without touching the database.
+* Single flight: the counts of a session are computed once per tally version
+  (one GROUP BY over every position) and shared. Concurrent requests for the
+  same version wait for the one computing it, within a process on an event
+  and across workers on a cache lock, instead of each running the query.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count
+
+from .models import Position, Vote
+from .scoping import get_public_session
+from .sqlite_cache import named_cache
+
+
+COUNTS_TTL = getattr(settings, 'ELECTION_VOTE_COUNTS_TTL', 60)
+SESSION_TTL = getattr(settings, 'ELECTION_VOTE_COUNTS_SESSION_TTL', 30)
+FLIGHT_WAIT = 2.0  # seconds a follower waits for the leader before computing itself
+FLIGHT_POLL = 0.02
+
+# Shared across worker processes (see sqlite_cache)
+cache = named_cache('results')
+
+
+# --- Tally version ---
+def _version_key(session_id):
+    return f'election:tally_version:{session_id}'
+
+
+def _seed():
+    # If the counter is ever evicted, restart above any value it could have reached
+    return time.time_ns() // 1000
+
+
+def tally_version(session_id):
+    key = _version_key(session_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(session_id):
+    key = _version_key(session_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _seed(), None)
+
+
+# --- Session lookup ---
+def _session_key(session_id):
+    return f'election:counts_session:{session_id or "open"}'
+
+
+def live_session_id(session_id=None):
+    """Id of the open session the API serves (None when voting is closed), cached briefly."""
+    key = _session_key(session_id)
+    cached = cache.get(key)
+    if cached is None:
+        session = get_public_session(session_id, ['Voting Open'])
+        cached = session.id if session else 0
+        cache.set(key, cached, SESSION_TTL)
+    return cached or None
+
+
+def forget_session(session_id):
+    cache.delete_many([_session_key(session_id), _session_key(None)])
+
+
+# --- Single flight ---
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def single_flight(key, compute, timeout):
+    """
+    ``cache.get(key)``, or ``compute()`` stored under ``key``, with at most
+    one computation running per key at a time.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        flight.event.wait(FLIGHT_WAIT)
+        return flight.value if flight.value is not None else compute()
+
+    try:
+        flight.value = _shared_flight(key, compute, timeout)
+        return flight.value
+    finally:
+        flight.event.set()
+        with _flights_lock:
+            _flights.pop(key, None)
+
+
+def _shared_flight(key, compute, timeout):
+    lock = f'{key}:lock'
+    if cache.add(lock, 1, FLIGHT_WAIT):
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+            return value
+        finally:
+            cache.delete(lock)
+
+    # Another worker is computing it
+    deadline = time.monotonic() + FLIGHT_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(FLIGHT_POLL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+    return compute()
+
+
+# --- Counts ---
+def compute_counts(session_id):
+    """{position_id: {nominee_id: count}} for every position of the session."""
+    counts = {
+        position_id: {}
+        for position_id in Position.objects.for_session(session_id).values_list('id', flat=True)
+    }
+    rows = (
+        Vote.objects.filter(session_id=session_id)
+        .values_list('position_id', 'nominee_id')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for position_id, nominee_id, count in rows:
+        counts.setdefault(position_id, {})[nominee_id] = count
+    return counts
+
+
+def get_counts(session_id, version):
+    return single_flight(
+        f'election:vote_counts:{session_id}:{version}',
+        lambda: compute_counts(session_id),
+        COUNTS_TTL,
+    )
@@ -0,0 +1,154 @@
+"""
+Demographic breakdown cube.
+
+Results are pre-aggregated per (position, nominee) x gender x designation x
+training year, so the breakdown page slices a small table instead of joining
+Vote with Voter on the live database. Cells are bumped by the Vote post_save
+receiver and fully rebuilt when results are published (voter details can be
+edited in the panel after they voted) or with ``manage.py build_cube``.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import ResultCubeCell, Vote
+from .watermarks import split_at_watermark
+
+
+DIMENSIONS = ('gender', 'designation', 'training_year')
+
+
+def normalize_designation(designation):
+    return ' '.join((designation or '').split()).title()[:100]
+
+
+def training_year(last_training_date):
+    return last_training_date.year if last_training_date else 0
+
+
+def record_vote(vote, voter):
+    """Count one new vote into its cube cell. ``voter`` is the in-memory Voter of the vote."""
+    lookup = {
+        'session_id': vote.session_id,
+        'position_id': vote.position_id,
+        'nominee_id': vote.nominee_id,
+        'gender': voter.gender,
+        'designation': normalize_designation(voter.designation),
+        'training_year': training_year(voter.last_training_date),
+    }
+    if ResultCubeCell.objects.filter(**lookup).update(votes=F('votes') + 1):
+        return
+    try:
+        with transaction.atomic():
+            ResultCubeCell.objects.create(votes=1, **lookup)
+    except IntegrityError:
+        ResultCubeCell.objects.filter(**lookup).update(votes=F('votes') + 1)
+
+
+def _cells(votes):
+    rows = (
+        votes.values(
+            'position_id', 'nominee_id',
+            'voter__gender', 'voter__designation', 'voter__last_training_date',
+        )
+        .annotate(votes=Count('id'))
+        .order_by()
+    )
+
+    cells = defaultdict(int)
+    for row in rows.iterator(chunk_size=5000):
+        key = (
+            row['position_id'],
+            row['nominee_id'],
+            row['voter__gender'],
+            normalize_designation(row['voter__designation']),
+            training_year(row['voter__last_training_date']),
+        )
+        cells[key] += row['votes']
+    return cells
+
+
+def build(session, batch_size=1000):
+    """Rebuild the cube of ``session`` from Vote x Voter. Returns the number of cells."""
+    counted, newer = split_at_watermark(Vote.objects.filter(session=session))
+    cells = _cells(counted)
+
+    with transaction.atomic():
+        # Votes cast while the rest was counted
+        for key, votes in _cells(newer).items():
+            cells[key] += votes
+        ResultCubeCell.objects.filter(session=session).delete()
+        ResultCubeCell.objects.bulk_create(
+            [
+                ResultCubeCell(
+                    session=session,
+                    position_id=position_id,
+                    nominee_id=nominee_id,
+                    gender=gender,
+                    designation=designation,
+                    training_year=year,
+                    votes=votes,
+                )
+                for (position_id, nominee_id, gender, designation, year), votes in cells.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(cells)
+
+
+def slice_cube(session, position_id, by, filters=None):
+    """
+    Nominee x ``by`` matrix for one position::
+
+        {'by': 'gender', 'columns': ['Female', 'Male'],
+         'rows': [{'nominee_id': 1, 'full_name': ..., 'values': [3, 5], 'total': 8}, ...]}
+
+    ``filters`` narrows the other dimensions, e.g. {'gender': 'Female'}.
+    """
+    if by not in DIMENSIONS:
+        raise ValueError(f'by must be one of {", ".join(DIMENSIONS)}')
+
+    cells = ResultCubeCell.objects.filter(session=session, position_id=position_id)
+    for dimension, value in (filters or {}).items():
+        if dimension in DIMENSIONS and value not in (None, ''):
+            cells = cells.filter(**{dimension: value})
+
+    rows = (
+        cells.values('nominee_id', 'nominee__full_name', by)
+        .annotate(total=Sum('votes'))
+        .order_by('nominee_id', by)
+    )
+
+    columns = set()
+    matrix = defaultdict(dict)
+    names = {}
+    for row in rows:
+        columns.add(row[by])
+        matrix[row['nominee_id']][row[by]] = row['total']
+        names[row['nominee_id']] = row['nominee__full_name']
+    columns = sorted(columns)
+
+    result_rows = [
+        {
+            'nominee_id': nominee_id,
+            'full_name': names[nominee_id],
+            'values': [values.get(column, 0) for column in columns],
+            'total': sum(values.values()),
+        }
+        for nominee_id, values in matrix.items()
+    ]
+    result_rows.sort(key=lambda r: -r['total'])
+
+    return {'by': by, 'columns': columns, 'rows': result_rows}
+
+
+def dimension_values(session, position_id=None):
+    """Distinct values of every dimension, for the filter dropdowns."""
+    cells = ResultCubeCell.objects.filter(session=session)
+    if position_id:
+        cells = cells.filter(position_id=position_id)
+    return {
+        dimension: list(cells.order_by(dimension).values_list(dimension, flat=True).distinct())
+        for dimension in DIMENSIONS
+    }
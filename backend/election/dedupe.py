@@ -0,0 +1,230 @@
+"""
+Duplicate voter and nominee detection.
+
+``(session, email)`` uniqueness stops nobody with a second address, so likely
+duplicates are found by name, designation and workplace instead. Comparing
+every pair is O(n²); records are grouped into blocks by cheap keys and only
+pairs that share a block are scored:
+
+* ``n:<codes>``: the Soundex codes of all name tokens, sorted, so "Rahim
+  Uddin" and "Uddin Rahim" or "Rohim Uddin" land in the same block;
+* ``t:<code>:<token>``: each name token's code combined with each
+  significant workplace token, which catches shortened or partial names at
+  the same workplace.
+
+Honorifics and the very common "Md"/"Mohammad" forms are dropped before
+coding; blocks larger than ``MAX_BLOCK`` are skipped as uninformative.
+
+Keys are stored in ``DedupeKey``, so a run only processes records added since
+the last one (``detect``) and compares them against everything already keyed.
+Pairs scoring at least ``THRESHOLD`` with some workplace in common are
+written as ``DuplicateCandidate`` rows for the panel review page as each batch
+finishes. Name and designation alone can reach the threshold, and two
+people with a common name and the same job at different places are not
+duplicates.
+"""
+import re
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .cube import normalize_designation
+from .models import DedupeKey, DuplicateCandidate, Nomination, Voter
+
+
+KINDS = {'voter': Voter, 'nomination': Nomination}
+FIELDS = ['id', 'full_name', 'email', 'designation', 'workplace_address']
+
+THRESHOLD = getattr(settings, 'ELECTION_DEDUPE_THRESHOLD', 0.75)
+MAX_BLOCK = 500
+BATCH_SIZE = 500
+WEIGHTS = {'name': 0.6, 'designation': 0.15, 'workplace': 0.25}
+
+NAME_STOPWORDS = {
+    'md', 'mohammad', 'mohammed', 'muhammad', 'mohd', 'mst', 'mosammat', 'mossammat', 'most',
+    'sk', 'sheikh', 'dr', 'mr', 'mrs', 'ms', 'miss', 'prof', 'engr',
+}
+WORKPLACE_STOPWORDS = {'the', 'of', 'and', 'at', 'in', 'road', 'rd', 'street', 'st', 'house', 'no', 'bangladesh'}
+WORKPLACE_ABBREVIATIONS = {
+    'hosp': 'hospital', 'med': 'medical', 'coll': 'college', 'clg': 'college', 'univ': 'university',
+    'govt': 'government', 'gov': 'government', 'dist': 'district', 'ctg': 'chittagong',
+    'chattogram': 'chittagong', 'dhk': 'dhaka', 'uhc': 'upazila health complex',
+}
+
+
+# --- Normalisation ---
+def _tokens(text):
+    return re.findall(r'[a-z0-9]+', (text or '').lower())
+
+
+def name_tokens(name):
+    return [t for t in _tokens(name) if t not in NAME_STOPWORDS and not t.isdigit()]
+
+
+def workplace_tokens(address):
+    tokens = []
+    for token in _tokens(address):
+        for part in WORKPLACE_ABBREVIATIONS.get(token, token).split():
+            if part not in WORKPLACE_STOPWORDS and len(part) > 2:
+                tokens.append(part)
+    return tokens
+
+
+_SOUNDEX = {c: str(d) for d, letters in enumerate(
+    ['aeiouyhw', 'bfpv', 'cgjkqsxz', 'dt', 'l', 'mn', 'r']) for c in letters}
+
+
+def soundex(token):
+    """American Soundex, e.g. "Rahman" and "Rohman" are both R550."""
+    if not token:
+        return ''
+    if token[0].isdigit():
+        return token
+    code, last = token[0].upper(), _SOUNDEX.get(token[0], '')
+    for char in token[1:]:
+        digit = _SOUNDEX.get(char, '')
+        if digit and digit != '0' and digit != last:
+            code += digit
+        if char not in 'hw':
+            last = digit
+    return (code + '000')[:4]
+
+
+def blocking_keys(record):
+    codes = [soundex(t) for t in name_tokens(record['full_name'])]
+    if not codes:
+        return set()
+    keys = {'n:' + ' '.join(sorted(codes))}
+    places = sorted(set(workplace_tokens(record['workplace_address'])))
+    for code in set(codes):
+        for place in places:
+            keys.add(f't:{code}:{place}'[:120])
+    return keys
+
+
+# --- Scoring ---
+def _jaccard(a, b):
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a | b else 0.0
+
+
+def score(a, b):
+    """(score, reasons) for two records; score is in [0, 1]."""
+    names_a, names_b = name_tokens(a['full_name']), name_tokens(b['full_name'])
+    name = max(
+        SequenceMatcher(None, ' '.join(sorted(names_a)), ' '.join(sorted(names_b))).ratio(),
+        _jaccard(map(soundex, names_a), map(soundex, names_b)),
+    )
+    designation = float(
+        normalize_designation(a['designation']).lower() == normalize_designation(b['designation']).lower()
+    )
+    workplace = _jaccard(workplace_tokens(a['workplace_address']), workplace_tokens(b['workplace_address']))
+    reasons = {'name': round(name, 3), 'designation': designation, 'workplace': round(workplace, 3)}
+    total = sum(WEIGHTS[part] * value for part, value in reasons.items())
+    return round(total, 4), reasons
+
+
+def is_candidate(total, reasons):
+    return total >= THRESHOLD and reasons['workplace'] > 0
+
+
+# --- Detection ---
+def _new_records(session, kind):
+    watermark = DedupeKey.objects.filter(session=session, kind=kind).aggregate(m=Max('object_id'))['m'] or 0
+    return (
+        KINDS[kind].objects.filter(session=session, id__gt=watermark)
+        .order_by('id')
+        .values(*FIELDS)
+    )
+
+
+def _process_batch(session, kind, batch):
+    model = KINDS[kind]
+    keys = {record['id']: blocking_keys(record) for record in batch}
+    DedupeKey.objects.bulk_create(
+        [
+            DedupeKey(session=session, kind=kind, object_id=object_id, key=key)
+            for object_id, record_keys in keys.items() for key in record_keys
+        ],
+        ignore_conflicts=True,
+    )
+
+    all_keys = set().union(*keys.values())
+    sizes = dict(
+        DedupeKey.objects.filter(session=session, kind=kind, key__in=all_keys)
+        .values_list('key')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    usable = {key for key in all_keys if 1 < sizes.get(key, 0) <= MAX_BLOCK}
+
+    members = {}
+    for key, object_id in DedupeKey.objects.filter(
+        session=session, kind=kind, key__in=usable,
+    ).values_list('key', 'object_id'):
+        members.setdefault(key, []).append(object_id)
+
+    pairs = set()
+    for object_id, record_keys in keys.items():
+        for key in record_keys & usable:
+            for other in members[key]:
+                if other != object_id:
+                    pairs.add((min(object_id, other), max(object_id, other)))
+    if not pairs:
+        return 0
+
+    ids = {i for pair in pairs for i in pair}
+    records = {r['id']: r for r in model.objects.filter(id__in=ids).values(*FIELDS)}
+    candidates = []
+    for first, second in pairs:
+        if first not in records or second not in records:
+            continue
+        total, reasons = score(records[first], records[second])
+        if is_candidate(total, reasons):
+            candidates.append(DuplicateCandidate(
+                session=session, kind=kind, first_id=first, second_id=second, score=total, reasons=reasons,
+            ))
+    DuplicateCandidate.objects.bulk_create(candidates, ignore_conflicts=True)
+    return len(candidates)
+
+
+def detect(session, kinds=None, batch_size=BATCH_SIZE):
+    """
+    Key and compare every record of ``session`` added since the last run.
+    Returns {kind: (records processed, candidate pairs found)}.
+    """
+    summary = {}
+    for kind in kinds or KINDS:
+        processed = found = 0
+        batch = []
+        for record in _new_records(session, kind).iterator(chunk_size=batch_size):
+            batch.append(record)
+            if len(batch) == batch_size:
+                found += _process_batch(session, kind, batch)
+                processed += len(batch)
+                batch = []
+        if batch:
+            found += _process_batch(session, kind, batch)
+            processed += len(batch)
+        summary[kind] = (processed, found)
+    return summary
+
+
+def reset(session, kinds=None):
+    """Forget the keys (and pending pairs) of ``session`` so the next run starts over."""
+    kinds = list(kinds or KINDS)
+    DedupeKey.objects.filter(session=session, kind__in=kinds).delete()
+    DuplicateCandidate.objects.filter(session=session, kind__in=kinds, status='pending').delete()
+
+
+def candidate_records(candidates):
+    """Attach ``first``/``second`` model instances to a page of DuplicateCandidate rows."""
+    wanted = {}
+    for candidate in candidates:
+        wanted.setdefault(candidate.kind, set()).update((candidate.first_id, candidate.second_id))
+    objects = {kind: KINDS[kind].objects.in_bulk(ids) for kind, ids in wanted.items()}
+    for candidate in candidates:
+        candidate.first = objects[candidate.kind].get(candidate.first_id)
+        candidate.second = objects[candidate.kind].get(candidate.second_id)
+    return candidates
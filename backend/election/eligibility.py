@@ -0,0 +1,109 @@
+"""
+Eligible member roll lookups.
+
+Each worker process keeps the roll of every session it has seen as a pair of
+frozensets (normalized emails and member IDs), so checking an address at
+ballot time is an in-memory set lookup. Ineligible addresses are rejected
+without touching the database.
+
+A session with an empty roll is treated as open to everyone, which keeps
+elections that never uploaded a roll working as before.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import EligibleMember
+
+
+# Seconds a worker trusts its copy of a roll before reloading it
+ROLL_TTL = getattr(settings, 'ELECTION_ROLL_TTL', 300)
+
+_rolls = {}
+_lock = threading.Lock()
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def normalize_member_id(member_id):
+    return (member_id or '').strip().upper()
+
+
+def _version_key(session_id):
+    return f'election:roll_version:{session_id}'
+
+
+class Roll:
+    """Immutable in-memory snapshot of one session's eligible members."""
+
+    __slots__ = ('emails', 'member_ids', 'version', 'loaded_at')
+
+    def __init__(self, emails, member_ids, version):
+        self.emails = frozenset(emails)
+        self.member_ids = frozenset(member_ids)
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        """True when no roll was uploaded for the session."""
+        return not self.emails and not self.member_ids
+
+    def __len__(self):
+        return len(self.emails)
+
+
+def _load_roll(session_id, version):
+    emails = set()
+    member_ids = set()
+    rows = EligibleMember.objects.filter(session_id=session_id).values_list('email', 'member_id')
+    for email, member_id in rows.iterator(chunk_size=5000):
+        emails.add(normalize_email(email))
+        if member_id:
+            member_ids.add(normalize_member_id(member_id))
+    return Roll(emails, member_ids, version)
+
+
+def get_roll(session):
+    """Return the cached roll for ``session`` (a Session or its id), loading it if stale."""
+    session_id = getattr(session, 'pk', session)
+    version = cache.get(_version_key(session_id), 0)
+
+    roll = _rolls.get(session_id)
+    if (
+        roll is None
+        or roll.version != version
+        or time.monotonic() - roll.loaded_at > ROLL_TTL
+    ):
+        with _lock:
+            roll = _rolls.get(session_id)
+            if roll is None or roll.version != version or time.monotonic() - roll.loaded_at > ROLL_TTL:
+                roll = _load_roll(session_id, version)
+                _rolls[session_id] = roll
+    return roll
+
+
+def invalidate_roll(session_id):
+    """Drop this worker's copy and tell the other workers to reload."""
+    key = _version_key(session_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+    _rolls.pop(session_id, None)
+
+
+def is_eligible(session, email=None, member_id=None):
+    """Check an email and/or member ID against the session's roll, in memory."""
+    roll = get_roll(session)
+    if roll.is_open:
+        return True
+    if email and normalize_email(email) in roll.emails:
+        return True
+    if member_id and normalize_member_id(member_id) in roll.member_ids:
+        return True
+    return False
@@ -41,8 +41,12 @@ class NominationForm(forms.ModelForm):
         }
 
     def __init__(self, *args, **kwargs):
+        session = kwargs.pop('session')  # session the nomination is for
         super().__init__(*args, **kwargs)
 
+        # Only this session's positions (and the shared ones) are on its ballot
+        self.fields['desired_position'].queryset = Position.objects.for_session(session).order_by('order', 'id')
+
         # Dynamically set labels from admin-editable FormLabel
         for field_name, field in self.fields.items():
             try:
@@ -93,15 +97,51 @@ class VoteForm(forms.Form):
     def __init__(self, *args, **kwargs):
         session = kwargs.pop('session')  # current session
         position = kwargs.pop('position')  # current position
+        candidates = kwargs.pop('candidates', None)  # pre-loaded from the cached ballot
+        identified = kwargs.pop('identified', False)  # voter already known from the ballot token
         super().__init__(*args, **kwargs)
 
+        if identified:
+            for name in ('full_name', 'email', 'gender', 'designation', 'workplace_address'):
+                self.fields[name].required = False
+
         self.fields['position_id'].initial = position.id
 
         # Get approved candidates for this position and session
-        candidates = Nomination.objects.filter(
-            session=session,
-            desired_position=position,
-            approved=True
-        )
+        if candidates is None:
+            candidates = Nomination.objects.filter(
+                session=session,
+                desired_position=position,
+                approved=True
+            )
         choices = [(c.id, f"{c.full_name} ({c.designation})") for c in candidates]
-        self.fields['candidate'].choices = choices
\ No newline at end of file
+        self.fields['candidate'].choices = choices
+
+        # Ranked positions: one optional rank per candidate instead of a single choice
+        self.ranked = position.is_ranked
+        if self.ranked:
+            self.fields['candidate'].required = False
+            rank_choices = [('', '-')] + [(n, n) for n in range(1, len(choices) + 1)]
+            for candidate_id, label in choices:
+                self.fields[f'rank_{candidate_id}'] = forms.TypedChoiceField(
+                    choices=rank_choices, coerce=int, empty_value=None, required=False, label=label,
+                )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not self.ranked:
+            return cleaned_data
+
+        ranks = {}
+        for name, value in cleaned_data.items():
+            if name.startswith('rank_') and value is not None:
+                if value in ranks:
+                    raise forms.ValidationError("Each rank can only be given to one candidate.")
+                ranks[value] = int(name[len('rank_'):])
+        if not ranks:
+            raise forms.ValidationError("Please rank at least one candidate.")
+
+        # Preference order; gaps in the numbers are closed up
+        cleaned_data['ranking'] = [ranks[rank] for rank in sorted(ranks)]
+        cleaned_data['candidate'] = str(cleaned_data['ranking'][0])
+        return cleaned_data
\ No newline at end of file
@@ -0,0 +1,233 @@
+"""
+Tamper-evident vote ledger.
+
+Every new vote appends one ``LedgerEntry`` whose hash covers the vote and the
+previous entry's hash, so editing or deleting any entry breaks the chain from
+that point on. Hashes are HMACs keyed with SECRET_KEY, so the chain cannot be
+recomputed by someone who can only write to the database.
+
+``verify`` makes a single streaming pass over the ledger: it re-hashes the
+chain, compares each entry with the vote row it records, and folds the entry
+hashes into a Merkle root per checkpoint window. Windows that verify cleanly
+are sealed with a ``LedgerCheckpoint``; incremental verification then starts
+from the last checkpoint's chain hash and only re-checks newer entries.
+
+Appending is the only write on the vote path (one INSERT); checkpoints are
+written by ``manage.py verify_ledger``. On backends with row locks
+(PostgreSQL) appends lock the session row first, so concurrent ballots queue
+for the next sequence number instead of colliding on it. SQLite's single
+writer already serializes them.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Min
+from django.utils.crypto import salted_hmac
+
+from .models import LedgerEntry, LedgerCheckpoint, Session, Vote
+
+
+CHECKPOINT_EVERY = getattr(settings, 'ELECTION_LEDGER_CHECKPOINT_EVERY', 1000)
+GENESIS = '0' * 64
+
+
+def entry_hash(prev_hash, session_id, seq, vote_id, voter_id, position_id, nominee_id, cast_at):
+    message = '|'.join(str(part) for part in (
+        prev_hash, session_id, seq, vote_id, voter_id, position_id, nominee_id, cast_at.isoformat(),
+    ))
+    return salted_hmac('election.ledger', message, algorithm='sha256').hexdigest()
+
+
+# --- Append ---
+def append(vote):
+    """Record a newly created vote at the end of its session's chain."""
+    features = connection.features
+    if not features.has_select_for_update:
+        return _append(vote)
+    with transaction.atomic():
+        # Held until the ballot's transaction commits. NO KEY UPDATE does not
+        # conflict with the KEY SHARE lock the vote's own foreign key takes.
+        list(
+            Session.objects.select_for_update(no_key=features.has_select_for_no_key_update)
+            .filter(pk=vote.session_id).values_list('pk')
+        )
+        return _append(vote)
+
+
+def _append(vote):
+    for _ in range(5):
+        last = (
+            LedgerEntry.objects.filter(session_id=vote.session_id)
+            .order_by('-seq')
+            .values_list('seq', 'hash')
+            .first()
+        )
+        seq, prev_hash = (last[0] + 1, last[1]) if last else (1, GENESIS)
+        fields = {
+            'session_id': vote.session_id,
+            'seq': seq,
+            'vote_id': vote.pk,
+            'voter_id': vote.voter_id,
+            'position_id': vote.position_id,
+            'nominee_id': vote.nominee_id,
+            'cast_at': vote.created_at,
+        }
+        try:
+            with transaction.atomic():
+                return LedgerEntry.objects.create(prev_hash=prev_hash, hash=entry_hash(prev_hash, **fields), **fields)
+        except IntegrityError:
+            # Another vote took this sequence number; chain onto it instead
+            continue
+    raise RuntimeError(f'Could not append vote {vote.pk} to the ledger')
+
+
+# --- Merkle ---
+class MerkleAccumulator:
+    """
+    Streaming Merkle root: keeps one pending subtree per level (a binary
+    counter), so memory stays O(log n) however long the window is.
+    """
+
+    def __init__(self):
+        self.levels = []
+        self.count = 0
+
+    @staticmethod
+    def _parent(left, right):
+        return hashlib.sha256(left + right).digest()
+
+    def add(self, leaf_hex):
+        node = bytes.fromhex(leaf_hex)
+        level = 0
+        while level < len(self.levels) and self.levels[level] is not None:
+            node = self._parent(self.levels[level], node)
+            self.levels[level] = None
+            level += 1
+        if level == len(self.levels):
+            self.levels.append(node)
+        else:
+            self.levels[level] = node
+        self.count += 1
+
+    def root(self):
+        if not self.count:
+            return GENESIS
+        root = None
+        for node in self.levels:
+            if node is not None:
+                root = node if root is None else self._parent(node, root)
+        return root.hex()
+
+
+# --- Verification ---
+def verify(session, incremental=False, checkpoint=True, chunk_size=5000):
+    """
+    Verify the ledger of ``session`` in one pass. Returns a report whose
+    ``problems`` list is empty when the chain, the checkpoints and the vote
+    table all agree.
+
+    With ``incremental`` only entries after the last checkpoint are checked
+    (votes edited before it are caught by the next full run). With
+    ``checkpoint`` every complete, clean window is sealed with a new checkpoint.
+    """
+    checkpoints = list(LedgerCheckpoint.objects.filter(session=session).order_by('seq'))
+    problems = []
+    start_seq, prev_hash = 0, GENESIS
+    if incremental and checkpoints:
+        start_seq, prev_hash = checkpoints[-1].seq, checkpoints[-1].chain_hash
+        checkpoints = []
+    by_seq = {c.seq: c for c in checkpoints}
+
+    entries = (
+        LedgerEntry.objects.filter(session=session, seq__gt=start_seq)
+        .order_by('seq')
+        .values_list('seq', 'vote_id', 'voter_id', 'position_id', 'nominee_id', 'cast_at', 'prev_hash', 'hash')
+        .iterator(chunk_size=chunk_size)
+    )
+    # Incremental runs only need the votes recorded after the checkpoint
+    votes = Vote.objects.filter(session=session)
+    if start_seq:
+        newer = LedgerEntry.objects.filter(session=session, seq__gt=start_seq)
+        floor = newer.aggregate(floor=Min('vote_id'))['floor']
+        if floor is None:
+            # Nothing appended since the checkpoint: look for votes newer than its last entry
+            last = LedgerEntry.objects.filter(session=session, seq=start_seq).values_list('vote_id', flat=True).first()
+            floor = (last or 0) + 1
+        older = LedgerEntry.objects.filter(session=session, seq__lte=start_seq, vote_id__gte=floor)
+        votes = votes.filter(id__gte=floor).exclude(id__in=older.values('vote_id'))
+    votes = {
+        row[0]: row[1:]
+        for row in votes.values_list(
+            'id', 'voter_id', 'position_id', 'nominee_id', 'created_at',
+        ).iterator(chunk_size=chunk_size)
+    }
+
+    merkle = MerkleAccumulator()
+    window_clean = True
+    new_checkpoints = []
+    expected_seq, checked = start_seq + 1, 0
+    last_checkpoint_seq = max([start_seq] + [c.seq for c in checkpoints])
+
+    def problem(seq, kind, **extra):
+        nonlocal window_clean
+        window_clean = False
+        problems.append({'seq': seq, 'problem': kind, **extra})
+
+    for seq, vote_id, voter_id, position_id, nominee_id, cast_at, stored_prev, stored_hash in entries:
+        checked += 1
+        if seq != expected_seq:
+            problem(seq, 'missing_entries', expected_seq=expected_seq)
+        expected_seq = seq + 1
+
+        if stored_prev != prev_hash:
+            problem(seq, 'broken_chain')
+        computed = entry_hash(stored_prev, session.id, seq, vote_id, voter_id, position_id, nominee_id, cast_at)
+        if computed != stored_hash:
+            problem(seq, 'entry_modified')
+        prev_hash = stored_hash
+
+        vote = votes.pop(vote_id, None)
+        if vote is None:
+            problem(seq, 'vote_deleted', vote_id=vote_id)
+        elif vote != (voter_id, position_id, nominee_id, cast_at):
+            problem(seq, 'vote_modified', vote_id=vote_id)
+
+        merkle.add(stored_hash)
+        stored = by_seq.get(seq)
+        if stored is not None:
+            if stored.merkle_root != merkle.root() or stored.chain_hash != stored_hash:
+                problem(seq, 'checkpoint_mismatch', checkpoint_id=stored.id)
+            merkle, window_clean = MerkleAccumulator(), True
+        elif seq > last_checkpoint_seq and merkle.count >= CHECKPOINT_EVERY:
+            if window_clean:
+                new_checkpoints.append(LedgerCheckpoint(
+                    session=session,
+                    seq=seq,
+                    entries=merkle.count,
+                    merkle_root=merkle.root(),
+                    chain_hash=stored_hash,
+                ))
+            merkle, window_clean = MerkleAccumulator(), True
+
+    for stored in checkpoints:
+        if stored.seq >= expected_seq:
+            problems.append({'seq': stored.seq, 'problem': 'entries_truncated', 'checkpoint_id': stored.id})
+
+    # Whatever is left was never appended to the ledger
+    for vote_id in sorted(votes):
+        problems.append({'seq': None, 'problem': 'vote_not_in_ledger', 'vote_id': vote_id})
+
+    if checkpoint and not problems and new_checkpoints:
+        LedgerCheckpoint.objects.bulk_create(new_checkpoints)
+
+    return {
+        'session': {'id': session.id, 'name': session.name},
+        'incremental': incremental,
+        'from_seq': start_seq,
+        'entries_checked': checked,
+        'head': prev_hash,
+        'checkpoints_created': len(new_checkpoints) if checkpoint and not problems else 0,
+        'problems': problems,
+        'ok': not problems,
+    }
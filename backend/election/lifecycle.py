@@ -0,0 +1,113 @@
+"""
+Session state machine driven by the nomination and voting time windows.
+
+``effective_status`` derives what a session's status *should* be at a given
+moment. ``run_transitions`` applies the due transitions of sessions that have
+``auto_transitions`` enabled; every transition is recorded in
+``SessionTransition`` whose (session, event) uniqueness guarantees that it runs
+exactly once, even with several scheduler processes.
+
+The stored ``status`` stays the single source of truth: public views, the
+vote counts API and casting read it, never ``effective_status``, so a
+session only changes state when the scheduler (``run_scheduler``) or an
+admin moves it. ``effective_status`` is shown in the panel as a hint.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .ballot import warm_ballot
+from .models import Session, SessionTransition
+from .results import freeze_results, warm_results
+
+
+def effective_status(session, now=None):
+    """Status implied by the time windows. Published results are never reverted."""
+    now = now or timezone.now()
+    if session.status == 'Results Published':
+        return session.status
+    if session.start_voting <= now < session.end_voting:
+        return 'Voting Open'
+    if session.start_nomination <= now < session.end_nomination:
+        return 'Nominations Open'
+    return 'Closed'
+
+
+def due_events(session, now=None, prewarm_lead=timedelta(minutes=5)):
+    """Events whose time has come, in chronological order."""
+    now = now or timezone.now()
+    events = []
+    if session.start_nomination <= now < session.end_nomination:
+        events.append('nominations_open')
+    if now >= session.end_nomination:
+        events.append('nominations_close')
+    if session.start_voting - prewarm_lead <= now < session.end_voting:
+        events.append('voting_prewarm')
+    if session.start_voting <= now < session.end_voting:
+        events.append('voting_open')
+    if now >= session.end_voting:
+        events.append('voting_close')
+    return events
+
+
+def warm_caches(session):
+    warm_ballot(session)
+    warm_results(session)
+
+
+def _apply(session, event):
+    if event == 'nominations_open':
+        session.nomination_open = True
+        if session.status != 'Voting Open':
+            session.status = 'Nominations Open'
+    elif event == 'nominations_close':
+        session.nomination_open = False
+        if session.status == 'Nominations Open':
+            session.status = 'Closed'
+    elif event == 'voting_prewarm':
+        transaction.on_commit(lambda: warm_caches(session))
+        return
+    elif event == 'voting_open':
+        session.nomination_open = False
+        session.voting_open = True
+        session.status = 'Voting Open'
+        transaction.on_commit(lambda: warm_caches(session))
+    elif event == 'voting_close':
+        session.voting_open = False
+        if session.status == 'Voting Open':
+            session.status = 'Closed'
+        session.save(update_fields=['status', 'nomination_open', 'voting_open'])
+        transaction.on_commit(lambda: freeze_results(session))
+        return
+    session.save(update_fields=['status', 'nomination_open', 'voting_open'])
+
+
+def run_transitions(session, now=None, prewarm_lead=timedelta(minutes=5)):
+    """Apply every due, not-yet-applied transition of ``session``. Returns the events applied."""
+    applied = []
+    done = set(session.transitions.values_list('event', flat=True))
+    for event in due_events(session, now, prewarm_lead):
+        if event in done:
+            continue
+        try:
+            # Cache warming and freezing run after the commit, not while
+            # this transaction holds the write lock
+            with transaction.atomic():
+                SessionTransition.objects.create(session=session, event=event)
+                _apply(session, event)
+        except IntegrityError:
+            # Another scheduler claimed this transition first
+            continue
+        applied.append(event)
+    return applied
+
+
+def run_all(now=None, prewarm_lead=timedelta(minutes=5)):
+    """Run due transitions for every automatic session. Returns {session: [events]}."""
+    report = {}
+    for session in Session.objects.filter(auto_transitions=True).exclude(status='Results Published'):
+        applied = run_transitions(session, now, prewarm_lead)
+        if applied:
+            report[session] = applied
+    return report
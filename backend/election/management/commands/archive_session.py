@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from election.archive import (
+    write_archive, verify_archive, purge_session_rows,
+    incremental_vacuum, enable_incremental_vacuum,
+)
+from election.models import Session
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a closed session's data and frozen results to a compressed archive, "
+        "then remove its rows from the live tables"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_id', type=int)
+        parser.add_argument('--output', help="Archive file path (default: ELECTION_ARCHIVE_ROOT)")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows deleted per transaction")
+        parser.add_argument('--vacuum-pages', type=int, default=1000, help="Pages released per incremental vacuum step")
+        parser.add_argument('--keep-rows', action='store_true', help="Only write the archive")
+        parser.add_argument(
+            '--enable-incremental-vacuum', action='store_true',
+            help="Switch the SQLite file to incremental auto-vacuum first (runs one full VACUUM)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            session = Session.objects.get(id=options['session_id'])
+        except Session.DoesNotExist:
+            raise CommandError(f"Session {options['session_id']} does not exist")
+
+        if session.status not in ('Closed', 'Results Published'):
+            raise CommandError(f'"{session.name}" is {session.status}; only closed sessions can be archived')
+
+        path, digest = write_archive(session, options['output'])
+        if not verify_archive(path):
+            raise CommandError(f"Archive {path} failed verification; live rows were left untouched")
+        self.stdout.write(f"Wrote {path} (sha256 {digest})")
+
+        if options['keep_rows']:
+            return
+
+        deleted = purge_session_rows(session, batch_size=options['batch_size'])
+        session.archived_at = timezone.now()
+        session.save(update_fields=['archived_at'])
+        self.stdout.write("Deleted " + ", ".join(f"{n} {name}s" for name, n in deleted.items()))
+
+        if options['enable_incremental_vacuum']:
+            enable_incremental_vacuum()
+        free = incremental_vacuum(options['vacuum_pages'])
+        if free is None:
+            self.stdout.write("Incremental vacuum skipped (not enabled on this database)")
+
+        self.stdout.write(self.style.SUCCESS(f'Archived "{session.name}"'))
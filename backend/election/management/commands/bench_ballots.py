@@ -0,0 +1,115 @@
+import statistics
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection
+from django.utils import timezone
+
+from election.casting import cast_vote, upsert_voter
+from election.models import Session, Position, Nomination
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure ballots/sec on the configured database: concurrent voters each cast full "
+        "ballots through the real write path (voter upsert, vote insert, ledger and rollups). "
+        "Run once per backend, e.g. with and without ELECTION_DATABASE=postgres."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--voters', type=int, default=8, help="Concurrent voter threads")
+        parser.add_argument('--ballots', type=int, default=50, help="Ballots per voter thread")
+        parser.add_argument('--positions', type=int, default=5, help="Positions on the ballot")
+
+    def handle(self, *args, **options):
+        session, ballot = self.setup(options['positions'])
+        try:
+            result = self.run(session, ballot, options['voters'], options['ballots'])
+        finally:
+            # Cascades to the bench voters, votes, ledger entries and rollups
+            Session.objects.filter(pk=session.pk).delete()
+
+        settings = connection.settings_dict
+        pooled = bool(settings.get('OPTIONS', {}).get('pool'))
+        self.stdout.write(
+            f"backend: {connection.vendor}  pool: {'on' if pooled else 'off'}  "
+            f"CONN_MAX_AGE: {settings['CONN_MAX_AGE']}"
+        )
+        self.stdout.write(f"{'voters':>8}{'ballots':>9}{'ballots/s':>11}{'votes/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+        self.stdout.write(
+            f"{options['voters']:>8}{result['ballots']:>9}{result['rate']:>11.1f}"
+            f"{result['rate'] * options['positions']:>9.0f}{result['p50']:>9.1f}{result['p95']:>9.1f}{result['errors']:>8}"
+        )
+
+    @staticmethod
+    def setup(positions):
+        now = timezone.now()
+        session = Session.objects.create(
+            name=f'bench-{now:%Y%m%d%H%M%S}',
+            status='Closed',  # never picked up as the public session
+            start_nomination=now - timedelta(days=2),
+            end_nomination=now - timedelta(days=1),
+            start_voting=now - timedelta(hours=1),
+            end_voting=now + timedelta(hours=1),
+        )
+        ballot = []
+        for index in range(positions):
+            position = Position.objects.create(session=session, name=f'Bench position {index}', order=index)
+            nominees = [
+                Nomination.objects.create(
+                    session=session, full_name=f'Bench candidate {index}.{n}', email=f'bench{index}.{n}@example.com',
+                    gender='Male', designation='Officer', workplace_address='Bench', desired_position=position,
+                    approved=True,
+                )
+                for n in range(3)
+            ]
+            ballot.append((position, nominees))
+        return session, ballot
+
+    @staticmethod
+    def run(session, ballot, voters, ballots):
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def voter(thread_id):
+            try:
+                for number in range(ballots):
+                    started = time.perf_counter()
+                    try:
+                        member, _ = upsert_voter(session, f'bench-{thread_id}-{number}@example.com', {
+                            'full_name': f'Bench voter {thread_id}.{number}',
+                            'gender': 'Female',
+                            'designation': 'Nurse',
+                            'workplace_address': 'Bench',
+                        })
+                        for index, (position, nominees) in enumerate(ballot):
+                            cast_vote(session, member, position, nominees[(thread_id + number + index) % len(nominees)])
+                    except DatabaseError:
+                        with lock:
+                            errors.append(1)
+                        continue
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        latencies.append(elapsed)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=voter, args=(i,)) for i in range(voters)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'ballots': len(latencies),
+            'rate': len(latencies) / wall if wall else 0,
+            'p50': statistics.median(latencies) if latencies else 0,
+            'p95': latencies[int(len(latencies) * 0.95) - 1] if latencies else 0,
+            'errors': len(errors),
+        }
@@ -0,0 +1,77 @@
+import multiprocessing
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management.base import BaseCommand
+
+from election.sqlite_cache import SQLiteCache
+
+
+def make_backend(name, directory):
+    if name == 'sqlite':
+        return SQLiteCache(Path(directory) / 'bench.sqlite3', {'OPTIONS': {'table': 'bench', 'MAX_ENTRIES': 100000}})
+    return FileBasedCache(Path(directory) / 'filecache', {'OPTIONS': {'MAX_ENTRIES': 100000}})
+
+
+def worker(args):
+    """One process: a read-heavy mix like the voting pages (ballot/results gets, counter bumps)."""
+    name, directory, ops, keys, seed = args
+    cache = make_backend(name, directory)
+    rng = random.Random(seed)
+    payload = {'candidates': list(range(20)), 'name': 'x' * 200}
+    increments = 0
+    started = time.perf_counter()
+    for _ in range(ops):
+        roll = rng.random()
+        key = f'k{rng.randrange(keys)}'
+        if roll < 0.80:
+            cache.get(key)
+        elif roll < 0.95:
+            cache.set(key, payload, 300)
+        else:
+            try:
+                cache.incr('counter')
+            except ValueError:
+                cache.add('counter', 0)
+                cache.incr('counter')
+            increments += 1
+    return time.perf_counter() - started, increments
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the shared SQLite cache with FileBasedCache: several processes run a "
+        "read-heavy mix of get/set/incr; reports throughput and lost increments"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--ops', type=int, default=5000, help="Operations per process")
+        parser.add_argument('--keys', type=int, default=200)
+
+    def handle(self, *args, **options):
+        processes, ops = options['processes'], options['ops']
+        self.stdout.write(f"{'backend':<10}{'ops/s':>10}{'p-max s':>10}{'increments':>12}{'counter':>10}{'lost':>8}")
+
+        for name in ('sqlite', 'file'):
+            with tempfile.TemporaryDirectory() as directory:
+                cache = make_backend(name, directory)
+                cache.set('counter', 0, None)
+                for i in range(options['keys']):
+                    cache.set(f'k{i}', {'warm': i}, 300)
+
+                jobs = [(name, directory, ops, options['keys'], seed) for seed in range(processes)]
+                started = time.perf_counter()
+                with multiprocessing.get_context('fork').Pool(processes) as pool:
+                    results = pool.map(worker, jobs)
+                wall = time.perf_counter() - started
+
+                increments = sum(r[1] for r in results)
+                counter = make_backend(name, directory).get('counter') or 0
+                self.stdout.write(
+                    f"{name:<10}{processes * ops / wall:>10.0f}{max(r[0] for r in results):>10.2f}"
+                    f"{increments:>12}{counter:>10}{increments - counter:>8}"
+                )
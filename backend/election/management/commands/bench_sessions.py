@@ -0,0 +1,114 @@
+import statistics
+import threading
+import time
+from importlib import import_module
+
+from django.contrib.sessions.models import Session as DjangoSession
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+BENCH_TABLE = 'election_bench_vote_write'
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate peak voting: concurrent voters each store a flash message in their "
+        "session and insert a vote-sized row, once per session engine, and report "
+        "how much the session writes slow the vote inserts down (SQLite only)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--voters', type=int, default=8, help="Concurrent voter threads")
+        parser.add_argument('--steps', type=int, default=100, help="Ballot steps per voter")
+        parser.add_argument('--engines', nargs='+', choices=sorted(ENGINES), default=['db', 'cached_db', 'signed_cookies'])
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("This benchmark measures SQLite writer-lock contention")
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {BENCH_TABLE} '
+                '(id INTEGER PRIMARY KEY, voter INTEGER, step INTEGER, created REAL)'
+            )
+
+        self.stdout.write(
+            f"{'engine':<16}{'session rows':>14}{'votes/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'lock errors':>13}"
+        )
+        try:
+            for name in options['engines']:
+                row = self.run_engine(ENGINES[name], options['voters'], options['steps'])
+                self.stdout.write(
+                    f"{name:<16}{row['session_rows']:>14}{row['rate']:>10.0f}"
+                    f"{row['p50']:>9.2f}{row['p95']:>9.2f}{row['errors']:>13}"
+                )
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {BENCH_TABLE}')
+
+    def run_engine(self, engine, voters, steps):
+        SessionStore = import_module(engine).SessionStore
+        latencies, errors, keys = [], [], []
+        lock = threading.Lock()
+        sessions_before = DjangoSession.objects.count()
+
+        def voter(voter_id):
+            try:
+                store = SessionStore()
+                for step in range(steps):
+                    # What messages.success/warning + the receipt code do on each step
+                    store['_messages'] = f'[["__json_message",0,25,"Vote recorded for step {step}"]]'
+                    try:
+                        store.save()
+                    except OperationalError:
+                        with lock:
+                            errors.append(1)
+
+                    started = time.perf_counter()
+                    try:
+                        with connection.cursor() as cursor:
+                            cursor.execute(
+                                f'INSERT INTO {BENCH_TABLE} (voter, step, created) VALUES (%s, %s, %s)',
+                                [voter_id, step, time.time()],
+                            )
+                    except OperationalError:
+                        with lock:
+                            errors.append(1)
+                        continue
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        latencies.append(elapsed)
+                with lock:
+                    keys.append(store.session_key)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=voter, args=(i,)) for i in range(voters)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        session_rows = DjangoSession.objects.count() - sessions_before
+        DjangoSession.objects.filter(session_key__in=[k for k in keys if k]).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {BENCH_TABLE}')
+
+        latencies.sort()
+        return {
+            'session_rows': session_rows,
+            'rate': len(latencies) / wall if wall else 0,
+            'p50': statistics.median(latencies) if latencies else 0,
+            'p95': latencies[int(len(latencies) * 0.95) - 1] if latencies else 0,
+            'errors': len(errors),
+        }
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from election.cube import build
+from election.models import Session
+
+
+class Command(BaseCommand):
+    help = "Rebuild the demographic results cube from the vote table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_ids', nargs='*', type=int, help="Sessions to rebuild (default: all)")
+
+    def handle(self, *args, **options):
+        sessions = Session.objects.all()
+        if options['session_ids']:
+            sessions = sessions.filter(id__in=options['session_ids'])
+            if sessions.count() != len(set(options['session_ids'])):
+                raise CommandError("Unknown session id")
+
+        for session in sessions:
+            cells = build(session)
+            self.stdout.write(f"{session.name}: {cells} cells")
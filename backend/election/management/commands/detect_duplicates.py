@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from election.dedupe import KINDS, detect, reset
+from election.models import Session
+
+
+class Command(BaseCommand):
+    help = (
+        "Flag likely duplicate voters and nominees (blocking-key fuzzy matching). "
+        "Incremental: only records added since the last run are compared."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_ids', nargs='*', type=int,
+                            help="Sessions to scan (default: sessions open for nominations or voting)")
+        parser.add_argument('--kind', choices=list(KINDS), action='append', dest='kinds')
+        parser.add_argument('--rebuild', action='store_true', help="Drop stored keys and pending pairs first")
+        parser.add_argument('--interval', type=int, default=0,
+                            help="Keep running, scanning for new records every N seconds")
+
+    def handle(self, *args, **options):
+        if options['session_ids']:
+            sessions = list(Session.objects.filter(id__in=options['session_ids']))
+            if len(sessions) != len(set(options['session_ids'])):
+                raise CommandError("Unknown session id")
+        else:
+            sessions = None
+
+        if options['rebuild']:
+            for session in sessions or self.open_sessions():
+                reset(session, options['kinds'])
+
+        while True:
+            for session in sessions or self.open_sessions():
+                for kind, (processed, found) in detect(session, options['kinds']).items():
+                    if processed or not options['interval']:
+                        self.stdout.write(f"{session.name} {kind}s: {processed} new, {found} candidate pairs")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    @staticmethod
+    def open_sessions():
+        return list(Session.objects.filter(status__in=['Nominations Open', 'Voting Open']))
@@ -0,0 +1,56 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from election.eligibility import invalidate_roll, normalize_email, normalize_member_id
+from election.models import EligibleMember, Session
+
+
+class Command(BaseCommand):
+    help = "Import the eligible member roll for a session from a CSV file (columns: email, member_id, full_name)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_id', type=int)
+        parser.add_argument('csv_path')
+        parser.add_argument('--replace', action='store_true', help="Delete the existing roll before importing")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            session = Session.objects.get(id=options['session_id'])
+        except Session.DoesNotExist:
+            raise CommandError(f"Session {options['session_id']} does not exist")
+
+        batch_size = options['batch_size']
+        seen = set()
+        batch = []
+        imported = 0
+
+        with open(options['csv_path'], newline='', encoding='utf-8-sig') as fh, transaction.atomic():
+            if options['replace']:
+                EligibleMember.objects.filter(session=session).delete()
+
+            for row in csv.DictReader(fh):
+                email = normalize_email(row.get('email'))
+                if not email or email in seen:
+                    continue
+                seen.add(email)
+                batch.append(EligibleMember(
+                    session=session,
+                    email=email,
+                    member_id=normalize_member_id(row.get('member_id')) or None,
+                    full_name=(row.get('full_name') or '').strip(),
+                ))
+                if len(batch) >= batch_size:
+                    EligibleMember.objects.bulk_create(batch, ignore_conflicts=True)
+                    imported += len(batch)
+                    batch = []
+
+            if batch:
+                EligibleMember.objects.bulk_create(batch, ignore_conflicts=True)
+                imported += len(batch)
+
+        # bulk_create skips the post_save signal, so invalidate explicitly
+        invalidate_roll(session.id)
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} eligible members into {session.name}"))
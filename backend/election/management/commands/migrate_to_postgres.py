@@ -0,0 +1,132 @@
+import time
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+from election.ledger import verify
+from election.models import Session
+from election.recount import recount
+
+
+SOURCE_ALIAS = 'sqlite_source'
+# Rows that `migrate` creates on the target; replaced by the source's own rows
+# so every foreign key to them keeps its id
+REPLACED_ON_TARGET = ['auth.Permission', 'contenttypes.ContentType']
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy every table of an SQLite database into the PostgreSQL database configured "
+        "as 'default' (run with ELECTION_DATABASE=postgres). Primary keys are kept, "
+        "sequences are reset and each session is recounted and its ledger verified on the "
+        "target afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Path of the SQLite database file")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--no-recount', action='store_true', help="Skip the recount and ledger checks")
+
+    def handle(self, *args, **options):
+        target = connections['default']
+        if target.vendor != 'postgresql':
+            raise CommandError("The default database is not PostgreSQL; set ELECTION_DATABASE=postgres.")
+
+        connections.settings[SOURCE_ALIAS] = {
+            **connections['default'].settings_dict,
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': options['source'],
+            'OPTIONS': {},
+            'CONN_MAX_AGE': 0,
+        }
+        try:
+            call_command('migrate', verbosity=0)
+            models = self.copied_models()
+            self.check_target_empty(models)
+            started = time.perf_counter()
+            self.copy(models, options['batch_size'])
+            self.stdout.write(f"Copied in {time.perf_counter() - started:.1f}s")
+            if not options['no_recount']:
+                self.check_target()
+        finally:
+            connections[SOURCE_ALIAS].close()
+            del connections[SOURCE_ALIAS]
+            del connections.settings[SOURCE_ALIAS]
+
+    @staticmethod
+    def copied_models():
+        # Concrete models, including auto-created many-to-many tables
+        return [
+            model for model in apps.get_models(include_auto_created=True)
+            if model._meta.managed and not model._meta.proxy
+        ]
+
+    def check_target_empty(self, models):
+        for model in models:
+            if model._meta.label in REPLACED_ON_TARGET:
+                continue
+            if model._base_manager.using('default').exists():
+                raise CommandError(f"Target table {model._meta.db_table} is not empty; migrate into a fresh database.")
+
+    def copy(self, models, batch_size):
+        # PostgreSQL foreign keys are DEFERRABLE INITIALLY DEFERRED, so the
+        # whole copy is one transaction and table order does not matter
+        with transaction.atomic(using='default'):
+            for label in REPLACED_ON_TARGET:
+                apps.get_model(label)._base_manager.using('default').all().delete()
+
+            for model in models:
+                copied = self.copy_table(model, batch_size)
+                source_count = model._base_manager.using(SOURCE_ALIAS).count()
+                if copied != source_count:
+                    raise CommandError(f"{model._meta.label}: copied {copied} of {source_count} rows")
+                self.stdout.write(f"{model._meta.label:<40}{copied:>10}")
+
+            target = connections['default']
+            with target.cursor() as cursor:
+                for sql in target.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+    @staticmethod
+    def copy_table(model, batch_size):
+        # Raw inserts, as loaddata does: bulk_create would run pre_save and
+        # stamp every auto_now/auto_now_add column with the migration time,
+        # and the ledger hashes each vote's created_at
+        fields = model._meta.local_concrete_fields
+        batch_size = max(1, min(batch_size, 60000 // len(fields)))  # PostgreSQL allows 65535 parameters
+        target = model._base_manager.using('default')
+        rows = model._base_manager.using(SOURCE_ALIAS).order_by('pk').iterator(chunk_size=batch_size)
+        copied, batch = 0, []
+        for obj in rows:
+            batch.append(obj)
+            if len(batch) == batch_size:
+                target._insert(batch, fields=fields, using='default', raw=True)
+                copied += len(batch)
+                batch = []
+        if batch:
+            target._insert(batch, fields=fields, using='default', raw=True)
+            copied += len(batch)
+        return copied
+
+    def check_target(self):
+        failed = False
+        for session in Session.objects.order_by('id'):
+            report = recount(session, workers=1)
+            status = self.style.SUCCESS('ok') if report['ok'] else self.style.ERROR(
+                f"{len(report['discrepancies'])} discrepancies"
+            )
+            failed |= not report['ok']
+            self.stdout.write(f"Recount {session.name}: {status}")
+
+            # Catches copied timestamps or rows that no longer match their ledger entries
+            report = verify(session, checkpoint=False)
+            status = self.style.SUCCESS('ok') if report['ok'] else self.style.ERROR(
+                f"{len(report['problems'])} problems"
+            )
+            failed |= not report['ok']
+            self.stdout.write(f"Ledger {session.name}: {status}")
+        if failed:
+            raise CommandError("Checks on the target found discrepancies.")
@@ -0,0 +1,112 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+# Runs in a fresh interpreter: import the entry point, then serve one request
+FIRST_RESPONSE = r'''
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+sys.path[:0] = {paths!r}
+started = time.perf_counter()
+module = __import__({module!r}, fromlist=['application'])
+ready = time.perf_counter()
+environ = {{'PATH_INFO': {path!r}, 'HTTP_HOST': 'localhost'}}
+setup_testing_defaults(environ)
+status = []
+body = b''.join(module.application(environ, lambda s, h, *a: status.append(s)))
+done = time.perf_counter()
+print(json.dumps({{'spawn': ready - started, 'first_response': done - ready, 'status': status[0]}}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile worker cold start: per-module import times (python -X importtime) for the "
+        "WSGI entry points, and time to first response with and without the warm-up hook"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', action='append', dest='modules',
+                            help="Entry point module (default: kbaa_election.wsgi and passenger_wsgi)")
+        parser.add_argument('--top', type=int, default=20, help="Modules to list")
+        parser.add_argument('--path', default='/voting/', help="URL of the first request")
+        parser.add_argument('--runs', type=int, default=3, help="Cold starts per variant (median is reported)")
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or ['kbaa_election.wsgi', 'passenger_wsgi']
+        # passenger_wsgi.py lives next to the backend directory
+        paths = [str(settings.BASE_DIR), str(settings.BASE_DIR.parent)]
+
+        for module in modules:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {module}"))
+            imports = self.import_times(module, paths)
+            if imports is None:
+                continue
+            self.report_imports(imports, options['top'])
+            self.report_first_response(module, paths, options['path'], options['runs'])
+
+    def _run(self, args, extra_env=None):
+        env = {**os.environ, **(extra_env or {})}
+        env.pop('DJANGO_SETTINGS_MODULE', None)  # let the entry point choose its settings
+        return subprocess.run(
+            [sys.executable, *args], capture_output=True, text=True, cwd=settings.BASE_DIR, env=env,
+        )
+
+    def import_times(self, module, paths):
+        script = f'import sys; sys.path[:0] = {paths!r}; import {module}'
+        result = self._run(['-X', 'importtime', '-c', script], {'ELECTION_WARMUP': '0'})
+        if result.returncode:
+            self.stderr.write(f"Could not import {module}:\n{result.stderr.strip().splitlines()[-1]}")
+            return None
+        rows = []
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+        return rows
+
+    def report_imports(self, rows, top):
+        total = sum(r[1] for r in rows)
+        self.stdout.write(f"{len(rows)} modules imported in {total / 1000:.1f} ms (self time)")
+
+        self.stdout.write(f"\n{'cumulative ms':>14}{'self ms':>10}  module")
+        for name, self_us, cumulative_us, _ in sorted(rows, key=lambda r: -r[2])[:top]:
+            self.stdout.write(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+        packages = defaultdict(int)
+        for name, self_us, _, _ in rows:
+            packages[name.split('.')[0]] += self_us
+        self.stdout.write(f"\n{'self ms':>14}  top-level package")
+        for name, self_us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+            self.stdout.write(f"{self_us / 1000:>14.1f}  {name}")
+
+    def report_first_response(self, module, paths, path, runs):
+        script = FIRST_RESPONSE.format(paths=paths, module=module, path=path)
+        self.stdout.write(f"\n{'warm-up':<10}{'spawn ms':>10}{'first response ms':>19}{'total ms':>10}  status")
+        for label, flag in (('off', '0'), ('on', '1')):
+            samples = []
+            for _ in range(runs):
+                result = self._run(['-c', script], {'ELECTION_WARMUP': flag})
+                if result.returncode:
+                    self.stderr.write(result.stderr.strip().splitlines()[-1])
+                    break
+                samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+            if not samples:
+                continue
+            samples.sort(key=lambda s: s['first_response'])
+            median = samples[len(samples) // 2]
+            self.stdout.write(
+                f"{label:<10}{median['spawn'] * 1000:>10.1f}{median['first_response'] * 1000:>19.1f}"
+                f"{(median['spawn'] + median['first_response']) * 1000:>10.1f}  {median['status']}"
+            )
+        self.stdout.write('')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from election.search import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over nominations and voters"
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The search index needs SQLite FTS5; other backends use icontains search")
+
+        counts = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            "Indexed " + ", ".join(f"{n} {kind}s" for kind, n in counts.items())
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from election.models import Session
+from election.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recount the materialized dashboard statistics from the base tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_ids', nargs='*', type=int, help="Sessions to rebuild (default: all)")
+
+    def handle(self, *args, **options):
+        sessions = Session.objects.all()
+        if options['session_ids']:
+            sessions = sessions.filter(id__in=options['session_ids'])
+            if sessions.count() != len(set(options['session_ids'])):
+                raise CommandError("Unknown session id")
+
+        for session in sessions:
+            stats = rebuild(session)
+            self.stdout.write(
+                f"{session.name}: {stats.voters} voters, {stats.votes} votes, "
+                f"{stats.ballots_completed} ballots completed"
+            )
@@ -0,0 +1,37 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from election.models import Session
+from election.recount import recount
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount a session from the raw vote rows, one worker process per position, "
+        "and print a JSON diff against the ledger, the published snapshot and the dashboard totals"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_id', type=int)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes (1 = in-process)")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        try:
+            session = Session.objects.get(id=options['session_id'])
+        except Session.DoesNotExist:
+            raise CommandError(f"Session {options['session_id']} does not exist")
+
+        report = recount(session, workers=options['workers'])
+        payload = json.dumps(report, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(payload)
+        else:
+            self.stdout.write(payload)
+
+        if not report['ok']:
+            raise CommandError(f"{len(report['discrepancies'])} discrepancies found")
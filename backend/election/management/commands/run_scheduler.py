@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from election.admin import ESTIMATE_REFRESH, refresh_estimates
+from election.lifecycle import run_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply time-window session transitions. Run once from cron (--once) "
+        "or leave it looping in the background. Also refreshes the table statistics "
+        "behind the admin's estimated row counts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run a single pass and exit (cron mode)")
+        parser.add_argument('--interval', type=int, default=30, help="Seconds between passes in loop mode")
+        parser.add_argument(
+            '--prewarm-minutes', type=int, default=5,
+            help="Warm the ballot and results caches this many minutes before voting opens",
+        )
+
+    def handle(self, *args, **options):
+        prewarm_lead = timedelta(minutes=options['prewarm_minutes'])
+
+        while True:
+            for session, events in run_all(prewarm_lead=prewarm_lead).items():
+                self.stdout.write(f"{session.name}: {', '.join(events)}")
+            # Once per ESTIMATE_REFRESH across passes, cron runs and scheduler processes
+            if cache.add('election:admin_estimates_refreshed', 1, ESTIMATE_REFRESH):
+                refresh_estimates()
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
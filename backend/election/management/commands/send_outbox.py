@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from election.models import OutboxMessage
+from election.outbox import BATCH_SIZE, send_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued confirmation emails in batches over one SMTP connection per batch. "
+        "Run once from cron (--once) or leave it looping in the background."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run a single pass and exit (cron mode)")
+        parser.add_argument('--interval', type=int, default=10, help="Seconds between passes in loop mode")
+        parser.add_argument('--batch', type=int, default=BATCH_SIZE, help="Messages per SMTP connection")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, retried, failed = send_pending(options['batch'])
+            if sent or retried or failed or options['once']:
+                self.stdout.write(f"sent: {sent}  retrying: {retried}  failed: {failed}")
+
+            if options['once']:
+                backlog = dict(OutboxMessage.objects.values_list('status').annotate(n=Count('id')).order_by())
+                self.stdout.write(f"pending: {backlog.get('pending', 0)}  failed total: {backlog.get('failed', 0)}")
+                break
+            time.sleep(options['interval'])
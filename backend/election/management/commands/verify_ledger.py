@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from election.ledger import verify
+from election.models import Session
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify the hash-chained vote ledger against the vote table and seal "
+        "clean windows with Merkle checkpoints"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_ids', nargs='*', type=int, help="Sessions to verify (default: all)")
+        parser.add_argument('--incremental', action='store_true', help="Only check entries after the last checkpoint")
+        parser.add_argument('--no-checkpoint', action='store_true', help="Do not write new checkpoints")
+
+    def handle(self, *args, **options):
+        sessions = Session.objects.all()
+        if options['session_ids']:
+            sessions = sessions.filter(id__in=options['session_ids'])
+            if sessions.count() != len(set(options['session_ids'])):
+                raise CommandError("Unknown session id")
+
+        failed = 0
+        for session in sessions:
+            report = verify(session, incremental=options['incremental'], checkpoint=not options['no_checkpoint'])
+            if report['ok']:
+                self.stdout.write(
+                    f"{session.name}: OK, {report['entries_checked']} entries from #{report['from_seq']}, "
+                    f"{report['checkpoints_created']} new checkpoints"
+                )
+            else:
+                failed += 1
+                self.stdout.write(json.dumps(report, indent=2, default=str))
+
+        if failed:
+            raise CommandError(f"Ledger verification failed for {failed} session(s)")
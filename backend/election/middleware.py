@@ -0,0 +1,115 @@
+"""
+Per-path session storage profiles.
+
+Public pages (nomination, voting, results) only keep tiny, short-lived state
+in the session, so they use signed-cookie sessions and never write to
+``django_session``; the staff panel and Django admin keep the configured
+``SESSION_ENGINE`` (cached_db by default). The two profiles use different
+cookie names so browsing the public site never touches a staff login.
+
+Settings::
+
+    ELECTION_SESSION_PROFILES = [
+        # (path prefix, session engine, cookie name); first match wins
+        ('/panel/', SESSION_ENGINE, SESSION_COOKIE_NAME),
+        ('/admin/', SESSION_ENGINE, SESSION_COOKIE_NAME),
+    ]
+    ELECTION_PUBLIC_SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+    ELECTION_PUBLIC_SESSION_COOKIE_NAME = 'public_session'
+"""
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.exceptions import SessionInterrupted
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+
+
+def session_profiles():
+    staff = (settings.SESSION_ENGINE, settings.SESSION_COOKIE_NAME)
+    profiles = getattr(settings, 'ELECTION_SESSION_PROFILES', [
+        ('/panel/', *staff),
+        ('/admin/', *staff),
+    ])
+    public = (
+        getattr(settings, 'ELECTION_PUBLIC_SESSION_ENGINE', 'django.contrib.sessions.backends.signed_cookies'),
+        getattr(settings, 'ELECTION_PUBLIC_SESSION_COOKIE_NAME', 'public_session'),
+    )
+    return profiles, public
+
+
+class SessionProfileMiddleware(SessionMiddleware):
+    """Drop-in replacement for SessionMiddleware that picks the session engine by path."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        profiles, public = session_profiles()
+        self.profiles = [
+            (prefix, import_module(engine).SessionStore, cookie_name)
+            for prefix, engine, cookie_name in profiles
+        ]
+        self.public = (import_module(public[0]).SessionStore, public[1])
+
+    def select(self, path):
+        for prefix, store, cookie_name in self.profiles:
+            if path.startswith(prefix):
+                return store, cookie_name
+        return self.public
+
+    def process_request(self, request):
+        store, cookie_name = self.select(request.path_info)
+        request.session_cookie_name = cookie_name
+        request.session = store(request.COOKIES.get(cookie_name))
+
+    def process_response(self, request, response):
+        # Same as SessionMiddleware.process_response, with the profile's cookie name
+        try:
+            accessed = request.session.accessed
+            modified = request.session.modified
+            empty = request.session.is_empty()
+            cookie_name = request.session_cookie_name
+        except AttributeError:
+            return response
+
+        if cookie_name in request.COOKIES and empty:
+            response.delete_cookie(
+                cookie_name,
+                path=settings.SESSION_COOKIE_PATH,
+                domain=settings.SESSION_COOKIE_DOMAIN,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+            patch_vary_headers(response, ('Cookie',))
+        else:
+            if accessed:
+                patch_vary_headers(response, ('Cookie',))
+            if (modified or settings.SESSION_SAVE_EVERY_REQUEST) and not empty:
+                if request.session.get_expire_at_browser_close():
+                    max_age = None
+                    expires = None
+                else:
+                    max_age = request.session.get_expiry_age()
+                    expires = http_date(time.time() + max_age)
+                if response.status_code < 500:
+                    try:
+                        request.session.save()
+                    except UpdateError:
+                        raise SessionInterrupted(
+                            "The request's session was deleted before the "
+                            "request completed. The user may have logged "
+                            "out in a concurrent request, for example."
+                        )
+                    response.set_cookie(
+                        cookie_name,
+                        request.session.session_key,
+                        max_age=max_age,
+                        expires=expires,
+                        domain=settings.SESSION_COOKIE_DOMAIN,
+                        path=settings.SESSION_COOKIE_PATH,
+                        secure=settings.SESSION_COOKIE_SECURE or None,
+                        httponly=settings.SESSION_COOKIE_HTTPONLY or None,
+                        samesite=settings.SESSION_COOKIE_SAMESITE,
+                    )
+        return response
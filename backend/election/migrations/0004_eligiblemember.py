@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0003_alter_session_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='nomination',
+            name='approved',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.CreateModel(
+            name='EligibleMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(help_text='Stored normalized (trimmed, lower-case)', max_length=254)),
+                ('member_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('full_name', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eligible_members', to='election.session')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['session', 'member_id'], name='election_el_session_014870_idx')],
+                'unique_together': {('session', 'email')},
+            },
+        ),
+    ]
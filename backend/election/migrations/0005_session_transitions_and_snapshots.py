@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0004_eligiblemember'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='auto_transitions',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='ResultSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='result_snapshot', to='election.session')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SessionTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('nominations_open', 'Nominations opened'), ('nominations_close', 'Nominations closed'), ('voting_prewarm', 'Caches pre-warmed'), ('voting_open', 'Voting opened'), ('voting_close', 'Voting closed')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transitions', to='election.session')),
+            ],
+            options={
+                'unique_together': {('session', 'event')},
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0005_session_transitions_and_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='position',
+            name='session',
+            field=models.ForeignKey(blank=True, help_text='Leave empty for a position shared by every session', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='election.session'),
+        ),
+        migrations.AlterField(
+            model_name='position',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='nomination',
+            index=models.Index(fields=['session', 'desired_position', 'approved'], name='election_no_session_1419d4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['session', 'position', 'nominee'], name='election_vo_session_fc570e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['session', 'created_at'], name='election_vo_session_6bdfb7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['session', 'voted_at'], name='election_vo_session_f8d640_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='position',
+            constraint=models.UniqueConstraint(fields=('session', 'name'), name='unique_position_per_session'),
+        ),
+        migrations.AddConstraint(
+            model_name='position',
+            constraint=models.UniqueConstraint(condition=models.Q(('session__isnull', True)), fields=('name',), name='unique_shared_position_name'),
+        ),
+    ]
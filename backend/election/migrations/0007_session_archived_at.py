@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0006_session_scoped_positions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations, OperationalError
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS election_search USING fts5("
+                "kind UNINDEXED, object_id UNINDEXED, session_id UNINDEXED, "
+                "full_name, email, designation, workplace_address, "
+                "tokenize = 'unicode61', prefix = '2 3')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5: search falls back to icontains
+            return
+        # Index the existing rows; searches use the table as soon as it exists
+        for kind, model_name in (('nomination', 'Nomination'), ('voter', 'Voter')):
+            table = apps.get_model('election', model_name)._meta.db_table
+            cursor.execute(
+                f"INSERT INTO election_search "
+                f"SELECT %s, id, session_id, COALESCE(full_name, ''), COALESCE(email, ''), "
+                f"COALESCE(designation, ''), COALESCE(workplace_address, '') FROM {table}",
+                [kind],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS election_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0007_session_archived_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='position',
+            name='counting_method',
+            field=models.CharField(choices=[('plurality', 'Plurality (single choice)'), ('irv', 'Instant runoff (ranked)'), ('stv', 'Single transferable vote (ranked, multi-seat)')], default='plurality', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='position',
+            name='seats',
+            field=models.PositiveIntegerField(default=1, help_text='Number of winners'),
+        ),
+        migrations.CreateModel(
+            name='BallotRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('nominee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='election.nomination')),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='election.position')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='election.session')),
+                ('voter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='election.voter')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['session', 'position', 'voter', 'rank'], name='election_ba_session_dfed75_idx')],
+                'unique_together': {('voter', 'position', 'nominee'), ('voter', 'position', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0009_ranked_ballots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TurnoutBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour')], max_length=6)),
+                ('bucket_start', models.DateTimeField()),
+                ('votes', models.PositiveIntegerField(default=0)),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='election.position')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='turnout_buckets', to='election.session')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['session', 'granularity', 'bucket_start'], name='election_tu_session_dff5ad_idx')],
+                'unique_together': {('session', 'position', 'granularity', 'bucket_start')},
+            },
+        ),
+    ]
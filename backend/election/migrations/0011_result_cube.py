@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0010_turnout_buckets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultCubeCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gender', models.CharField(max_length=10)),
+                ('designation', models.CharField(max_length=100)),
+                ('training_year', models.PositiveSmallIntegerField(default=0, help_text='0 = no training date')),
+                ('votes', models.PositiveIntegerField(default=0)),
+                ('nominee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='election.nomination')),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='election.position')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cube_cells', to='election.session')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['session', 'position'], name='election_re_session_c26b8d_idx')],
+                'unique_together': {('session', 'position', 'nominee', 'gender', 'designation', 'training_year')},
+            },
+        ),
+    ]
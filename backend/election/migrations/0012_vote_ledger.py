@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0011_result_cube'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveIntegerField()),
+                ('entries', models.PositiveIntegerField()),
+                ('merkle_root', models.CharField(max_length=64)),
+                ('chain_hash', models.CharField(help_text='Hash of the ledger entry at seq', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_checkpoints', to='election.session')),
+            ],
+            options={
+                'unique_together': {('session', 'seq')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveIntegerField()),
+                ('vote_id', models.PositiveIntegerField()),
+                ('voter_id', models.PositiveIntegerField()),
+                ('position_id', models.PositiveIntegerField()),
+                ('nominee_id', models.PositiveIntegerField()),
+                ('cast_at', models.DateTimeField()),
+                ('prev_hash', models.CharField(max_length=64)),
+                ('hash', models.CharField(max_length=64)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger', to='election.session')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['session', 'vote_id'], name='election_le_session_f3c14d_idx')],
+                'unique_together': {('session', 'seq')},
+            },
+        ),
+    ]
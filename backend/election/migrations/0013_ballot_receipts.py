@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0012_vote_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BallotReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code_hash', models.CharField(max_length=64, unique=True)),
+                ('summary', models.JSONField(help_text='Positions and choices as recorded when the receipt was issued')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='election.session')),
+                ('voter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='election.voter')),
+            ],
+            options={
+                'unique_together': {('session', 'voter')},
+            },
+        ),
+    ]
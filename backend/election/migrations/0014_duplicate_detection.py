@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0013_ballot_receipts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DedupeKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('voter', 'Voter'), ('nomination', 'Nomination')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('key', models.CharField(max_length=120)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dedupe_keys', to='election.session')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['session', 'kind', 'key'], name='election_de_session_bb45c8_idx')],
+                'unique_together': {('session', 'kind', 'object_id', 'key')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('voter', 'Voter'), ('nomination', 'Nomination')], max_length=10)),
+                ('first_id', models.PositiveIntegerField()),
+                ('second_id', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('reasons', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed duplicate'), ('dismissed', 'Not a duplicate')], default='pending', max_length=10)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_candidates', to='election.session')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['session', 'status', 'score'], name='election_du_session_70360e_idx')],
+                'unique_together': {('session', 'kind', 'first_id', 'second_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('election', '0015_email_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('voters', models.PositiveIntegerField(default=0)),
+                ('votes', models.PositiveIntegerField(default=0)),
+                ('ballots_completed', models.PositiveIntegerField(default=0)),
+                ('approved_candidates', models.PositiveIntegerField(default=0)),
+                ('pending_candidates', models.PositiveIntegerField(default=0)),
+                ('positions', models.PositiveIntegerField(default=0)),
+                ('position_votes', models.JSONField(default=list, help_text='[{id, name, votes}] in ballot order')),
+                ('nominee_votes', models.JSONField(default=dict, help_text='{nominee id: votes}')),
+                ('leaders', models.JSONField(default=list, help_text='Top nominees by votes, with their display details')),
+                ('stale', models.BooleanField(default=False)),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='election.session')),
+            ],
+            options={
+                'verbose_name_plural': 'session stats',
+            },
+        ),
+    ]
@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.db import models
 from django.core.validators import FileExtensionValidator
+from django.utils import timezone
 
 
 # -----------------------------
@@ -16,6 +18,12 @@ class Session(models.Model):
     nomination_open = models.BooleanField(default=False)
     voting_open = models.BooleanField(default=False)
 
+    # When enabled, run_scheduler drives status from the time windows above
+    auto_transitions = models.BooleanField(default=False)
+
+    # Set by archive_session once the session's rows moved to an archive file
+    archived_at = models.DateTimeField(blank=True, null=True)
+
     STATUS_CHOICES = [
         ("Nominations Open", "Nominations Open"),
         ("Voting Open", "Voting Open"),
@@ -28,16 +36,62 @@ class Session(models.Model):
 
     def __str__(self):
         return self.name
+
+    @property
+    def effective_status(self):
+        from .lifecycle import effective_status
+
+        return effective_status(self)
+
+
 # -----------------------------
 # 2. Position
 # -----------------------------
+class PositionQuerySet(models.QuerySet):
+    def for_session(self, session):
+        """Positions bound to ``session`` plus the shared ones (no session)."""
+        return self.filter(models.Q(session=session) | models.Q(session__isnull=True))
+
+
 class Position(models.Model):
-    name = models.CharField(max_length=100, unique=True)
+    session = models.ForeignKey(
+        Session,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="positions",
+        help_text="Leave empty for a position shared by every session",
+    )
+    name = models.CharField(max_length=100)
     order = models.PositiveIntegerField(default=0, help_text="Controls order in multi-step voting")
 
+    COUNTING_CHOICES = [
+        ("plurality", "Plurality (single choice)"),
+        ("irv", "Instant runoff (ranked)"),
+        ("stv", "Single transferable vote (ranked, multi-seat)"),
+    ]
+    counting_method = models.CharField(max_length=10, choices=COUNTING_CHOICES, default="plurality")
+    seats = models.PositiveIntegerField(default=1, help_text="Number of winners")
+
+    objects = PositionQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["session", "name"], name="unique_position_per_session"),
+            models.UniqueConstraint(
+                fields=["name"],
+                condition=models.Q(session__isnull=True),
+                name="unique_shared_position_name",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
+    @property
+    def is_ranked(self):
+        return self.counting_method != "plurality"
+
 
 # -----------------------------
 # 3. Nomination (Candidate) - UPDATED
@@ -64,6 +118,9 @@ class Nomination(models.Model):
 
     class Meta:
         unique_together = ("session", "email")
+        indexes = [
+            models.Index(fields=["session", "desired_position", "approved"]),
+        ]
 
     def __str__(self):
         return f"{self.full_name} ({self.desired_position})"
@@ -84,6 +141,9 @@ class Voter(models.Model):
 
     class Meta:
         unique_together = ("session", "email")
+        indexes = [
+            models.Index(fields=["session", "voted_at"]),
+        ]
 
     def __str__(self):
         return f"{self.full_name} ({self.email})"
@@ -101,11 +161,36 @@ class Vote(models.Model):
 
     class Meta:
         unique_together = ("voter", "position")  # prevent multiple votes for same position
+        indexes = [
+            models.Index(fields=["session", "position", "nominee"]),
+            models.Index(fields=["session", "created_at"]),
+        ]
 
     def __str__(self):
         return f"{self.voter.full_name} -> {self.nominee.full_name} ({self.position.name})"
 
 
+# -----------------------------
+# 5b. Ranked Ballot Preferences
+# -----------------------------
+class BallotRanking(models.Model):
+    """One preference of a ranked ballot. The rank 1 choice is also stored as the voter's Vote."""
+    session = models.ForeignKey(Session, on_delete=models.CASCADE)
+    voter = models.ForeignKey(Voter, on_delete=models.CASCADE, related_name="rankings")
+    position = models.ForeignKey(Position, on_delete=models.CASCADE)
+    nominee = models.ForeignKey(Nomination, on_delete=models.CASCADE, related_name="rankings")
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = [("voter", "position", "rank"), ("voter", "position", "nominee")]
+        indexes = [
+            models.Index(fields=["session", "position", "voter", "rank"]),
+        ]
+
+    def __str__(self):
+        return f"{self.voter_id} #{self.rank} -> {self.nominee_id} ({self.position_id})"
+
+
 # -----------------------------
 # 6. Form Labels
 # -----------------------------
@@ -122,4 +207,293 @@ class FormLabel(models.Model):
         unique_together = ("form_type", "field_name")
 
     def __str__(self):
-        return f"{self.get_form_type_display()} - {self.field_name} → {self.label_text}"
\ No newline at end of file
+        return f"{self.get_form_type_display()} - {self.field_name} → {self.label_text}"
+
+# -----------------------------
+# 7. Eligible Member (Voter Roll)
+# -----------------------------
+class EligibleMember(models.Model):
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="eligible_members")
+    email = models.EmailField(help_text="Stored normalized (trimmed, lower-case)")
+    member_id = models.CharField(max_length=50, blank=True, null=True)
+    full_name = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("session", "email")
+        indexes = [
+            models.Index(fields=["session", "member_id"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        from .eligibility import normalize_email, normalize_member_id
+
+        self.email = normalize_email(self.email)
+        self.member_id = normalize_member_id(self.member_id) or None
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.email} ({self.session})"
+
+
+# -----------------------------
+# 8. Session Transitions (scheduler log)
+# -----------------------------
+class SessionTransition(models.Model):
+    EVENT_CHOICES = [
+        ("nominations_open", "Nominations opened"),
+        ("nominations_close", "Nominations closed"),
+        ("voting_prewarm", "Caches pre-warmed"),
+        ("voting_open", "Voting opened"),
+        ("voting_close", "Voting closed"),
+    ]
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="transitions")
+    event = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("session", "event")  # each transition runs exactly once
+
+    def __str__(self):
+        return f"{self.session} - {self.get_event_display()}"
+
+
+# -----------------------------
+# 9. Frozen Results Snapshot
+# -----------------------------
+class ResultSnapshot(models.Model):
+    session = models.OneToOneField(Session, on_delete=models.CASCADE, related_name="result_snapshot")
+    data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Results snapshot - {self.session}"
+
+
+# -----------------------------
+# 10. Turnout Rollups
+# -----------------------------
+class TurnoutBucket(models.Model):
+    GRANULARITY_CHOICES = [
+        ("minute", "Minute"),
+        ("hour", "Hour"),
+    ]
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="turnout_buckets")
+    position = models.ForeignKey(Position, on_delete=models.CASCADE)
+    granularity = models.CharField(max_length=6, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField()
+    votes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("session", "position", "granularity", "bucket_start")
+        indexes = [
+            models.Index(fields=["session", "granularity", "bucket_start"]),
+        ]
+
+    def __str__(self):
+        return f"{self.session} {self.position} {self.bucket_start:%Y-%m-%d %H:%M} ({self.granularity}): {self.votes}"
+
+
+# -----------------------------
+# 11. Demographic Results Cube
+# -----------------------------
+class ResultCubeCell(models.Model):
+    """Votes for one nominee from one (gender, designation, training year) group of voters."""
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="cube_cells")
+    position = models.ForeignKey(Position, on_delete=models.CASCADE)
+    nominee = models.ForeignKey(Nomination, on_delete=models.CASCADE)
+    gender = models.CharField(max_length=10)
+    designation = models.CharField(max_length=100)
+    training_year = models.PositiveSmallIntegerField(default=0, help_text="0 = no training date")
+    votes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("session", "position", "nominee", "gender", "designation", "training_year")
+        indexes = [
+            models.Index(fields=["session", "position"]),
+        ]
+
+    def __str__(self):
+        return f"{self.nominee_id} / {self.gender} / {self.designation} / {self.training_year}: {self.votes}"
+
+
+# -----------------------------
+# 12. Vote Ledger
+# -----------------------------
+class LedgerEntry(models.Model):
+    """
+    Append-only, hash-chained copy of one vote as it was cast. Holds plain ids
+    rather than foreign keys so deleting or editing a Vote leaves the entry intact.
+    """
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="ledger")
+    seq = models.PositiveIntegerField()
+    vote_id = models.PositiveIntegerField()
+    voter_id = models.PositiveIntegerField()
+    position_id = models.PositiveIntegerField()
+    nominee_id = models.PositiveIntegerField()
+    cast_at = models.DateTimeField()
+    prev_hash = models.CharField(max_length=64)
+    hash = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ("session", "seq")
+        indexes = [
+            models.Index(fields=["session", "vote_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.session_id}#{self.seq} {self.hash[:12]}"
+
+
+class LedgerCheckpoint(models.Model):
+    """Merkle root over the ledger entries after the previous checkpoint, up to ``seq``."""
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="ledger_checkpoints")
+    seq = models.PositiveIntegerField()
+    entries = models.PositiveIntegerField()
+    merkle_root = models.CharField(max_length=64)
+    chain_hash = models.CharField(max_length=64, help_text="Hash of the ledger entry at seq")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("session", "seq")
+
+    def __str__(self):
+        return f"{self.session_id}@{self.seq} {self.merkle_root[:12]}"
+
+
+# -----------------------------
+# 13. Ballot Receipts
+# -----------------------------
+class BallotReceipt(models.Model):
+    """
+    Proof of a completed ballot. Only a keyed hash of the receipt code is
+    stored; the voter keeps the code itself.
+    """
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="receipts")
+    voter = models.ForeignKey(Voter, on_delete=models.CASCADE, related_name="receipts")
+    code_hash = models.CharField(max_length=64, unique=True)
+    summary = models.JSONField(help_text="Positions and choices as recorded when the receipt was issued")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("session", "voter")
+
+    def __str__(self):
+        return f"Receipt {self.code_hash[:12]} ({self.session.name})"
+
+
+# -----------------------------
+# 14. Duplicate Detection
+# -----------------------------
+DEDUPE_KINDS = [("voter", "Voter"), ("nomination", "Nomination")]
+
+
+class DedupeKey(models.Model):
+    """Blocking key of one voter or nomination; records are only compared within a key."""
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="dedupe_keys")
+    kind = models.CharField(max_length=10, choices=DEDUPE_KINDS)
+    object_id = models.PositiveIntegerField()
+    key = models.CharField(max_length=120)
+
+    class Meta:
+        unique_together = ("session", "kind", "object_id", "key")
+        indexes = [
+            models.Index(fields=["session", "kind", "key"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.key}"
+
+
+class DuplicateCandidate(models.Model):
+    """A scored pair of likely duplicates (``first_id`` < ``second_id``) awaiting review."""
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("confirmed", "Confirmed duplicate"),
+        ("dismissed", "Not a duplicate"),
+    ]
+
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="duplicate_candidates")
+    kind = models.CharField(max_length=10, choices=DEDUPE_KINDS)
+    first_id = models.PositiveIntegerField()
+    second_id = models.PositiveIntegerField()
+    score = models.FloatField()
+    reasons = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    reviewed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("session", "kind", "first_id", "second_id")
+        indexes = [
+            models.Index(fields=["session", "status", "score"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.first_id} ~ {self.second_id} ({self.score:.2f})"
+
+
+# -----------------------------
+# 15. Email Outbox
+# -----------------------------
+class OutboxMessage(models.Model):
+    """
+    An email written in the same transaction as the nomination or ballot it
+    confirms, and delivered later by ``manage.py send_outbox``.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="outbox")
+    kind = models.CharField(max_length=20)
+    to = models.EmailField()
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} to {self.to} ({self.status})"
+
+
+# -----------------------------
+# 16. Dashboard Statistics
+# -----------------------------
+class SessionStats(models.Model):
+    """
+    The panel dashboard's numbers for one session, kept current by the vote
+    and moderation paths so the dashboard reads one row. ``stale`` rows are
+    rebuilt on the next read (see election.stats).
+    """
+    session = models.OneToOneField(Session, on_delete=models.CASCADE, related_name="stats")
+    voters = models.PositiveIntegerField(default=0)
+    votes = models.PositiveIntegerField(default=0)
+    ballots_completed = models.PositiveIntegerField(default=0)
+    approved_candidates = models.PositiveIntegerField(default=0)
+    pending_candidates = models.PositiveIntegerField(default=0)
+    positions = models.PositiveIntegerField(default=0)
+    position_votes = models.JSONField(default=list, help_text="[{id, name, votes}] in ballot order")
+    nominee_votes = models.JSONField(default=dict, help_text="{nominee id: votes}")
+    leaders = models.JSONField(default=list, help_text="Top nominees by votes, with their display details")
+    stale = models.BooleanField(default=False)
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "session stats"
+
+    def __str__(self):
+        return f"Stats - {self.session}"
@@ -0,0 +1,137 @@
+"""
+Transactional email outbox.
+
+Confirmation emails are rendered and stored as ``OutboxMessage`` rows inside
+the transaction that saves the nomination or the ballot's last vote, so a
+message exists exactly when the thing it confirms was committed, and the
+request never waits on SMTP.
+
+``manage.py send_outbox`` delivers due messages in batches over one SMTP
+connection per batch. A claimed message is leased by pushing its
+``next_attempt_at`` forward, so a crashed sender's batch becomes due again
+after ``LEASE`` instead of being lost. Failures are retried with exponential
+backoff and jitter, and marked failed after ``MAX_ATTEMPTS``.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import OutboxMessage, Voter
+
+
+BATCH_SIZE = getattr(settings, 'ELECTION_OUTBOX_BATCH_SIZE', 50)
+MAX_ATTEMPTS = getattr(settings, 'ELECTION_OUTBOX_MAX_ATTEMPTS', 8)
+BACKOFF_BASE = 30         # seconds before the first retry; doubles each attempt
+BACKOFF_MAX = 6 * 3600
+LEASE = timedelta(minutes=5)
+
+
+# --- Writing ---
+def enqueue(session, kind, to, template, context):
+    """
+    Render ``election/email/<template>.txt`` and store it. The template's
+    first line is the subject. Call inside the transaction it confirms.
+    """
+    subject, _, body = render_to_string(f'election/email/{template}.txt', context).strip().partition('\n')
+    return OutboxMessage.objects.create(
+        session=session, kind=kind, to=to, subject=subject.strip()[:200], body=body.strip() + '\n',
+    )
+
+
+def queue_nomination_confirmation(nomination):
+    return enqueue(nomination.session, 'nomination', nomination.email, 'nomination_confirmation', {
+        'nomination': nomination,
+        'session': nomination.session,
+    })
+
+
+def queue_ballot_confirmation(session, voter):
+    """Confirms that the ballot was recorded, never its choices (a mailed proof of vote)."""
+    # The voter from a ballot token carries no email address
+    email = Voter.objects.filter(pk=voter.pk).values_list('email', flat=True).get()
+    return enqueue(session, 'ballot', email, 'ballot_confirmation', {
+        'voter': voter,
+        'session': session,
+        'recorded_at': timezone.now(),
+    })
+
+
+# --- Delivery ---
+def backoff(attempts):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(batch_size=BATCH_SIZE):
+    """Lease up to ``batch_size`` due messages to this sender."""
+    now = timezone.now()
+    with transaction.atomic():
+        # SKIP LOCKED lets several senders run side by side on PostgreSQL
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        due = list(
+            OutboxMessage.objects.select_for_update(skip_locked=skip_locked)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if due:
+            OutboxMessage.objects.filter(pk__in=[m.pk for m in due]).update(next_attempt_at=now + LEASE)
+    return due
+
+
+def deliver(messages, mail_connection=None):
+    """Send ``messages`` over one connection; returns (sent, retried, failed)."""
+    sent = retried = failed = 0
+    mail_connection = mail_connection or get_connection()
+    try:
+        mail_connection.open()
+    except Exception as exc:
+        # Could not reach the server at all: the whole batch is retried
+        for message in messages:
+            retried, failed = _record_failure(message, exc, retried, failed)
+        return sent, retried, failed
+
+    try:
+        for message in messages:
+            email = EmailMessage(message.subject, message.body, to=[message.to], connection=mail_connection)
+            try:
+                email.send()
+            except Exception as exc:
+                retried, failed = _record_failure(message, exc, retried, failed)
+                continue
+            OutboxMessage.objects.filter(pk=message.pk).update(
+                status='sent', sent_at=timezone.now(), attempts=message.attempts + 1, last_error='',
+            )
+            sent += 1
+    finally:
+        mail_connection.close()
+    return sent, retried, failed
+
+
+def _record_failure(message, exc, retried, failed):
+    attempts = message.attempts + 1
+    update = {'attempts': attempts, 'last_error': f'{type(exc).__name__}: {exc}'[:1000]}
+    if attempts >= MAX_ATTEMPTS:
+        update['status'] = 'failed'
+        failed += 1
+    else:
+        update['next_attempt_at'] = timezone.now() + backoff(attempts)
+        retried += 1
+    OutboxMessage.objects.filter(pk=message.pk).update(**update)
+    return retried, failed
+
+
+def send_pending(batch_size=BATCH_SIZE):
+    """Deliver every due message, one batch (and SMTP connection) at a time."""
+    totals = [0, 0, 0]
+    mail_connection = get_connection()
+    while True:
+        batch = claim(batch_size)
+        if not batch:
+            return tuple(totals)
+        for index, count in enumerate(deliver(batch, mail_connection)):
+            totals[index] += count
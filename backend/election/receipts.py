@@ -0,0 +1,106 @@
+"""
+Voter receipts.
+
+When a voter completes their ballot they get a short receipt code such as
+``K7QM2-X9D4T``. Only a keyed hash of the code is stored, next to a
+denormalized summary of the recorded choices, so ``lookup`` is one query on a
+unique index and never touches the vote tables. Lookups are cached, and
+rate-limited per client address (the ``receipt`` rule of
+``ELECTION_RATE_LIMITS``) because codes are public-facing and guessable by
+brute force only if unthrottled.
+"""
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from .models import BallotReceipt, BallotRanking, Vote
+
+
+# Crockford base32: no I, L, O or U, so codes survive being read aloud
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+CODE_LENGTH = 10
+
+LOOKUP_TTL = getattr(settings, 'ELECTION_RECEIPT_TTL', 3600)
+
+
+def normalize_code(code):
+    code = (code or '').upper().replace('-', '').replace(' ', '')
+    return code.translate(str.maketrans('ILO', '110'))
+
+
+def format_code(code):
+    return f'{code[:5]}-{code[5:]}'
+
+
+def hash_code(code):
+    return salted_hmac('election.receipt', normalize_code(code), algorithm='sha256').hexdigest()
+
+
+def ballot_summary(session, voter):
+    votes = (
+        Vote.objects.filter(session=session, voter=voter)
+        .select_related('position', 'nominee')
+        .order_by('position__order', 'position_id')
+    )
+    rankings = {}
+    for position_id, name in (
+        BallotRanking.objects.filter(session=session, voter=voter)
+        .order_by('position_id', 'rank')
+        .values_list('position_id', 'nominee__full_name')
+    ):
+        rankings.setdefault(position_id, []).append(name)
+
+    return {
+        'session': session.name,
+        'issued_at': timezone.now().isoformat(),
+        'choices': [
+            {
+                'position': vote.position.name,
+                'candidate': vote.nominee.full_name,
+                'ranking': rankings.get(vote.position_id),
+                'cast_at': vote.created_at.isoformat(),
+            }
+            for vote in votes
+        ],
+    }
+
+
+def issue_receipt(session, voter):
+    """
+    Issue the receipt for a completed ballot and return its formatted code.
+    Returns None when the voter already has one (codes are only shown once).
+    """
+    if BallotReceipt.objects.filter(session=session, voter=voter).exists():
+        return None
+    summary = ballot_summary(session, voter)
+    for _ in range(5):
+        code = ''.join(secrets.choice(ALPHABET) for _ in range(CODE_LENGTH))
+        try:
+            with transaction.atomic():
+                BallotReceipt.objects.create(session=session, voter=voter, code_hash=hash_code(code), summary=summary)
+            return format_code(code)
+        except IntegrityError:
+            if BallotReceipt.objects.filter(session=session, voter=voter).exists():
+                return None
+            # Code hash collision; draw another
+    raise RuntimeError('Could not issue a unique receipt code')
+
+
+def lookup(code):
+    """The recorded ballot summary for ``code``, or None. Cached, including misses."""
+    if len(normalize_code(code)) != CODE_LENGTH:
+        return None
+    code_hash = hash_code(code)
+    key = f'election:receipt:{code_hash}'
+    cached = cache.get(key)
+    if cached is not None:
+        return cached or None
+
+    summary = BallotReceipt.objects.filter(code_hash=code_hash).values_list('summary', flat=True).first()
+    # Misses are cached as {} for a shorter time so a late-issued code shows up soon
+    cache.set(key, summary or {}, LOOKUP_TTL if summary else 60)
+    return summary
@@ -0,0 +1,234 @@
+"""
+Independent recount.
+
+The vote table is streamed once and split by position; each position group is
+then recounted from raw rows in a separate worker process. The outcome is
+compared with records kept apart from the vote rows, and every mismatch is
+reported as a diff entry:
+
+* ``ledger``: the choices the hash-chained ledger recorded for each vote;
+* ``published``: the frozen ResultSnapshot, counts and winners;
+* ``dashboard``: the per-nominee totals of the SessionStats row.
+
+The counting side works on plain tuples so it can run against any source of
+rows, e.g. a backup file opened with sqlite3 (see ``rows_from_sqlite``).
+"""
+import sqlite3
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db.models import Count
+
+from .models import Position, Nomination, Vote, BallotRanking, LedgerEntry, ResultSnapshot, SessionStats
+
+
+# --- Row sources ---
+def stream_votes(session, chunk_size=5000, using=None):
+    """(position_id, voter_id, nominee_id) for every vote of the session, streamed."""
+    return (
+        Vote.objects.using(using).filter(session=session)
+        .values_list('position_id', 'voter_id', 'nominee_id')
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def stream_rankings(session, chunk_size=5000, using=None):
+    """(position_id, voter_id, nominee_id, rank) for every ranked preference, streamed."""
+    return (
+        BallotRanking.objects.using(using).filter(session=session)
+        .values_list('position_id', 'voter_id', 'nominee_id', 'rank')
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def rows_from_sqlite(path, session_id):
+    """The same two row streams, read from a standalone SQLite file (e.g. a backup)."""
+    connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    votes = connection.execute(
+        'SELECT position_id, voter_id, nominee_id FROM election_vote WHERE session_id = ?',
+        [session_id],
+    )
+    rankings = connection.execute(
+        'SELECT position_id, voter_id, nominee_id, rank FROM election_ballotranking WHERE session_id = ?',
+        [session_id],
+    )
+    return connection, votes, rankings
+
+
+def split_by_position(votes, rankings=()):
+    groups = defaultdict(lambda: {'votes': [], 'rankings': []})
+    for position_id, voter_id, nominee_id in votes:
+        groups[position_id]['votes'].append((voter_id, nominee_id))
+    for position_id, voter_id, nominee_id, rank in rankings:
+        groups[position_id]['rankings'].append((voter_id, nominee_id, rank))
+    return groups
+
+
+# --- Worker ---
+def recount_group(job):
+    """
+    Recount one position from raw rows. Runs in a worker process, so it only
+    takes and returns plain data.
+    """
+    position_id, method, seats, candidate_ids, votes, rankings = job
+    result = {
+        'position_id': position_id,
+        'ballots': len(votes),
+        'counts': dict(Counter(nominee_id for _, nominee_id in votes)),
+        'duplicate_voters': len(votes) - len({voter_id for voter_id, _ in votes}),
+        'winners': None,
+    }
+    if method != 'plurality' or seats > 1:
+        from .tally import METHODS, pack_rankings
+
+        if method == 'plurality':
+            rows = [(voter_id, nominee_id, 1) for voter_id, nominee_id in votes]
+        else:
+            rows = rankings
+        voter_ids = [r[0] for r in rows]
+        nominee_ids = [r[1] for r in rows]
+        ranks = [r[2] for r in rows]
+        ballots = pack_rankings(voter_ids, nominee_ids, ranks, candidate_ids)
+        result['winners'] = METHODS[method](ballots, candidate_ids, seats=seats).winners
+    return result
+
+
+# --- Comparison ---
+def ledger_tallies(session, using=None):
+    """Counts from the ledger entries; None when the session has no ledger."""
+    rows = (
+        LedgerEntry.objects.using(using).filter(session=session)
+        .values('position_id', 'nominee_id')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    tallies = defaultdict(dict)
+    for row in rows:
+        tallies[row['position_id']][row['nominee_id']] = row['count']
+    return tallies or None
+
+
+def dashboard_tallies(session, using=None):
+    """Per-nominee totals of the statistics row; None when it is missing or stale."""
+    stats = SessionStats.objects.using(using).filter(session=session, stale=False).first()
+    if stats is None:
+        return None
+    return {int(nominee_id): votes for nominee_id, votes in stats.nominee_votes.items()}
+
+
+def snapshot_tallies(session, using=None):
+    snapshot = ResultSnapshot.objects.using(using).filter(session=session).first()
+    if snapshot is None:
+        return None, None
+    tallies, winners = {}, {}
+    for position in snapshot.data['positions']:
+        tallies[position['id']] = {c['id']: c['vote_count'] for c in position['candidates']}
+        winners[position['id']] = [c['id'] for c in position['candidates'] if c.get('elected')]
+    return tallies, winners
+
+
+def _diff_counts(source, position_id, expected, actual):
+    diffs = []
+    for nominee_id in sorted(set(expected) | set(actual)):
+        want, got = expected.get(nominee_id, 0), actual.get(nominee_id, 0)
+        if want != got:
+            diffs.append({
+                'source': source,
+                'position_id': position_id,
+                'nominee_id': nominee_id,
+                'expected': want,
+                'recounted': got,
+            })
+    return diffs
+
+
+def recount(session, workers=None, votes=None, rankings=None, using=None):
+    """
+    Recount ``session`` and compare it with the stored and published tallies.
+
+    ``votes``/``rankings`` default to streams over the live database; pass
+    other row iterables (e.g. from ``rows_from_sqlite``) to recount a copy.
+    ``using`` names the database alias everything is read from, so a restored
+    backup can be recounted against its own tallies (see ``backup.py``).
+    Returns a JSON-serializable report whose ``discrepancies`` list is empty
+    when everything agrees.
+    """
+    if votes is None:
+        votes = stream_votes(session, using=using)
+    if rankings is None:
+        rankings = stream_rankings(session, using=using)
+    groups = split_by_position(votes, rankings)
+
+    positions = Position.objects.using(using).for_session(session).in_bulk()
+    candidates = defaultdict(list)
+    for nomination_id, position_id in (
+        Nomination.objects.using(using).filter(session=session, approved=True, desired_position__isnull=False)
+        .order_by('id')
+        .values_list('id', 'desired_position_id')
+    ):
+        candidates[position_id].append(nomination_id)
+
+    jobs = []
+    for position_id in sorted(set(groups) | set(candidates)):
+        position = positions.get(position_id)
+        method = position.counting_method if position else 'plurality'
+        seats = position.seats if position else 1
+        group = groups.get(position_id, {'votes': [], 'rankings': []})
+        jobs.append((position_id, method, seats, candidates[position_id], group['votes'], group['rankings']))
+
+    if workers == 1 or len(jobs) <= 1:
+        recounted = [recount_group(job) for job in jobs]
+    else:
+        # django.setup makes the workers safe under the spawn start method too
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            recounted = list(pool.map(recount_group, jobs))
+
+    ledger = ledger_tallies(session, using=using)
+    published, published_winners = snapshot_tallies(session, using=using)
+    dashboard = dashboard_tallies(session, using=using)
+
+    discrepancies = []
+    for result in recounted:
+        position_id = result['position_id']
+        if ledger is not None:
+            discrepancies += _diff_counts('ledger', position_id, ledger.get(position_id, {}), result['counts'])
+        if published is not None and position_id in published:
+            # Snapshots only list approved candidates; compare those
+            counted = {k: v for k, v in result['counts'].items() if k in published[position_id]}
+            discrepancies += _diff_counts('published', position_id, published[position_id], counted)
+            if result['winners'] is not None and published_winners.get(position_id) != result['winners']:
+                discrepancies.append({
+                    'source': 'published',
+                    'position_id': position_id,
+                    'field': 'winners',
+                    'expected': published_winners.get(position_id),
+                    'recounted': result['winners'],
+                })
+        if result['duplicate_voters']:
+            discrepancies.append({
+                'source': 'ballots',
+                'position_id': position_id,
+                'field': 'duplicate_voters',
+                'expected': 0,
+                'recounted': result['duplicate_voters'],
+            })
+
+    if dashboard is not None:
+        per_nominee = Counter()
+        for result in recounted:
+            per_nominee.update(result['counts'])
+        discrepancies += _diff_counts('dashboard', None, dashboard, per_nominee)
+
+    return {
+        'session': {'id': session.id, 'name': session.name},
+        'positions': [
+            {**r, 'counts': {str(k): v for k, v in sorted(r['counts'].items())}}
+            for r in recounted
+        ],
+        'ledger_compared': ledger is not None,
+        'snapshot_compared': published is not None,
+        'dashboard_compared': dashboard is not None,
+        'discrepancies': discrepancies,
+        'ok': not discrepancies,
+    }
@@ -0,0 +1,207 @@
+"""
+Election results: live computation, short-lived caching and frozen snapshots.
+
+Once voting closes (or results are published) the tallies are frozen into a
+``ResultSnapshot`` row; from then on results are always rendered from that
+snapshot so later edits to the vote table cannot change what was announced.
+The snapshot carries each candidate's displayed details too, so the results
+page keeps working after an archive has purged the nominations. Reopening
+voting discards the snapshot; until then it is only used while the session
+is closed or published.
+"""
+from itertools import groupby
+
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Position, Nomination, ResultSnapshot
+from .sqlite_cache import named_cache
+
+
+RESULTS_TTL = getattr(settings, 'ELECTION_RESULTS_TTL', 15)
+# Nomination fields the results pages show, frozen with the tallies
+CANDIDATE_FIELDS = ['full_name', 'email', 'designation', 'workplace_address', 'photo']
+# Statuses whose results come from the frozen snapshot
+FROZEN_STATUSES = ('Closed', 'Results Published')
+
+# Shared across worker processes (see sqlite_cache)
+cache = named_cache('results')
+
+
+def _key(session_id, frozen=False):
+    return f'election:results:{session_id}:{"frozen" if frozen else "live"}'
+
+
+def compute_results(session):
+    """Tally every position of ``session`` in a single grouped query."""
+    candidates = (
+        Nomination.objects.filter(
+            session=session,
+            approved=True,
+            desired_position__isnull=False,
+        )
+        .select_related('desired_position')
+        .annotate(
+            vote_count=Count(
+                'votes',
+                filter=Q(votes__session=session, votes__position=F('desired_position')),
+            )
+        )
+        .order_by('desired_position__order', 'desired_position_id', '-vote_count', 'id')
+    )
+
+    results = []
+    for _, group in groupby(candidates, key=lambda c: c.desired_position_id):
+        group = list(group)
+        position = group[0].desired_position
+        result = {
+            'position': position,
+            'candidates': group,
+            'total_votes': sum(c.vote_count for c in group),
+            'tally': None,
+        }
+        if position.is_ranked or position.seats > 1:
+            apply_tally(session, result)
+        else:
+            for index, candidate in enumerate(group):
+                candidate.elected = index == 0
+        results.append(result)
+    return results
+
+
+def apply_tally(session, result):
+    """Run the position's counting method and put the winners first, in order of election."""
+    from .tally import tally_position
+
+    candidates = result['candidates']
+    tally = tally_position(session, result['position'], [c.id for c in candidates])
+    order = {candidate_id: index for index, candidate_id in enumerate(tally.winners)}
+    for candidate in candidates:
+        candidate.elected = candidate.id in order
+    candidates.sort(key=lambda c: (order.get(c.id, len(order)), -c.vote_count))
+
+    names = {c.id: c.full_name for c in candidates}
+    audit = tally.as_dict()
+    for record in audit['rounds']:
+        record['elected_names'] = [names[i] for i in record['elected']]
+        record['eliminated_names'] = [names[i] for i in record['eliminated']]
+    result['tally'] = audit
+
+
+def snapshot_data(session, results):
+    return {
+        'session': {'id': session.id, 'name': session.name},
+        'frozen_at': timezone.now().isoformat(),
+        'positions': [
+            {
+                'id': result['position'].id,
+                'name': result['position'].name,
+                'order': result['position'].order,
+                'total_votes': result['total_votes'],
+                'tally': result['tally'],
+                'candidates': [
+                    {
+                        'id': c.id,
+                        **_candidate_details(c),
+                        'vote_count': c.vote_count,
+                        'elected': c.elected,
+                    }
+                    for c in result['candidates']
+                ],
+            }
+            for result in results
+        ],
+    }
+
+
+def _candidate_details(candidate):
+    details = {field: getattr(candidate, field) for field in CANDIDATE_FIELDS}
+    details['photo'] = candidate.photo.name or ''
+    return details
+
+
+def _complete_snapshot(snapshot):
+    """Add the candidate details that snapshots frozen before they were stored lack."""
+    frozen = [c for p in snapshot.data['positions'] for c in p['candidates'] if 'workplace_address' not in c]
+    if not frozen:
+        return
+    nominations = Nomination.objects.in_bulk([c['id'] for c in frozen])
+    for candidate in frozen:
+        if candidate['id'] in nominations:
+            candidate.update(_candidate_details(nominations[candidate['id']]))
+    snapshot.save(update_fields=['data'])
+
+
+def results_from_snapshot(snapshot):
+    """Rebuild the template-facing results structure from frozen snapshot data alone."""
+    positions = snapshot.data['positions']
+    live_positions = Position.objects.in_bulk([p['id'] for p in positions])
+
+    results = []
+    for entry in positions:
+        candidates = []
+        for frozen in entry['candidates']:
+            # Unsaved: the nomination may have been archived and purged
+            candidate = Nomination(id=frozen['id'], **{f: frozen.get(f, '') for f in CANDIDATE_FIELDS})
+            candidate.vote_count = frozen['vote_count']
+            candidate.elected = frozen.get('elected', not candidates)
+            candidates.append(candidate)
+        if candidates:
+            position = live_positions.get(entry['id']) or Position(
+                id=entry['id'], name=entry['name'], order=entry['order'],
+            )
+            results.append({
+                'position': position,
+                'candidates': candidates,
+                'total_votes': entry['total_votes'],
+                'tally': entry.get('tally'),
+            })
+    return results
+
+
+def get_results(session):
+    """
+    Frozen results once the session is closed and frozen, otherwise live
+    results cached for RESULTS_TTL seconds.
+    """
+    frozen = session.status in FROZEN_STATUSES
+    key = _key(session.pk, frozen)
+    results = cache.get(key)
+    if results is not None:
+        return results
+
+    snapshot = ResultSnapshot.objects.filter(session=session).first() if frozen else None
+    if snapshot:
+        results = results_from_snapshot(snapshot)
+        cache.set(key, results, None)
+    else:
+        results = compute_results(session)
+        cache.set(key, results, RESULTS_TTL)
+    return results
+
+
+def warm_results(session):
+    cache.delete_many([_key(session.pk), _key(session.pk, frozen=True)])
+    return get_results(session)
+
+
+def freeze_results(session):
+    """Freeze the current tallies of ``session``. Freezing twice keeps the first snapshot."""
+    snapshot, created = ResultSnapshot.objects.filter(session=session).first(), False
+    if snapshot is None:
+        # Tally only when there is no snapshot yet; get_or_create settles a race
+        snapshot, created = ResultSnapshot.objects.get_or_create(
+            session=session,
+            defaults={'data': snapshot_data(session, compute_results(session))},
+        )
+    if not created:
+        _complete_snapshot(snapshot)
+    cache.delete_many([_key(session.pk), _key(session.pk, frozen=True)])
+    return snapshot
+
+
+def thaw_results(session_ids):
+    """Discard the snapshots of sessions whose voting was reopened; archived ones keep theirs."""
+    ResultSnapshot.objects.filter(session_id__in=session_ids, session__archived_at__isnull=True).delete()
+    cache.delete_many([_key(i, frozen) for i in session_ids for frozen in (False, True)])
@@ -0,0 +1,58 @@
+"""
+Session scoping helpers.
+
+Public pages can be reached either unscoped (``/voting/``, which picks the
+first session in the wanted status, as before) or explicitly scoped
+(``/s/<session_id>/voting/``) so that overlapping elections, e.g. a
+by-election next to the main one, can run side by side.
+
+The custom panel remembers the session picked with ``?session=<id>`` in the
+staff user's session, so every panel page stays scoped to the same election.
+"""
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from .models import Session
+
+
+PANEL_SESSION_KEY = 'panel_session_id'
+
+
+def get_public_session(session_id, statuses):
+    """
+    Scoped: the requested session if its status is in ``statuses``, else None.
+    Unscoped: the first session whose status is in ``statuses``.
+    Matches the stored status; time windows act through the scheduler.
+    """
+    if session_id is not None:
+        session = get_object_or_404(Session, id=session_id)
+        return session if session.status in statuses else None
+    return Session.objects.filter(status__in=statuses).first()
+
+
+def session_url(name, session_id=None, *args):
+    """Reverse the scoped variant of a public URL when a session id is given."""
+    if session_id is not None:
+        return reverse(f'session_{name}', args=[session_id, *args])
+    return reverse(name, args=args)
+
+
+def get_panel_session(request, statuses=('Nominations Open', 'Voting Open')):
+    """Session the panel is currently looking at."""
+    requested = request.GET.get('session')
+    if requested:
+        try:
+            session = Session.objects.get(id=int(requested))
+        except (ValueError, Session.DoesNotExist):
+            raise Http404("Session not found")
+        request.session[PANEL_SESSION_KEY] = session.id
+        return session
+
+    stored = request.session.get(PANEL_SESSION_KEY)
+    if stored:
+        session = Session.objects.filter(id=stored).first()
+        if session:
+            return session
+
+    return Session.objects.filter(status__in=statuses).first() or Session.objects.last()
@@ -0,0 +1,189 @@
+"""
+Full-text search over nominations and voters (SQLite FTS5).
+
+The ``election_search`` virtual table holds one row per nomination or voter
+with the searchable columns. It is kept in sync by the post_save/post_delete
+receivers in ``signals.py`` and can be rebuilt from scratch with
+``manage.py rebuild_search_index``. A rebuild fills a staging table in short
+batches and swaps it in at the end, so ballots are never held up for long
+behind the write lock. While the staging table exists the receivers write to
+it as well, and each batch replaces whatever the receivers already put there
+for its ids, so a save during a rebuild is never lost in the swap.
+
+Every word of a query is matched as a prefix ("moh rah" finds "Mohammad
+Rahman") and hits are ordered by bm25 rank, name matches weighted highest.
+When FTS5 is unavailable (another database backend, or an SQLite build
+without it) callers fall back to ``icontains`` filters.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from .models import Nomination, Voter
+
+
+TABLE = 'election_search'
+STAGING = f'{TABLE}_rebuild'
+KINDS = {'nomination': Nomination, 'voter': Voter}
+
+# bm25 column weights: kind, object_id, session_id, full_name, email, designation, workplace_address
+BM25_WEIGHTS = '0, 0, 0, 10.0, 5.0, 2.0, 1.0'
+
+_available = None
+
+
+def fts_available():
+    global _available
+    if _available is None:
+        if connection.vendor != 'sqlite':
+            _available = False
+        else:
+            _available = TABLE in connection.introspection.table_names()
+    return _available
+
+
+def create_table(cursor, table=TABLE):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        "kind UNINDEXED, object_id UNINDEXED, session_id UNINDEXED, "
+        "full_name, email, designation, workplace_address, "
+        "tokenize = 'unicode61', prefix = '2 3')"
+    )
+
+
+def _kind_of(instance):
+    for kind, model in KINDS.items():
+        if isinstance(instance, model):
+            return kind
+    raise ValueError(f'{type(instance).__name__} is not searchable')
+
+
+def _row(kind, obj):
+    return (
+        kind, obj.pk, obj.session_id,
+        obj.full_name or '', obj.email or '', obj.designation or '', obj.workplace_address or '',
+    )
+
+
+def _tables(cursor):
+    """The live table, plus the staging table while a rebuild is running."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [STAGING])
+    return [TABLE, STAGING] if cursor.fetchone() else [TABLE]
+
+
+def index_object(instance):
+    if not fts_available():
+        return
+    kind = _kind_of(instance)
+    with connection.cursor() as cursor:
+        for table in _tables(cursor):
+            cursor.execute(f'DELETE FROM {table} WHERE kind = %s AND object_id = %s', [kind, instance.pk])
+            cursor.execute(f'INSERT INTO {table} VALUES (%s, %s, %s, %s, %s, %s, %s)', _row(kind, instance))
+
+
+def remove_object(instance):
+    if not fts_available():
+        return
+    kind = _kind_of(instance)
+    with connection.cursor() as cursor:
+        for table in _tables(cursor):
+            cursor.execute(f'DELETE FROM {table} WHERE kind = %s AND object_id = %s', [kind, instance.pk])
+
+
+def rebuild(chunk_size=2000):
+    """Re-create the whole index from the live tables. Returns {kind: rows indexed}."""
+    counts = {}
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {STAGING}')
+        create_table(cursor, STAGING)
+        for kind, model in KINDS.items():
+            counts[kind] = 0
+            last = 0
+            while True:
+                indexed, last = _index_batch(cursor, kind, model, last, chunk_size)
+                if not indexed:
+                    break
+                counts[kind] += indexed
+        cursor.execute(f"INSERT INTO {STAGING}({STAGING}) VALUES ('optimize')")
+        with transaction.atomic():
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+            cursor.execute(f'ALTER TABLE {STAGING} RENAME TO {TABLE}')
+    global _available
+    _available = None
+    return counts
+
+
+def _index_batch(cursor, kind, model, after, chunk_size):
+    """
+    Index the next ``chunk_size`` rows with a pk above ``after`` into the
+    staging table. Returns (rows indexed, last pk).
+
+    Reading and writing share one short transaction, so a save either
+    commits first (and is read here) or after (and its receiver overwrites
+    the row written here).
+    """
+    with transaction.atomic():
+        objects = list(model.objects.filter(pk__gt=after).order_by('pk')[:chunk_size])
+        if not objects:
+            return 0, after
+        last = objects[-1].pk
+        cursor.execute(
+            f'DELETE FROM {STAGING} WHERE kind = %s AND object_id > %s AND object_id <= %s',
+            [kind, after, last],
+        )
+        cursor.executemany(
+            f'INSERT INTO {STAGING} VALUES (%s, %s, %s, %s, %s, %s, %s)',
+            [_row(kind, obj) for obj in objects],
+        )
+    return len(objects), last
+
+
+def build_match(query):
+    """Turn free text into an FTS5 prefix query; None when nothing searchable is left."""
+    words = re.findall(r'\w+', query or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search(query, kind, session_id=None, limit=20):
+    """
+    Ranked hits straight from the index, best first:
+    [{'id', 'session_id', 'full_name', 'email', 'designation', 'workplace_address'}, ...]
+    """
+    match = build_match(query)
+    if match is None:
+        return []
+
+    sql = (
+        f'SELECT object_id, session_id, full_name, email, designation, workplace_address '
+        f'FROM {TABLE} WHERE {TABLE} MATCH %s AND kind = %s'
+    )
+    params = [match, kind]
+    if session_id is not None:
+        sql += ' AND session_id = %s'
+        params.append(session_id)
+    sql += f' ORDER BY bm25({TABLE}, {BM25_WEIGHTS}) LIMIT %s'
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = ['id', 'session_id', 'full_name', 'email', 'designation', 'workplace_address']
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def filter_matching(queryset, query, kind, session_id=None):
+    """
+    ``queryset`` narrowed to every row matching ``query``, through a subquery
+    on the index (no limit, unlike ``search``).
+    """
+    match = build_match(query)
+    if match is None:
+        return queryset.none()
+    sql = f'SELECT object_id FROM {TABLE} WHERE {TABLE} MATCH %s AND kind = %s'
+    params = [match, kind]
+    if session_id is not None:
+        sql += ' AND session_id = %s'
+        params.append(session_id)
+    return queryset.filter(id__in=RawSQL(sql, params))
@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import counts, cube, ledger, stats
+from .ballot import invalidate_ballot
+from .eligibility import invalidate_roll
+from .models import EligibleMember, Nomination, Position, Session, Voter, Vote
+from .results import thaw_results
+from .search import index_object, remove_object
+from .turnout import record_vote
+
+
+# --- Database connection ---
+SQLITE_PRAGMAS = getattr(settings, 'ELECTION_SQLITE_PRAGMAS', {
+    'journal_mode': 'WAL',      # readers don't block the vote writer
+    'synchronous': 'NORMAL',    # safe with WAL, one fsync per checkpoint
+    'cache_size': -16000,       # 16 MB page cache
+    'temp_store': 'MEMORY',
+    'mmap_size': 64 * 1024 * 1024,
+})
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+# --- Voter roll ---
+@receiver([post_save, post_delete], sender=EligibleMember)
+def eligible_member_changed(sender, instance, **kwargs):
+    invalidate_roll(instance.session_id)
+
+
+# --- Ballot catalogue ---
+@receiver([post_save, post_delete], sender=Nomination)
+def nomination_changed(sender, instance, **kwargs):
+    invalidate_ballot(instance.session_id)
+
+
+@receiver([post_save, post_delete], sender=Position)
+def position_changed(sender, instance, **kwargs):
+    invalidate_ballot()
+    stats.mark_stale(instance.session_id)
+
+
+# --- Search index ---
+@receiver(post_save, sender=Nomination)
+@receiver(post_save, sender=Voter)
+def index_search_entry(sender, instance, **kwargs):
+    index_object(instance)
+
+
+@receiver(post_delete, sender=Nomination)
+@receiver(post_delete, sender=Voter)
+def remove_search_entry(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+# --- Vote path rollups ---
+@receiver(post_save, sender=Vote)
+def vote_recorded(sender, instance, created, **kwargs):
+    if created:
+        ledger.append(instance)
+        record_vote(instance)
+        cube.record_vote(instance, instance.voter)
+        stats.record_vote(instance)
+        # After commit, so no reader computes the new version from old rows
+        transaction.on_commit(lambda: counts.bump_version(instance.session_id))
+
+
+@receiver(post_delete, sender=Vote)
+def vote_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: counts.bump_version(instance.session_id))
+
+
+# --- Dashboard statistics ---
+@receiver(post_save, sender=Voter)
+def voter_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.record_voter(instance.session_id)
+
+
+@receiver(post_delete, sender=Vote)
+@receiver(post_delete, sender=Voter)
+def stats_rows_removed(sender, instance, **kwargs):
+    stats.mark_stale(instance.session_id)
+
+
+@receiver([post_save, post_delete], sender=Nomination)
+def nomination_moderated(sender, instance, **kwargs):
+    stats.refresh_candidates(instance.session_id)
+
+
+# --- Live counts session lookup ---
+@receiver([post_save, post_delete], sender=Session)
+def session_changed(sender, instance, **kwargs):
+    counts.forget_session(instance.id)
+
+
+# --- Frozen results ---
+@receiver(post_save, sender=Session)
+def session_reopened(sender, instance, **kwargs):
+    # Results frozen at an earlier close would hide the votes still to come
+    if instance.status == 'Voting Open':
+        thaw_results([instance.id])
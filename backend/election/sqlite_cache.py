@@ -0,0 +1,229 @@
+"""
+Cross-process cache backend on a SQLite file in WAL mode.
+
+Passenger runs several worker processes and there is no Redis on the host,
+so a per-process LocMemCache would leave each worker with its own stale copy.
+This backend keeps entries in one SQLite file that every worker opens:
+WAL mode lets readers proceed while one writer commits, and each operation is
+a single short statement.
+
+* TTLs: entries store an absolute expiry; expired rows read as missing and
+  are removed during culling.
+* LRU eviction: reads refresh ``accessed`` (at most once per
+  ``LRU_RESOLUTION`` seconds per key, to keep reads mostly read-only); when
+  the table grows past ``MAX_ENTRIES`` the least recently used
+  ``1/CULL_FREQUENCY`` of the entries are dropped.
+* Atomic increments: plain ints are stored as SQLite INTEGERs, so ``incr`` is
+  one ``UPDATE ... SET value = value + ? RETURNING value`` statement. SQLite
+  builds older than 3.35 (common on shared hosts) lack RETURNING; there the
+  UPDATE and a SELECT of the new value run in one IMMEDIATE transaction.
+
+Settings::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'election.sqlite_cache.SQLiteCache',
+            'LOCATION': BASE_DIR / 'cache.sqlite3',
+            'OPTIONS': {'table': 'cache', 'MAX_ENTRIES': 5000},
+        },
+    }
+"""
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+LRU_RESOLUTION = 10  # seconds
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+CULL_CHECK_EVERY = 50  # check the table size on roughly one set in this many
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__(params)
+        self.path = str(location)
+        self.table = options.get('table', 'cache')
+        self.busy_timeout = options.get('busy_timeout', 5000)
+        self._local = threading.local()
+
+    # --- Connection ---
+    def _connection(self):
+        # One connection per thread and process; reconnect after a fork
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout)}')
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.table}" ('
+                'key TEXT PRIMARY KEY, value BLOB, expires REAL, accessed REAL) WITHOUT ROWID'
+            )
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "{self.table}_accessed" ON "{self.table}" (accessed)')
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def _execute(self, sql, params=()):
+        return self._connection().execute(sql.replace('{table}', f'"{self.table}"'), params)
+
+    # --- Encoding ---
+    def _encode(self, value):
+        # Exact ints stay native so incr() can run in SQL; bools are ints too, so pickle them
+        if type(value) is int and -2**63 <= value < 2**63:
+            return value
+        return pickle.dumps(value, self.pickle_protocol)
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _expiry(self, timeout):
+        # Absolute expiry time, or None for "never"
+        return self.get_backend_timeout(timeout)
+
+    # --- Cache API ---
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        row = self._execute('SELECT value, expires, accessed FROM {table} WHERE key = ?', [key]).fetchone()
+        if row is None:
+            return default
+        value, expires, accessed = row
+        if expires is not None and expires <= now:
+            self._execute('DELETE FROM {table} WHERE key = ? AND expires <= ?', [key, now])
+            return default
+        if accessed < now - LRU_RESOLUTION:
+            self._execute('UPDATE {table} SET accessed = ? WHERE key = ?', [now, key])
+        return self._decode(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._execute(
+            'INSERT OR REPLACE INTO {table} (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+            [key, self._encode(value), self._expiry(timeout), time.time()],
+        )
+        self._maybe_cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        cursor = self._execute(
+            'INSERT INTO {table} (key, value, expires, accessed) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires, '
+            'accessed = excluded.accessed WHERE expires IS NOT NULL AND expires <= ?',
+            [key, self._encode(value), self._expiry(timeout), now, now],
+        )
+        added = cursor.rowcount == 1
+        if added:
+            self._maybe_cull()
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        cursor = self._execute(
+            'UPDATE {table} SET expires = ?, accessed = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            [self._expiry(timeout), now, key, now],
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._execute('DELETE FROM {table} WHERE key = ?', [key]).rowcount == 1
+
+    def delete_if(self, key, value, version=None):
+        """Delete ``key`` only while it still holds ``value``, in one statement."""
+        key = self.make_and_validate_key(key, version=version)
+        return self._execute(
+            'DELETE FROM {table} WHERE key = ? AND value = ?', [key, self._encode(value)],
+        ).rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._execute(
+            'SELECT 1 FROM {table} WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            [key, time.time()],
+        ).fetchone() is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        update = (
+            "UPDATE {table} SET value = value + ?, accessed = ? "
+            "WHERE key = ? AND typeof(value) = 'integer' AND (expires IS NULL OR expires > ?)"
+        )
+        if HAS_RETURNING:
+            row = self._execute(update + ' RETURNING value', [delta, now, key, now]).fetchone()
+        else:
+            row = self._update_and_select(update, [delta, now, key, now], key)
+        if row is None:
+            # Missing, expired or not an int: same errors as the built-in backends
+            found = self._execute(
+                'SELECT 1 FROM {table} WHERE key = ? AND (expires IS NULL OR expires > ?)', [key, now],
+            ).fetchone()
+            if found is None:
+                raise ValueError(f"Key '{key}' not found.")
+            raise TypeError(f"Value for '{key}' is not an integer.")
+        return row[0]
+
+    def _update_and_select(self, update, params, key):
+        # The write lock is taken at BEGIN, so no other incr can land in between
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = None
+            if self._execute(update, params).rowcount:
+                row = self._execute('SELECT value FROM {table} WHERE key = ?', [key]).fetchone()
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return row
+
+    def clear(self):
+        self._execute('DELETE FROM {table}')
+
+    # --- Eviction ---
+    def _maybe_cull(self):
+        if random.randrange(CULL_CHECK_EVERY):
+            return
+        self._cull()
+
+    def _cull(self):
+        now = time.time()
+        self._execute('DELETE FROM {table} WHERE expires IS NOT NULL AND expires <= ?', [now])
+        count = self._execute('SELECT COUNT(*) FROM {table}').fetchone()[0]
+        if count <= self._max_entries:
+            return
+        drop = count // self._cull_frequency if self._cull_frequency else count
+        drop = max(drop, count - self._max_entries)
+        self._execute(
+            'DELETE FROM {table} WHERE key IN (SELECT key FROM {table} ORDER BY accessed LIMIT ?)',
+            [drop],
+        )
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests; nothing to do
+        pass
+
+
+def named_cache(alias):
+    """Proxy to the ``alias`` cache, or to the default one when it is not configured."""
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.utils.connection import ConnectionProxy
+
+    return ConnectionProxy(caches, alias if alias in settings.CACHES else 'default')
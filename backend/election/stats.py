@@ -0,0 +1,228 @@
+"""
+Materialized dashboard statistics.
+
+The dashboard used to count voters, candidates and positions and rank every
+nominee by ``Count('votes')`` on each load. ``SessionStats`` keeps those
+numbers in one row per session instead:
+
+* the Vote post_save receiver adds each vote to the totals, its position and
+  its nominee, and re-ranks the leaders (a nominee's details are fetched only
+  when it enters the top ``LEADERS``);
+* ``cast_vote`` counts the ballot its vote completes, and a new voter bumps
+  ``voters``;
+* moderation (nomination saves and deletes, the admin approve/reject actions)
+  recounts the candidate numbers and refreshes the leaders' details;
+* anything that removes votes or voters, or changes positions, marks the row
+  stale, and the next read rebuilds it, as does ``manage.py rebuild_stats``.
+
+Vote-path updates lock the row, so concurrent ballots cannot lose each
+other's increments to the JSON columns.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .ballot import get_ballot
+from .models import Nomination, Position, SessionStats, Vote, Voter
+from .watermarks import split_at_watermark
+
+
+LEADERS = 5
+LEADER_FIELDS = ['id', 'full_name', 'email', 'gender', 'designation', 'photo']
+
+
+# --- Leaders ---
+def _leader(row, votes):
+    photo = row['photo']
+    return {
+        'id': row['id'],
+        'full_name': row['full_name'],
+        'email': row['email'],
+        'gender': row['gender'],
+        'designation': row['designation'],
+        'photo_url': Nomination._meta.get_field('photo').storage.url(photo) if photo else '',
+        'votes': votes,
+    }
+
+
+def _rank_key(leader):
+    return (-leader['votes'], leader['id'])
+
+
+def rank_leaders(session_id, nominee_votes):
+    """The top ``LEADERS`` nominees of the session, including ones with no votes yet."""
+    rows = Nomination.objects.filter(session_id=session_id).values(*LEADER_FIELDS)
+    leaders = [_leader(row, nominee_votes.get(str(row['id']), 0)) for row in rows]
+    leaders.sort(key=_rank_key)
+    return leaders[:LEADERS]
+
+
+def _promote(stats, nominee_id, votes):
+    leaders = stats.leaders
+    for leader in leaders:
+        if leader['id'] == nominee_id:
+            leader['votes'] = votes
+            break
+    else:
+        candidate = {'id': nominee_id, 'votes': votes}
+        if len(leaders) >= LEADERS and _rank_key(candidate) >= _rank_key(leaders[-1]):
+            return
+        row = Nomination.objects.filter(pk=nominee_id).values(*LEADER_FIELDS).first()
+        if row is None:
+            return
+        leaders.append(_leader(row, votes))
+    leaders.sort(key=_rank_key)
+    del leaders[LEADERS:]
+
+
+# --- Rebuild ---
+def candidate_counts(session_id):
+    """(approved, pending) nominations of the session, in one query."""
+    counts = Nomination.objects.filter(session_id=session_id).aggregate(
+        approved_count=Count('id', filter=Q(approved=True)),
+        pending_count=Count('id', filter=Q(approved=False)),
+    )
+    return counts['approved_count'], counts['pending_count']
+
+
+def _completed_ballots(session, votes):
+    """Voters with a vote in ``votes`` for every position on the current ballot."""
+    ballot_ids = [entry['position'].id for entry in get_ballot(session)]
+    if not ballot_ids:
+        return 0
+    return (
+        votes.filter(position_id__in=ballot_ids)
+        .values('voter_id')
+        .annotate(n=Count('position_id', distinct=True))
+        .filter(n=len(ballot_ids))
+        .count()
+    )
+
+
+def _vote_counts(votes):
+    """({position id: votes}, {nominee id as str: votes}) of ``votes``."""
+    position_counts = dict(votes.values_list('position_id').annotate(n=Count('id')).order_by())
+    nominee_votes = {
+        str(nominee_id): n
+        for nominee_id, n in votes.values_list('nominee_id').annotate(n=Count('id')).order_by()
+    }
+    return position_counts, nominee_votes
+
+
+def compute(session, votes=None, voters=None):
+    """Every statistic of ``session`` counted from the base tables (or the given rows)."""
+    if votes is None:
+        votes = Vote.objects.filter(session=session)
+    if voters is None:
+        voters = Voter.objects.filter(session=session)
+    positions = list(Position.objects.for_session(session).order_by('order', 'id').values('id', 'name'))
+    position_counts, nominee_votes = _vote_counts(votes)
+    approved, pending = candidate_counts(session.pk)
+
+    return {
+        'voters': voters.count(),
+        'votes': sum(position_counts.values()),
+        'ballots_completed': _completed_ballots(session, votes),
+        'approved_candidates': approved,
+        'pending_candidates': pending,
+        'positions': len(positions),
+        'position_votes': [
+            {'id': p['id'], 'name': p['name'], 'votes': position_counts.get(p['id'], 0)} for p in positions
+        ],
+        'nominee_votes': nominee_votes,
+        'leaders': rank_leaders(session.pk, nominee_votes),
+    }
+
+
+def rebuild(session):
+    """
+    Recount the row of ``session`` and return it. The counting runs outside
+    any transaction (see watermarks); the short locked write adds the votes
+    and voters that arrived meanwhile.
+    """
+    counted_votes, new_votes = split_at_watermark(Vote.objects.filter(session=session))
+    counted_voters, new_voters = split_at_watermark(Voter.objects.filter(session=session))
+    values = compute(session, counted_votes, counted_voters)
+
+    with transaction.atomic():
+        SessionStats.objects.get_or_create(session=session)
+        stats = SessionStats.objects.select_for_update().get(session=session)
+        for field, value in values.items():
+            setattr(stats, field, value)
+        _add_newer(stats, session, counted_votes, new_votes, new_voters)
+        stats.stale = False
+        stats.rebuilt_at = timezone.now()
+        stats.save()
+    return stats
+
+
+def _add_newer(stats, session, counted_votes, new_votes, new_voters):
+    position_counts, nominee_votes = _vote_counts(new_votes)
+    if not position_counts and not new_voters.exists():
+        return
+    for entry in stats.position_votes:
+        entry['votes'] += position_counts.get(entry['id'], 0)
+    for key, n in nominee_votes.items():
+        stats.nominee_votes[key] = stats.nominee_votes.get(key, 0) + n
+    stats.votes += sum(position_counts.values())
+    stats.voters += new_voters.count()
+    # Ballots completed by the new votes: complete now, but not with the counted votes alone
+    voters = new_votes.values('voter_id')
+    stats.ballots_completed += (
+        _completed_ballots(session, Vote.objects.filter(session=session, voter_id__in=voters))
+        - _completed_ballots(session, counted_votes.filter(voter_id__in=voters))
+    )
+    stats.leaders = rank_leaders(session.pk, stats.nominee_votes)
+
+
+def get_stats(session):
+    """The statistics row of ``session``: one query unless it has to be rebuilt."""
+    stats = SessionStats.objects.filter(session=session).first()
+    if stats is None or stats.stale:
+        stats = rebuild(session)
+    return stats
+
+
+# --- Incremental updates ---
+def record_vote(vote):
+    """Add one new vote; called from the Vote post_save receiver."""
+    with transaction.atomic():
+        stats = SessionStats.objects.select_for_update().filter(session_id=vote.session_id).first()
+        if stats is None or stats.stale:
+            return  # rebuilt on the next read
+
+        entry = next((p for p in stats.position_votes if p['id'] == vote.position_id), None)
+        if entry is None:
+            stats.stale = True
+        else:
+            entry['votes'] += 1
+        key = str(vote.nominee_id)
+        stats.nominee_votes[key] = stats.nominee_votes.get(key, 0) + 1
+        _promote(stats, vote.nominee_id, stats.nominee_votes[key])
+        stats.votes += 1
+        stats.save(update_fields=['votes', 'position_votes', 'nominee_votes', 'leaders', 'stale', 'updated_at'])
+
+
+def record_ballot_completed(session_id):
+    SessionStats.objects.filter(session_id=session_id).update(ballots_completed=F('ballots_completed') + 1)
+
+
+def record_voter(session_id):
+    SessionStats.objects.filter(session_id=session_id).update(voters=F('voters') + 1)
+
+
+def refresh_candidates(session_id):
+    """Recount approved/pending candidates and refresh the leaders after moderation."""
+    with transaction.atomic():
+        stats = SessionStats.objects.select_for_update().filter(session_id=session_id, stale=False).first()
+        if stats is None:
+            return
+        stats.approved_candidates, stats.pending_candidates = candidate_counts(session_id)
+        stats.leaders = rank_leaders(session_id, stats.nominee_votes)
+        stats.save(update_fields=['approved_candidates', 'pending_candidates', 'leaders', 'updated_at'])
+
+
+def mark_stale(session_id=None):
+    """Have the next read rebuild the row of ``session_id`` (of every session when None)."""
+    rows = SessionStats.objects.all() if session_id is None else SessionStats.objects.filter(session_id=session_id)
+    rows.update(stale=True)
@@ -0,0 +1,210 @@
+"""
+Pluggable tally engine.
+
+Counting methods register themselves with ``@register('<name>')`` and receive
+the packed ballots of one position. Ranked ballots are packed into a NumPy
+integer matrix (one row per ballot, one column per preference, candidate
+indexes padded with -1) so each counting round is a handful of vectorized
+operations over all ballots instead of a Python loop per ballot.
+
+Every method returns a ``TallyResult`` with the winners and a round-by-round
+audit trail that is shown in the panel and frozen into result snapshots.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .models import BallotRanking, Vote
+
+
+METHODS = {}
+
+
+def register(name):
+    def decorator(func):
+        METHODS[name] = func
+        return func
+    return decorator
+
+
+@dataclass
+class TallyResult:
+    method: str
+    seats: int
+    winners: list
+    rounds: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {'method': self.method, 'seats': self.seats, 'winners': self.winners, 'rounds': self.rounds}
+
+
+# --- Ballot packing ---
+def pack_rankings(voter_ids, nominee_ids, ranks, candidate_ids):
+    """
+    Pack flat (voter, nominee, rank) columns into a ballot matrix.
+
+    Returns an int32 array of shape (ballots, max_rank) holding indexes into
+    ``candidate_ids``; unused preferences are -1. Nominees that are not
+    candidates any more (e.g. withdrawn) are dropped from the ballot.
+    """
+    candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+    voter_ids = np.asarray(voter_ids, dtype=np.int64)
+    nominee_ids = np.asarray(nominee_ids, dtype=np.int64)
+    ranks = np.asarray(ranks, dtype=np.int64)
+    if voter_ids.size == 0:
+        return np.full((0, 1), -1, dtype=np.int32)
+
+    # Map nominee ids to candidate indexes; unknown nominees become -1
+    order = np.argsort(candidate_ids)
+    pos = np.searchsorted(candidate_ids, nominee_ids, sorter=order)
+    pos = np.clip(pos, 0, len(candidate_ids) - 1)
+    index = order[pos]
+    index = np.where(candidate_ids[index] == nominee_ids, index, -1)
+
+    keep = index >= 0
+    voter_ids, ranks, index = voter_ids[keep], ranks[keep], index[keep]
+
+    rows, row_of = np.unique(voter_ids, return_inverse=True)
+    # Compact ranks per ballot to 0..n-1 so gaps (a dropped nominee) don't leave holes
+    sort = np.lexsort((ranks, row_of))
+    row_sorted = row_of[sort]
+    starts = np.r_[0, np.flatnonzero(np.diff(row_sorted)) + 1]
+    column = np.arange(row_sorted.size) - np.repeat(starts, np.diff(np.r_[starts, row_sorted.size]))
+
+    ballots = np.full((rows.size, int(column.max()) + 1), -1, dtype=np.int32)
+    ballots[row_sorted, column] = index[sort]
+    return ballots
+
+
+def load_ranked_ballots(session, position, candidate_ids):
+    rows = np.array(
+        list(
+            BallotRanking.objects.filter(session=session, position=position)
+            .values_list('voter_id', 'nominee_id', 'rank')
+            .iterator(chunk_size=5000)
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    return pack_rankings(rows[:, 0], rows[:, 1], rows[:, 2], candidate_ids)
+
+
+def load_plurality_ballots(session, position, candidate_ids):
+    nominees = np.fromiter(
+        Vote.objects.filter(session=session, position=position)
+        .values_list('nominee_id', flat=True)
+        .iterator(chunk_size=5000),
+        dtype=np.int64,
+    )
+    return pack_rankings(np.arange(nominees.size), nominees, np.ones_like(nominees), candidate_ids)
+
+
+# --- Counting methods ---
+def _round_tallies(ids, tallies):
+    # String keys so the audit trail survives a JSON round trip unchanged
+    return {str(int(c)): round(float(t), 6) for c, t in zip(ids, tallies)}
+
+
+@register('plurality')
+def plurality(ballots, candidate_ids, seats=1):
+    first = ballots[:, 0] if ballots.size else np.empty(0, dtype=np.int32)
+    tallies = np.bincount(first[first >= 0], minlength=len(candidate_ids))
+    # Stable sort: ties keep candidate order
+    ranking = np.argsort(-tallies, kind='stable')
+    winners = [int(candidate_ids[i]) for i in ranking[:seats]]
+    return TallyResult('plurality', seats, winners, [{
+        'round': 1,
+        'tallies': _round_tallies(candidate_ids, tallies),
+        'elected': winners,
+        'eliminated': [],
+        'exhausted': int((first < 0).sum()),
+    }])
+
+
+@register('stv')
+def stv(ballots, candidate_ids, seats=1, method='stv'):
+    """
+    Droop-quota STV with fractional (Gregory) surplus transfers.
+
+    Each round every ballot counts, with its current weight, for its highest
+    ranked continuing candidate. A candidate reaching the quota is elected and
+    the ballots counting for them carry on at weight surplus / votes; when
+    nobody reaches it, the lowest candidate is eliminated.
+    """
+    n_candidates = len(candidate_ids)
+    n_ballots = ballots.shape[0]
+    seats = min(seats, n_candidates)
+    weights = np.ones(n_ballots, dtype=np.float64)
+    continuing = np.ones(n_candidates + 1, dtype=bool)
+    continuing[-1] = False  # index -1 (padding) maps here and is never continuing
+    first_round = None
+
+    quota = np.floor(n_ballots / (seats + 1)) + 1 if n_ballots else 1
+    winners, rounds = [], []
+    rows = np.arange(n_ballots)
+
+    while len(winners) < seats:
+        # Highest ranked continuing candidate on each ballot
+        live = continuing[ballots] if n_ballots else np.zeros((0, 1), dtype=bool)
+        has = live.any(axis=1)
+        top = ballots[rows, live.argmax(axis=1)] if n_ballots else np.empty(0, dtype=np.int32)
+        tallies = np.bincount(top[has], weights=weights[has], minlength=n_candidates)
+        if first_round is None:
+            first_round = tallies.copy()
+
+        record = {
+            'round': len(rounds) + 1,
+            'quota': float(quota),
+            'tallies': _round_tallies(
+                [candidate_ids[i] for i in np.flatnonzero(continuing[:-1])],
+                tallies[continuing[:-1]],
+            ),
+            'elected': [],
+            'eliminated': [],
+            'exhausted': round(float(weights[~has].sum()), 6),
+        }
+        remaining = np.flatnonzero(continuing[:-1])
+
+        if remaining.size <= seats - len(winners):
+            # Everyone left fills the remaining seats
+            for i in remaining[np.argsort(-tallies[remaining], kind='stable')]:
+                winners.append(int(candidate_ids[i]))
+                record['elected'].append(int(candidate_ids[i]))
+                continuing[i] = False
+        else:
+            masked = np.where(continuing[:-1], tallies, -np.inf)
+            best = int(masked.argmax())
+            if tallies[best] >= quota:
+                surplus = tallies[best] - quota
+                transfer = surplus / tallies[best] if tallies[best] else 0.0
+                weights[has & (top == best)] *= transfer
+                continuing[best] = False
+                winners.append(int(candidate_ids[best]))
+                record['elected'].append(int(candidate_ids[best]))
+                record['transfer_weight'] = round(float(transfer), 6)
+            else:
+                # Lowest tally goes; ties broken by fewer first preferences, then candidate order
+                lowest = np.where(continuing[:-1], tallies, np.inf)
+                tied = np.flatnonzero(lowest == lowest.min())
+                loser = int(tied[np.argmin(first_round[tied])])
+                continuing[loser] = False
+                record['eliminated'].append(int(candidate_ids[loser]))
+
+        rounds.append(record)
+
+    return TallyResult(method, seats, winners, rounds)
+
+
+@register('irv')
+def irv(ballots, candidate_ids, seats=1):
+    """Instant runoff: single-seat STV (the Droop quota is then a majority)."""
+    return stv(ballots, candidate_ids, seats=1, method='irv')
+
+
+def tally_position(session, position, candidate_ids):
+    """Load and count the ballots of one position with its configured method."""
+    candidate_ids = list(candidate_ids)
+    if position.counting_method == 'plurality':
+        ballots = load_plurality_ballots(session, position, candidate_ids)
+    else:
+        ballots = load_ranked_ballots(session, position, candidate_ids)
+    return METHODS[position.counting_method](ballots, candidate_ids, seats=position.seats)
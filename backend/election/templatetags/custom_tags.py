@@ -1,5 +1,7 @@
 from django import template
 
+from election.models import Session
+
 register = template.Library()
 
 @register.filter
@@ -10,4 +12,12 @@ def get_item(dictionary, key):
     """
     if dictionary is None:
         return None
-    return dictionary.get(key, 0)
\ No newline at end of file
+    return dictionary.get(key, 0)
+
+@register.simple_tag
+def get_sessions():
+    """
+    All sessions, newest first, for the panel session switcher.
+    Usage: {% get_sessions as sessions %}
+    """
+    return Session.objects.order_by('-created_at')
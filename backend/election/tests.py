@@ -1,3 +1,1166 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import json
+import shutil
+import struct
+import tempfile
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from PIL import Image
+
+from django.contrib.auth.models import User
+from django.core import mail, signing
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import admin as election_admin
+from . import (
+    admission, archive, backup, counts, dedupe, eligibility, ledger, outbox, receipts, recount, search, stats, tally,
+    throttle, tokens, uploads,
+)
+from .models import (
+    Session, Position, Nomination, Voter, Vote, SessionStats, DedupeKey, DuplicateCandidate, BallotRanking,
+    EligibleMember, TurnoutBucket, ResultCubeCell, OutboxMessage, LedgerEntry, LedgerCheckpoint, BallotReceipt,
+)
+from .results import freeze_results
+
+
+class AdminChangelistQueryTests(TestCase):
+    """Each admin changelist runs the same number of queries however many rows it shows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        now = timezone.now()
+        cls.session = Session.objects.create(
+            name='2025',
+            status='Voting Open',
+            start_nomination=now - timedelta(days=3),
+            end_nomination=now - timedelta(days=2),
+            start_voting=now - timedelta(days=1),
+            end_voting=now + timedelta(days=1),
+        )
+        cls.positions = [
+            Position.objects.create(session=cls.session, name=f'Position {i}', order=i) for i in range(3)
+        ]
+        cls.nominees = [
+            Nomination.objects.create(
+                session=cls.session, full_name=f'Candidate {i}', email=f'candidate{i}@example.com',
+                gender='Male', designation='Officer', workplace_address='Dhaka',
+                desired_position=position, approved=True,
+            )
+            for i, position in enumerate(cls.positions)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+        self.voters = 0
+
+    def add_voters(self, count):
+        for _ in range(count):
+            voter = Voter.objects.create(
+                session=self.session, full_name=f'Voter {self.voters}', email=f'voter{self.voters}@example.com',
+                gender='Female', designation='Nurse', workplace_address='Khulna', voted_at=timezone.now(),
+            )
+            self.voters += 1
+            for position, nominee in zip(self.positions, self.nominees):
+                Vote.objects.create(session=self.session, voter=voter, position=position, nominee=nominee)
+
+    def assertConstantQueries(self, url, expected):
+        self.add_voters(2)
+        with self.assertNumQueries(expected):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.add_voters(20)
+        with self.assertNumQueries(expected):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_vote_changelist(self):
+        self.assertConstantQueries(reverse('admin:election_vote_changelist'), 7)
+
+    def test_voter_changelist(self):
+        self.assertConstantQueries(reverse('admin:election_voter_changelist'), 6)
+
+    def test_nomination_changelist(self):
+        self.assertConstantQueries(reverse('admin:election_nomination_changelist'), 7)
+
+    def test_filtered_vote_changelist(self):
+        url = reverse('admin:election_vote_changelist') + f'?session__id__exact={self.session.id}'
+        self.assertConstantQueries(url, 7)
+
+    def test_dashboard(self):
+        # The statistics row is built on the first load and then read as is
+        url = reverse('admin_dashboard') + f'?session={self.session.id}'
+        self.client.get(url)
+        self.assertConstantQueries(url, 6)
+
+    def test_dashboard_stats_match_rebuild(self):
+        stats.rebuild(self.session)
+        self.add_voters(5)
+        row = SessionStats.objects.get(session=self.session)
+        expected = stats.compute(self.session)
+        for field in ('voters', 'votes', 'position_votes', 'nominee_votes', 'leaders'):
+            self.assertEqual(getattr(row, field), expected[field], field)
+        self.assertEqual(row.votes, 15)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+
+    def setUp(self):
+        User.objects.create_user('a', 'a@example.com', 'x')
+        User.objects.create_user('b', 'b@example.com', 'x')
+
+    def test_unfiltered_count_is_cached_estimate(self):
+        old = election_admin.ESTIMATE_THRESHOLD
+        election_admin.ESTIMATE_THRESHOLD = 1
+        try:
+            paginator = election_admin.EstimatedCountPaginator(User.objects.order_by('pk'), 10)
+            self.assertEqual(paginator.count, 2)
+            User.objects.create_user('c', 'c@example.com', 'x')
+            with self.assertNumQueries(1):  # statistics lookup only, no COUNT(*)
+                paginator = election_admin.EstimatedCountPaginator(User.objects.order_by('pk'), 10)
+                self.assertEqual(paginator.count, 2)
+        finally:
+            election_admin.ESTIMATE_THRESHOLD = old
+
+    def test_filtered_count_is_exact(self):
+        paginator = election_admin.EstimatedCountPaginator(User.objects.filter(username='a'), 10)
+        self.assertEqual(paginator.count, 1)
+
+    def test_refresh_estimates_updates_statistics(self):
+        election_admin.refresh_estimates([User])
+        self.assertEqual(election_admin.estimated_count(User), (2, False))
+        User.objects.create_user('c', 'c@example.com', 'x')
+        self.assertEqual(election_admin.estimated_count(User), (2, False))
+        election_admin.refresh_estimates([User])
+        self.assertEqual(election_admin.estimated_count(User), (3, False))
+
+
+class SessionActionTests(TestCase):
+    def test_close_voting_forgets_live_session(self):
+        session, _, _ = create_election()
+        counts.cache.clear()
+        self.assertEqual(counts.live_session_id(), session.id)
+        self.assertEqual(counts.live_session_id(session.id), session.id)
+        model_admin = election_admin.SessionAdmin(Session, election_admin.admin.site)
+        model_admin.close_voting(None, Session.objects.filter(pk=session.pk))
+        self.assertIsNone(counts.live_session_id())
+        self.assertIsNone(counts.live_session_id(session.id))
+
+
+class DedupeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.session = Session.objects.create(
+            name='2025', status='Nomination Open',
+            start_nomination=now, end_nomination=now + timedelta(days=1),
+            start_voting=now + timedelta(days=2), end_voting=now + timedelta(days=3),
+        )
+
+    def add_voter(self, name, workplace, designation='Staff Nurse'):
+        count = Voter.objects.count()
+        return Voter.objects.create(
+            session=self.session, full_name=name, email=f'voter{count}@example.com',
+            gender='Female', designation=designation, workplace_address=workplace,
+        )
+
+    def test_soundex(self):
+        for token, code in [
+            ('robert', 'R163'), ('rupert', 'R163'), ('rahman', 'R550'), ('rohman', 'R550'),
+            ('ashcraft', 'A261'), ('tymczak', 'T522'), ('pfister', 'P236'), ('lee', 'L000'),
+            ('', ''), ('42', '42'),
+        ]:
+            self.assertEqual(dedupe.soundex(token), code, token)
+
+    def test_blocking_keys(self):
+        record = {'full_name': 'Md. Rahim Uddin', 'workplace_address': 'Dhaka Med. Coll. Hosp.'}
+        self.assertEqual(dedupe.blocking_keys(record), {
+            'n:R500 U350',
+            't:R500:college', 't:R500:dhaka', 't:R500:hospital', 't:R500:medical',
+            't:U350:college', 't:U350:dhaka', 't:U350:hospital', 't:U350:medical',
+        })
+        swapped = {'full_name': 'Uddin Rohim', 'workplace_address': ''}
+        self.assertEqual(dedupe.blocking_keys(swapped), {'n:R500 U350'})
+        self.assertEqual(dedupe.blocking_keys({'full_name': 'Dr. Md.', 'workplace_address': 'Dhaka'}), set())
+
+    def test_same_name_and_designation_elsewhere_is_not_a_candidate(self):
+        first = {'full_name': 'Rahim Uddin', 'designation': 'Staff Nurse', 'workplace_address': 'Khulna Sadar Hospital'}
+        second = dict(first, workplace_address='Rangpur Medical College')
+        total, reasons = dedupe.score(first, second)
+        self.assertGreaterEqual(total, dedupe.THRESHOLD)
+        self.assertFalse(dedupe.is_candidate(total, reasons))
+        third = dict(first, workplace_address='Khulna Medical College')
+        self.assertTrue(dedupe.is_candidate(*dedupe.score(first, third)))
+
+    def test_detect_only_processes_new_records(self):
+        first = self.add_voter('Rahim Uddin', 'Dhaka Medical College Hospital')
+        self.add_voter('Karim Hossain', 'Rangpur Sadar Hospital', designation='Midwife')
+        self.assertEqual(dedupe.detect(self.session, kinds=['voter']), {'voter': (2, 0)})
+        self.assertEqual(dedupe.detect(self.session, kinds=['voter']), {'voter': (0, 0)})
+
+        # A new record is keyed and compared against the ones already keyed
+        second = self.add_voter('Rohim Uddin', 'Dhaka Med. Coll. Hosp.')
+        keys = DedupeKey.objects.filter(session=self.session, kind='voter')
+        before = keys.count()
+        self.assertEqual(dedupe.detect(self.session, kinds=['voter']), {'voter': (1, 1)})
+        self.assertEqual(set(keys.filter(object_id=second.id).values_list('key', flat=True)),
+                         dedupe.blocking_keys({'full_name': second.full_name,
+                                               'workplace_address': second.workplace_address}))
+        self.assertEqual(keys.exclude(object_id=second.id).count(), before)
+        candidate = DuplicateCandidate.objects.get(session=self.session, kind='voter')
+        self.assertEqual((candidate.first_id, candidate.second_id), (first.id, second.id))
+
+        # Records added in several batches are all picked up
+        for name, place in [('Abdul Jalil', 'Bogura'), ('Nasrin Akter', 'Sylhet'), ('Farhana Yasmin', 'Barishal'),
+                            ('Shirin Sultana', 'Cumilla'), ('Tanvir Alam', 'Jashore')]:
+            self.add_voter(name, f'{place} General Hospital')
+        self.assertEqual(dedupe.detect(self.session, kinds=['voter'], batch_size=2), {'voter': (5, 0)})
+        self.assertEqual(dedupe.detect(self.session, kinds=['voter']), {'voter': (0, 0)})
+
+        dedupe.reset(self.session, kinds=['voter'])
+        self.assertEqual(dedupe.detect(self.session, kinds=['voter'])['voter'][0], 8)
+
+
+def pack(candidate_ids, *groups):
+    """Ballot matrix from (count, [nominee ids in preference order]) groups."""
+    voters, nominees, ranks = [], [], []
+    voter = 0
+    for count, preferences in groups:
+        for _ in range(count):
+            voter += 1
+            for rank, nominee in enumerate(preferences, start=1):
+                voters.append(voter)
+                nominees.append(nominee)
+                ranks.append(rank)
+    return tally.pack_rankings(voters, nominees, ranks, candidate_ids)
+
+
+class TallyTests(SimpleTestCase):
+    """Hand-counted elections run through the NumPy engine."""
+
+    def summary(self, result):
+        return [(r['elected'], r['eliminated'], r['exhausted']) for r in result.rounds]
+
+    def test_pack_rankings(self):
+        # Nominee 99 is not a candidate any more: dropped and the ranks closed up
+        ballots = tally.pack_rankings([7, 7, 7, 3, 5], [99, 30, 10, 20, 99], [1, 3, 2, 1, 1], [10, 20, 30])
+        self.assertEqual(ballots.tolist(), [[1, -1], [0, 2]])
+
+    def test_irv_elimination_sequence(self):
+        candidates = [10, 20, 30, 40]
+        ballots = pack(candidates, (4, [10, 20]), (3, [20, 30]), (2, [30, 20]), (1, [40, 30]))
+        result = tally.irv(ballots, candidates)
+        self.assertEqual(result.method, 'irv')
+        self.assertEqual(result.winners, [20])
+        self.assertEqual(self.summary(result), [
+            ([], [40], 0.0),
+            ([], [30], 0.0),   # 20 and 30 tie on 3: 30 had fewer first preferences
+            ([], [10], 1.0),   # the 40 > 30 ballot has nobody left
+            ([20], [], 1.0),
+        ])
+        self.assertEqual(result.rounds[0]['quota'], 6.0)
+        self.assertEqual(result.rounds[2]['tallies'], {'10': 4.0, '20': 5.0})
+
+    def test_stv_surplus_transfer(self):
+        candidates = [1, 2, 3, 4]
+        ballots = pack(candidates, (6, [1, 2]), (2, [2]), (3, [3]), (1, [4, 3]))
+        result = tally.stv(ballots, candidates, seats=2)
+        self.assertEqual(result.winners, [1, 3])
+        first, second = result.rounds[:2]
+        self.assertEqual(first['quota'], 5.0)
+        self.assertEqual(first['elected'], [1])
+        self.assertEqual(first['transfer_weight'], round(1 / 6, 6))
+        # The six ballots for 1 carry its one-vote surplus on to 2
+        self.assertEqual(second['tallies'], {'2': 3.0, '3': 3.0, '4': 1.0})
+        self.assertEqual(self.summary(result)[1:], [
+            ([], [4], 0.0),
+            ([], [2], 0.0),
+            ([3], [], 3.0),
+        ])
+
+    def test_exhausted_and_empty_ballots(self):
+        candidates = [1, 2, 3]
+        ballots = pack(candidates, (3, [1]), (2, [2]), (2, [3, 1]))
+        # A ballot that ranked only withdrawn nominees is left with no preferences
+        ballots = np.vstack([ballots, np.full((1, ballots.shape[1]), -1, dtype=np.int32)])
+        result = tally.irv(ballots, candidates)
+        self.assertEqual(result.winners, [1])
+        self.assertEqual(result.rounds[0]['quota'], 5.0)
+        self.assertEqual(self.summary(result), [
+            ([], [2], 1.0),
+            ([], [3], 3.0),   # the two ballots for 2 ranked nobody else
+            ([1], [], 3.0),
+        ])
+
+        empty = pack(candidates)
+        self.assertEqual(empty.shape[0], 0)
+        result = tally.irv(empty, candidates)
+        self.assertEqual(len(result.winners), 1)
+        self.assertEqual(result.rounds[0]['tallies'], {'1': 0.0, '2': 0.0, '3': 0.0})
+        self.assertEqual(tally.plurality(empty, candidates).rounds[0]['exhausted'], 0)
+
+    def test_tie_for_last_goes_by_candidate_order(self):
+        candidates = [1, 2, 3]
+        ballots = pack(candidates, (2, [1, 2]), (2, [2, 1]), (3, [3]))
+        result = tally.irv(ballots, candidates)
+        self.assertEqual(result.winners, [2])
+        self.assertEqual(self.summary(result), [([], [1], 0.0), ([2], [], 0.0)])
+
+
+class TallyPositionTests(TestCase):
+
+    def test_ranked_ballots_from_the_database(self):
+        now = timezone.now()
+        session = Session.objects.create(
+            name='2025', status='Closed',
+            start_nomination=now - timedelta(days=3), end_nomination=now - timedelta(days=2),
+            start_voting=now - timedelta(days=1), end_voting=now,
+        )
+        position = Position.objects.create(session=session, name='President', counting_method='irv')
+        a, b, c = [
+            Nomination.objects.create(
+                session=session, full_name=name, email=f'{name}@example.com', gender='Male',
+                designation='Officer', workplace_address='Dhaka', desired_position=position, approved=True,
+            )
+            for name in ('a', 'b', 'c')
+        ]
+        for i, preferences in enumerate([[a, b], [a, b], [b, c], [c, b], [c, b]]):
+            voter = Voter.objects.create(
+                session=session, full_name=f'Voter {i}', email=f'voter{i}@example.com',
+                gender='Female', designation='Nurse', workplace_address='Khulna',
+            )
+            for rank, nominee in enumerate(preferences, start=1):
+                BallotRanking.objects.create(session=session, voter=voter, position=position, nominee=nominee, rank=rank)
+        result = tally.tally_position(session, position, [a.id, b.id, c.id])
+        # b goes first (fewest first preferences), its ballot moves to c
+        self.assertEqual(result.winners, [c.id])
+        self.assertEqual(result.rounds[0]['eliminated'], [b.id])
+
+
+class FreezeResultsTests(TestCase):
+
+    def test_refreeze_keeps_snapshot_without_recounting(self):
+        session, _, _ = create_election(status='Closed')
+        snapshot = freeze_results(session)
+        with mock.patch('election.results.compute_results') as compute:
+            self.assertEqual(freeze_results(session).pk, snapshot.pk)
+        compute.assert_not_called()
+
+
+class Clock:
+    """Stands in for the ``time`` module in throttle: moves only when told to."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def module(self):
+        return SimpleNamespace(time_ns=lambda: int(self.now * 1e9), monotonic=lambda: self.now)
+
+
+class ThrottleTests(TestCase):
+    """Both bucket implementations: 3 tokens of burst, refilled at one a second."""
+
+    def setUp(self):
+        throttle.cache.clear()
+        self.clock = Clock()
+        patcher = mock.patch.object(throttle, 'time', self.clock.module())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.local = throttle.LocalBuckets()
+
+    def takers(self):
+        return [
+            ('shared', lambda key: throttle._take_shared(key, 3, 60)),
+            ('local', lambda key: self.local.take(key, 3, 60)),
+        ]
+
+    def test_burst_then_refused(self):
+        for path, take in self.takers():
+            with self.subTest(path):
+                self.assertEqual([take('burst') for _ in range(3)], [0, 0, 0])
+                self.assertAlmostEqual(take('burst'), 1.0)
+                self.assertEqual(take('other'), 0)
+
+    def test_refill(self):
+        for path, take in self.takers():
+            with self.subTest(path):
+                for _ in range(3):
+                    take('refill')
+                self.clock.advance(0.5)
+                self.assertAlmostEqual(take('refill'), 0.5)
+                self.clock.advance(0.5)
+                self.assertEqual(take('refill'), 0)
+                self.assertGreater(take('refill'), 0)
+
+    def test_idle_bucket_holds_only_burst(self):
+        for path, take in self.takers():
+            with self.subTest(path):
+                take('idle')
+                self.clock.advance(600)
+                self.assertEqual([take('idle') for _ in range(3)], [0, 0, 0])
+                self.assertGreater(take('idle'), 0)
+
+    def test_refused_request_hands_its_token_back(self):
+        for path, take in self.takers():
+            with self.subTest(path):
+                for _ in range(3):
+                    take('refund')
+                # However often a client is refused, the next token still comes a second later
+                for _ in range(20):
+                    self.assertGreater(take('refund'), 0)
+                self.clock.advance(1)
+                self.assertEqual(take('refund'), 0)
+        self.assertEqual(throttle.cache.get('refund:used'), 4)
+
+    def test_shared_cache_failure_uses_local_buckets(self):
+        with mock.patch.object(throttle, '_take_shared', side_effect=OSError('cache is down')), \
+                mock.patch.object(throttle, 'local_buckets', self.local), self.assertLogs(throttle.logger, 'WARNING'):
+            self.assertEqual(throttle.take('down', 1, 60), 0)
+            self.assertAlmostEqual(throttle.take('down', 1, 60), 1.0)
+        self.assertIn('down', self.local.buckets)
+
+    def test_retry_after_header(self):
+        url = reverse('vote_counts_batch_api')
+        with mock.patch.dict(throttle.RULES, {'vote_counts_batch_api': {'ip': (2, 30)}}):
+            for _ in range(2):
+                self.assertEqual(self.client.get(url).status_code, 200)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], '2')
+            self.assertEqual(response.json()['retry_after'], 2)
+            self.clock.advance(2)
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+
+def image_bytes(image_format, size=(40, 30)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'white').save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def with_exif(jpeg, segments=4):
+    """``jpeg`` with large APP1 segments between SOI and the frame header."""
+    app1 = b'\xff\xe1' + struct.pack('>H', 65000) + b'Exif\x00\x00' + bytes(65000 - 8)
+    return jpeg[:2] + app1 * segments + jpeg[2:]
+
+
+def png_header(width, height):
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', width, height) + bytes(5)
+
+
+@uploads.capped_photo_upload
+def photo_view(request):
+    files = {name: [f.content_type, list(f.image_size), f.size] for name, f in request.FILES.items()}
+    return JsonResponse({'files': files, 'errors': request.upload_errors})
+
+
+class SniffImageTests(SimpleTestCase):
+
+    def test_png_and_jpeg(self):
+        self.assertEqual(uploads.sniff_image(image_bytes('PNG')), ('PNG', 40, 30))
+        self.assertEqual(uploads.sniff_image(image_bytes('JPEG')), ('JPEG', 40, 30))
+
+    def test_frame_header_behind_large_exif(self):
+        jpeg = with_exif(image_bytes('JPEG', (640, 480)))
+        self.assertGreater(jpeg.index(b'\xff\xc0'), 4 * 65000)
+        self.assertLess(jpeg.index(b'\xff\xc0'), uploads.HEADER_WINDOW)
+        self.assertEqual(uploads.sniff_image(jpeg), ('JPEG', 640, 480))
+        # Still inside the EXIF: more bytes are needed
+        self.assertIsNone(uploads.sniff_image(jpeg[:100000]))
+
+    def test_truncated_headers_need_more_bytes(self):
+        png, jpeg = image_bytes('PNG'), image_bytes('JPEG')
+        for header in (png[:4], png[:20], jpeg[:2], jpeg[:7], jpeg[:20]):
+            self.assertIsNone(uploads.sniff_image(header), header)
+
+    def test_not_an_image(self):
+        for header in (
+            b'GIF89a\x01\x00\x01\x00', b'%PDF-1.7\n', b'hello', image_bytes('BMP'),
+            b'\xff\xd8\xff\xd9' + bytes(8),             # JPEG that ends before a frame
+            b'\xff\xd8\x00\x10' + bytes(20),            # no marker after SOI
+            b'\x89PNG\r\n\x1a\n' + bytes(4) + b'IDAT' + bytes(8),
+        ):
+            with self.assertRaises(ValueError, msg=header[:12]):
+                uploads.sniff_image(header)
+
+
+class CappedImageUploadTests(TestCase):
+
+    def post(self, content, **extra):
+        request = RequestFactory().post('/photo/', {'photo': SimpleUploadedFile('photo.bin', content)}, **extra)
+        request._dont_enforce_csrf_checks = True
+        return photo_view(request)
+
+    def data(self, content):
+        return json.loads(self.post(content).content)
+
+    def test_valid_png_and_jpeg(self):
+        for image_format, content_type in (('PNG', 'image/png'), ('JPEG', 'image/jpeg')):
+            content = image_bytes(image_format)
+            response = self.post(content)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.content), {
+                'files': {'photo': [content_type, [40, 30], len(content)]}, 'errors': {},
+            })
+
+    def test_jpeg_with_large_exif(self):
+        content = with_exif(image_bytes('JPEG', (640, 480)))
+        self.assertEqual(self.data(content)['files'], {'photo': ['image/jpeg', [640, 480], len(content)]})
+
+    def test_truncated_and_non_image_uploads_are_skipped(self):
+        for content, error in (
+            (image_bytes('PNG')[:12], "The photo's image header could not be read."),
+            (b'', "The photo's image header could not be read."),
+            (b'GIF89a' + bytes(100), "The photo must be a JPEG or PNG image."),
+            (b'<?php echo 1; ?>', "The photo must be a JPEG or PNG image."),
+        ):
+            with self.subTest(content=content[:8]):
+                self.assertEqual(self.data(content), {'files': {}, 'errors': {'photo': error}})
+
+    def test_oversized_dimensions(self):
+        content = png_header(uploads.MAX_SIDE + 1, 10) + bytes(100)
+        data = self.data(content)
+        self.assertEqual(data['files'], {})
+        self.assertIn(f'{uploads.MAX_SIDE + 1}×10 pixels', data['errors']['photo'])
+        side = int(uploads.MAX_PIXELS ** 0.5) + 1
+        self.assertIn('photo', self.data(png_header(side, side))['errors'])
+
+    def test_oversized_request_refused_before_reading(self):
+        response = self.post(image_bytes('PNG'), CONTENT_LENGTH=str(uploads.MAX_REQUEST_BYTES + 1))
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('too large', response.content.decode())
+
+
+class SearchIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.session = Session.objects.create(
+            name='2025', status='Nomination Open',
+            start_nomination=now, end_nomination=now + timedelta(days=1),
+            start_voting=now + timedelta(days=2), end_voting=now + timedelta(days=3),
+        )
+
+    def add_nominee(self, name):
+        return Nomination.objects.create(
+            session=self.session, full_name=name, email=f'{name.split()[0].lower()}@example.com',
+            gender='Male', designation='Officer', workplace_address='Dhaka',
+        )
+
+    def names(self, query):
+        return [hit['full_name'] for hit in search.search(query, 'nomination')]
+
+    def test_saves_are_indexed(self):
+        nominee = self.add_nominee('Rahim Uddin')
+        self.assertEqual(self.names('rah'), ['Rahim Uddin'])
+        nominee.full_name, nominee.email = 'Karim Uddin', 'karim@example.com'
+        nominee.save()
+        self.assertEqual(self.names('rah'), [])
+        self.assertEqual(self.names('kar'), ['Karim Uddin'])
+        nominee.delete()
+        self.assertEqual(self.names('udd'), [])
+
+    def test_saves_during_a_rebuild_survive_the_swap(self):
+        first, second, third = [self.add_nominee(name) for name in ('Rahim Uddin', 'Karim Hossain', 'Jalal Ahmed')]
+        index_batch = search._index_batch
+        edits = []
+
+        def index_batch_then_save(cursor, kind, model, after, chunk_size):
+            result = index_batch(cursor, kind, model, after, chunk_size)
+            if kind == 'nomination' and not edits:
+                # Between batches: one row already copied, one still to come
+                first.full_name = 'Rahima Begum'
+                first.save()
+                third.delete()
+                edits.append(self.add_nominee('Nasrin Akter'))
+            return result
+
+        with mock.patch.object(search, '_index_batch', index_batch_then_save):
+            counts = search.rebuild(chunk_size=1)
+        self.assertEqual(counts['nomination'], 3)   # second and the new one; first before the edit
+        self.assertEqual(self.names('beg'), ['Rahima Begum'])
+        self.assertEqual(self.names('rahim'), ['Rahima Begum'])
+        self.assertEqual(self.names('kar'), ['Karim Hossain'])
+        self.assertEqual(self.names('jal'), [])
+        self.assertEqual(self.names('nas'), ['Nasrin Akter'])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM election_search WHERE kind = 'nomination'")
+            self.assertEqual(cursor.fetchone()[0], 3)
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        patcher = mock.patch.object(archive, 'ARCHIVE_ROOT', archive.Path(root))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        now = timezone.now()
+        self.session = Session.objects.create(
+            name='2024', status='Closed',
+            start_nomination=now - timedelta(days=3), end_nomination=now - timedelta(days=2),
+            start_voting=now - timedelta(days=1), end_voting=now,
+        )
+        self.shared = Position.objects.create(name='President', order=1)
+        self.ranked = Position.objects.create(session=self.session, name='Council', order=2, counting_method='stv', seats=2)
+        EligibleMember.objects.create(session=self.session, email='Voter@Example.com', member_id='M-1')
+        nominee = Nomination.objects.create(
+            session=self.session, full_name='Rahim Uddin', email='rahim@example.com', gender='Male',
+            designation='Officer', workplace_address='Dhaka', desired_position=self.shared, approved=True,
+        )
+        voter = Voter.objects.create(
+            session=self.session, full_name='Karim', email='voter@example.com', gender='Female',
+            designation='Nurse', workplace_address='Khulna', voted_at=now,
+        )
+        Vote.objects.create(session=self.session, voter=voter, position=self.shared, nominee=nominee)
+        TurnoutBucket.objects.get_or_create(
+            session=self.session, position=self.shared, granularity='hour', bucket_start=now.replace(minute=0),
+        )
+        ResultCubeCell.objects.get_or_create(
+            session=self.session, position=self.shared, nominee=nominee, gender='Female', designation='Nurse',
+        )
+        DedupeKey.objects.create(session=self.session, kind='voter', object_id=voter.id, key='n:K650')
+        DuplicateCandidate.objects.create(session=self.session, kind='voter', first_id=1, second_id=voter.id, score=0.9)
+        OutboxMessage.objects.create(session=self.session, kind='ballot', to=voter.email, subject='Thanks', body='')
+
+    def records(self, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as fh:
+            return [json.loads(line) for line in fh]
+
+    def test_archive_has_shared_positions_and_the_roll(self):
+        path, _ = archive.write_archive(self.session)
+        self.assertTrue(archive.verify_archive(path))
+        records = self.records(path)
+        positions = {r['fields']['name']: r['fields'] for r in records if r['type'] == 'position'}
+        self.assertEqual(positions['President']['session_id'], None)
+        self.assertEqual((positions['Council']['counting_method'], positions['Council']['seats']), ('stv', 2))
+        eligible = [r['fields'] for r in records if r['type'] == 'eligible']
+        self.assertEqual([(e['email'], e['member_id']) for e in eligible], [('voter@example.com', 'M-1')])
+        self.assertEqual(records[0]['counts']['eligible'], 1)
+
+    def test_purge_leaves_no_session_rows(self):
+        archive.write_archive(self.session)
+        deleted = archive.purge_session_rows(self.session, batch_size=1)
+        self.assertEqual(deleted['outbox message'], 1)
+        for model in archive.DERIVED + [EligibleMember, Nomination, Voter, Vote]:
+            self.assertFalse(model.objects.filter(session=self.session).exists(), model.__name__)
+        self.assertEqual(Position.objects.for_session(self.session).count(), 2)
+
+    def test_unreadable_file_is_listed_not_fatal(self):
+        path, _ = archive.write_archive(self.session)
+        (archive.ARCHIVE_ROOT / 'session-9-truncated.jsonl.gz').write_bytes(path.read_bytes()[:40])
+        (archive.ARCHIVE_ROOT / 'foreign.jsonl.gz').write_bytes(gzip.compress(b'{"type": "other"}\n'))
+        (archive.ARCHIVE_ROOT / 'plain.jsonl.gz').write_bytes(b'not gzip at all')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get(reverse('admin_archives'))
+        self.assertEqual(response.status_code, 200)
+        archives = {a['name']: a for a in response.context['archives']}
+        self.assertIn('header', archives[path.name])
+        for name in ('session-9-truncated.jsonl.gz', 'foreign.jsonl.gz', 'plain.jsonl.gz'):
+            self.assertIn('error', archives[name], name)
+        self.assertContains(response, 'Unreadable')
+        detail = reverse('admin_archive_detail', args=['plain.jsonl.gz'])
+        self.assertEqual(self.client.get(detail).status_code, 404)
+
+
+def create_election(status='Voting Open', name='2025', candidates=2):
+    """A session with one position and its approved candidates."""
+    now = timezone.now()
+    session = Session.objects.create(
+        name=name, status=status,
+        start_nomination=now - timedelta(days=3), end_nomination=now - timedelta(days=2),
+        start_voting=now - timedelta(days=1), end_voting=now + timedelta(days=1),
+    )
+    position = Position.objects.create(session=session, name='President', order=1)
+    nominees = [
+        Nomination.objects.create(
+            session=session, full_name=f'Candidate {i}', email=f'candidate{i}@example.com', gender='Male',
+            designation='Officer', workplace_address='Dhaka', desired_position=position, approved=True,
+        )
+        for i in range(candidates)
+    ]
+    return session, position, nominees
+
+
+def create_voter(session, email, **fields):
+    defaults = {'full_name': 'Voter', 'gender': 'Female', 'designation': 'Nurse', 'workplace_address': 'Khulna'}
+    return Voter.objects.create(session=session, email=email, **{**defaults, **fields})
+
+
+class LedgerTests(TestCase):
+
+    def setUp(self):
+        self.session, self.position, self.nominees = create_election()
+        self.votes = [
+            Vote.objects.create(
+                session=self.session, voter=create_voter(self.session, f'voter{i}@example.com'),
+                position=self.position, nominee=self.nominees[i % 2],
+            )
+            for i in range(5)
+        ]
+
+    def problems(self, **options):
+        return [p['problem'] for p in ledger.verify(self.session, **options)['problems']]
+
+    def test_every_vote_is_chained(self):
+        report = ledger.verify(self.session, checkpoint=False)
+        self.assertTrue(report['ok'])
+        self.assertEqual(report['entries_checked'], 5)
+        entries = list(LedgerEntry.objects.filter(session=self.session).order_by('seq'))
+        self.assertEqual([e.seq for e in entries], [1, 2, 3, 4, 5])
+        self.assertEqual(entries[0].prev_hash, ledger.GENESIS)
+        self.assertEqual([e.prev_hash for e in entries[1:]], [e.hash for e in entries[:-1]])
+
+    def test_edited_entry_is_caught(self):
+        LedgerEntry.objects.filter(session=self.session, seq=3).update(nominee_id=self.nominees[1].id)
+        self.assertIn('entry_modified', self.problems())
+
+    def test_rehashed_entry_breaks_the_chain(self):
+        # Someone without SECRET_KEY can only rewrite the hash with a plain digest
+        entry = LedgerEntry.objects.get(session=self.session, seq=2)
+        LedgerEntry.objects.filter(pk=entry.pk).update(hash='f' * 64)
+        self.assertEqual(self.problems(), ['entry_modified', 'broken_chain'])
+
+    def test_edited_deleted_and_unrecorded_votes_are_caught(self):
+        Vote.objects.filter(pk=self.votes[0].pk).update(nominee=self.nominees[1])
+        Vote.objects.filter(pk=self.votes[1].pk).delete()
+        LedgerEntry.objects.filter(session=self.session, seq=5).delete()
+        self.assertEqual(self.problems(), ['vote_modified', 'vote_deleted', 'vote_not_in_ledger'])
+
+    def test_missing_entry_is_caught(self):
+        LedgerEntry.objects.filter(session=self.session, seq=2).delete()
+        self.assertIn('missing_entries', self.problems())
+
+    def test_checkpoints_seal_clean_windows(self):
+        with mock.patch.object(ledger, 'CHECKPOINT_EVERY', 2):
+            report = ledger.verify(self.session)
+            self.assertEqual(report['checkpoints_created'], 2)
+            checkpoints = list(LedgerCheckpoint.objects.filter(session=self.session).order_by('seq'))
+            self.assertEqual([(c.seq, c.entries) for c in checkpoints], [(2, 2), (4, 2)])
+
+            report = ledger.verify(self.session, incremental=True)
+            self.assertEqual((report['from_seq'], report['entries_checked'], report['ok']), (4, 1, True))
+
+            LedgerCheckpoint.objects.filter(pk=checkpoints[0].pk).update(merkle_root='0' * 64)
+            self.assertEqual(self.problems(), ['checkpoint_mismatch'])
+            # An incremental run trusts the last checkpoint and does not see the edit
+            self.assertEqual(self.problems(incremental=True), [])
+
+    def test_merkle_root(self):
+        def reference(leaves):
+            if len(leaves) == 1:
+                return leaves[0]
+            split = 1
+            while split * 2 < len(leaves):
+                split *= 2
+            return hashlib.sha256(reference(leaves[:split]) + reference(leaves[split:])).digest()
+
+        self.assertEqual(ledger.MerkleAccumulator().root(), ledger.GENESIS)
+        for count in range(1, 10):
+            leaves = [hashlib.sha256(str(i).encode()).digest() for i in range(count)]
+            accumulator = ledger.MerkleAccumulator()
+            for leaf in leaves:
+                accumulator.add(leaf.hex())
+            self.assertEqual(accumulator.root(), reference(leaves).hex(), count)
+
+
+class ReceiptTests(TestCase):
+
+    def setUp(self):
+        self.session, self.position, self.nominees = create_election()
+        self.voter = create_voter(self.session, 'voter@example.com')
+        Vote.objects.create(session=self.session, voter=self.voter, position=self.position, nominee=self.nominees[1])
+
+    def test_issue_and_lookup(self):
+        code = receipts.issue_receipt(self.session, self.voter)
+        self.assertRegex(code, r'^[0-9A-HJKMNP-TV-Z]{5}-[0-9A-HJKMNP-TV-Z]{5}$')
+        # Only the keyed hash is stored
+        receipt = BallotReceipt.objects.get(voter=self.voter)
+        self.assertEqual(receipt.code_hash, receipts.hash_code(code))
+        self.assertNotIn(code.replace('-', ''), receipt.code_hash.upper())
+
+        summary = receipts.lookup(code)
+        self.assertEqual(summary['session'], '2025')
+        self.assertEqual(
+            [(c['position'], c['candidate']) for c in summary['choices']], [('President', 'Candidate 1')],
+        )
+        # Read back as typed: lower case, spaces, no dash
+        self.assertEqual(receipts.lookup(' ' + code.lower().replace('-', ' ')), summary)
+        self.assertIsNone(receipts.issue_receipt(self.session, self.voter))
+
+    def test_normalize_code(self):
+        self.assertEqual(receipts.normalize_code('k7qm2-x9d4t'), 'K7QM2X9D4T')
+        # Letters that read like digits are the digits they look like
+        self.assertEqual(receipts.normalize_code('IL0O1-abcde'), '11001ABCDE')
+        self.assertEqual(receipts.normalize_code(None), '')
+
+    def test_unknown_and_malformed_codes(self):
+        receipts.issue_receipt(self.session, self.voter)
+        self.assertIsNone(receipts.lookup('00000-00000'))
+        self.assertIsNone(receipts.lookup('ABC'))
+        self.assertIsNone(receipts.lookup(''))
+
+    def test_receipt_page(self):
+        code = receipts.issue_receipt(self.session, self.voter)
+        response = self.client.get(reverse('receipt_lookup'), {'code': code.lower()})
+        self.assertRedirects(response, reverse('receipt', args=[code.replace('-', '')]))
+        response = self.client.get(reverse('receipt', args=[code.replace('-', '')]))
+        self.assertContains(response, 'Candidate 1')
+        self.assertEqual(self.client.get(reverse('receipt', args=['ZZZZZZZZZZ'])).context['summary'], None)
+
+
+class BallotTokenTests(TestCase):
+
+    def setUp(self):
+        self.session, self.position, self.nominees = create_election()
+        self.voter = create_voter(self.session, 'voter@example.com', last_training_date=date(2023, 5, 1))
+
+    def request_with(self, session, value):
+        request = RequestFactory().get('/voting/')
+        request.COOKIES[tokens.cookie_name(session)] = value
+        return request
+
+    def issued(self, session=None, voted=()):
+        response = tokens.write_token(HttpResponse(), session or self.session, tokens.BallotToken.for_voter(self.voter, voted))
+        return response.cookies[tokens.cookie_name(session or self.session)]
+
+    def test_round_trip(self):
+        cookie = self.issued(voted=[self.position.id])
+        self.assertTrue(cookie['httponly'])
+        token = tokens.read_token(self.request_with(self.session, cookie.value), self.session)
+        self.assertEqual((token.session_id, token.voter_id), (self.session.id, self.voter.id))
+        self.assertTrue(token.has_voted(str(self.position.id)))
+        voter = token.voter()
+        self.assertEqual((voter.pk, voter.full_name, voter.last_training_date), (self.voter.pk, 'Voter', date(2023, 5, 1)))
+
+    def test_tampered_and_forged_tokens_are_rejected(self):
+        value = self.issued().value
+        payload, _, signature = value.rpartition(':')
+        tampered = payload + ':' + ('A' if signature[0] != 'A' else 'B') + signature[1:]
+        forged = signing.dumps(
+            {'s': self.session.id, 'v': self.voter.id, 'p': {}, 'd': []}, key='not-the-secret-key', salt=tokens.SALT,
+        )
+        other_salt = signing.dumps({'s': self.session.id, 'v': self.voter.id, 'p': {}, 'd': []}, salt='other')
+        for bad in (tampered, forged, other_salt, 'garbage', ''):
+            self.assertIsNone(tokens.read_token(self.request_with(self.session, bad), self.session), bad)
+
+    def test_token_of_another_session_is_rejected(self):
+        other, _, _ = create_election(name='2026')
+        value = self.issued().value
+        # Copied into the other session's cookie, it still names the first session
+        self.assertIsNone(tokens.read_token(self.request_with(other, value), other))
+
+    def test_expired_token_is_rejected(self):
+        value = self.issued().value
+        later = time.time() + tokens.MAX_AGE + 1
+        with mock.patch('django.core.signing.time.time', return_value=later):
+            self.assertIsNone(tokens.read_token(self.request_with(self.session, value), self.session))
+        self.assertIsNotNone(tokens.read_token(self.request_with(self.session, value), self.session))
+
+
+class BackupTests(TransactionTestCase):
+    """Online backups read the database through their own connection, so the rows must be committed."""
+
+    def setUp(self):
+        self.directory = archive.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        # verify_backup opens the restored copy under its own alias for the length of the check
+        patcher = mock.patch.object(BackupTests, 'databases', {'default', backup.VERIFY_ALIAS})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.session, position, nominees = create_election()
+        for i in range(3):
+            voter = create_voter(self.session, f'voter{i}@example.com')
+            Vote.objects.create(session=self.session, voter=voter, position=position, nominee=nominees[i % 2])
+
+    def test_backup_restores_and_recounts(self):
+        info = backup.backup_database(self.directory, pages=1, sleep=0)
+        self.assertTrue(info['path'].name.startswith(backup.BACKUP_PREFIX))
+        self.assertGreater(info['steps'], 1)
+        self.assertEqual(backup.checksum_path(info['path']).read_text().split(), [info['sha256'], info['path'].name])
+
+        report = backup.verify_backup(info['path'])
+        self.assertEqual((report['checksum'], report['integrity'], report['ok']), ('ok', 'ok', True))
+        self.assertEqual([(s['name'], s['ballots'], s['ok']) for s in report['sessions']], [('2025', 3, True)])
+
+    def test_missing_checksum_fails(self):
+        info = backup.backup_database(self.directory, sleep=0)
+        backup.checksum_path(info['path']).unlink()
+        report = backup.verify_backup(info['path'])
+        self.assertEqual((report['checksum'], report['integrity'], report['ok']), ('missing', 'ok', False))
+
+    def test_corrupted_backup_fails(self):
+        info = backup.backup_database(self.directory, sleep=0)
+        data = bytearray(info['path'].read_bytes())
+        data[len(data) // 2] ^= 0xFF
+        info['path'].write_bytes(bytes(data))
+        report = backup.verify_backup(info['path'])
+        self.assertEqual((report['checksum'], report['integrity'], report['ok']), ('mismatch', None, False))
+
+    def test_rotate_keeps_the_newest(self):
+        paths = [backup.backup_database(self.directory, sleep=0)['path'] for _ in range(3)]
+        self.assertEqual(backup.rotate(1, self.directory), paths[1::-1])
+        self.assertEqual(backup.list_backups(self.directory), [paths[2]])
+        self.assertFalse(backup.checksum_path(paths[0]).exists())
+
+
+class RecountTests(TestCase):
+
+    def setUp(self):
+        self.session, self.position, self.nominees = create_election(status='Closed')
+        self.votes = [
+            Vote.objects.create(
+                session=self.session, voter=create_voter(self.session, f'voter{i}@example.com'),
+                position=self.position, nominee=self.nominees[0 if i < 3 else 1],
+            )
+            for i in range(5)
+        ]
+        stats.rebuild(self.session)
+
+    def sources(self, report):
+        return sorted({d['source'] for d in report['discrepancies']})
+
+    def test_clean_recount(self):
+        freeze_results(self.session)
+        report = recount.recount(self.session, workers=1)
+        self.assertTrue(report['ok'], report['discrepancies'])
+        self.assertTrue(report['ledger_compared'] and report['snapshot_compared'] and report['dashboard_compared'])
+        self.assertEqual(report['positions'][0]['counts'], {str(self.nominees[0].id): 3, str(self.nominees[1].id): 2})
+
+    def test_edited_vote_disagrees_with_every_record(self):
+        freeze_results(self.session)
+        # A direct edit skips the signals that keep the ledger and dashboard in step
+        Vote.objects.filter(pk=self.votes[0].pk).update(nominee=self.nominees[1])
+        report = recount.recount(self.session, workers=1)
+        self.assertFalse(report['ok'])
+        self.assertEqual(self.sources(report), ['dashboard', 'ledger', 'published'])
+        ledger_diff = [d for d in report['discrepancies'] if d['source'] == 'ledger']
+        self.assertEqual(
+            [(d['nominee_id'], d['expected'], d['recounted']) for d in ledger_diff],
+            [(self.nominees[0].id, 3, 2), (self.nominees[1].id, 2, 3)],
+        )
+
+    def test_deleted_vote_is_caught_by_the_ledger(self):
+        Vote.objects.filter(pk=self.votes[-1].pk).delete()
+        report = recount.recount(self.session, workers=1)
+        self.assertIn('ledger', self.sources(report))
+        self.assertFalse(report['snapshot_compared'])
+
+
+class AdmissionTests(TestCase):
+
+    def setUp(self):
+        admission.cache.clear()
+        for name, value in (('GLOBAL', 2), ('ACQUIRE_WAIT', 0), ('ENABLED', True)):
+            patcher = mock.patch.object(admission, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.view = admission.admission_control(lambda request: HttpResponse('Recorded'))
+
+    def post(self, cookies=None):
+        request = RequestFactory().post('/voting/', {'position': '1', 'nominee': '2'})
+        request.COOKIES.update(cookies or {})
+        return self.view(request)
+
+    def test_global_slots(self):
+        slots = [admission.acquire(), admission.acquire()]
+        self.assertNotIn(None, slots)
+        self.assertIsNone(admission.acquire())
+        self.assertEqual(admission.stats()['global_in_flight'], 2)
+        admission.release(slots[0])
+        slot = admission.acquire()
+        self.assertIsNotNone(slot)
+        for held in (slot, slots[1]):
+            admission.release(held)
+        self.assertEqual(admission.stats()['global_in_flight'], 0)
+
+    def test_expired_slot_is_not_freed_for_its_new_holder(self):
+        index, token = admission.acquire()
+        # The slot expired and another request took it
+        admission.cache.set(admission._slot_key(index), token + 1, admission.SLOT_TTL)
+        admission.release((index, token))
+        self.assertEqual(admission.cache.get(admission._slot_key(index)), token + 1)
+
+    def test_full_site_gets_the_waiting_page(self):
+        held = [admission.acquire(), admission.acquire()]
+        response = self.post()
+        self.assertEqual(response.status_code, 503)
+        self.assertTrue(1 <= int(response['Retry-After']) <= admission.RETRY_MAX + 2)
+        # The ballot is carried on the page and re-posted automatically
+        self.assertIn(b'name="nominee"', response.content)
+        ticket = response.cookies[admission.TICKET_COOKIE].value
+        self.assertEqual(admission.stats()['queue_depth'], 1)
+
+        # Still waiting: same ticket, no new place in the queue
+        again = self.post({admission.TICKET_COOKIE: ticket})
+        self.assertEqual(again.status_code, 503)
+        self.assertEqual(admission.cache.get('election:admission:tickets'), 1)
+
+        for slot in held:
+            admission.release(slot)
+        admitted = self.post({admission.TICKET_COOKIE: ticket})
+        self.assertEqual(admitted.content, b'Recorded')
+        self.assertEqual(admitted.cookies[admission.TICKET_COOKIE].value, '')
+        self.assertEqual(admission.cache.get('election:admission:admitted'), 1)
+
+    def test_get_is_never_queued(self):
+        held = [admission.acquire(), admission.acquire()]
+        self.addCleanup(lambda: [admission.release(slot) for slot in held])
+        self.assertEqual(self.view(RequestFactory().get('/voting/')).status_code, 200)
+
+    def test_retry_is_exempt_once_and_not_early(self):
+        held = [admission.acquire(), admission.acquire()]
+        self.addCleanup(lambda: [admission.release(slot) for slot in held])
+        cookie = self.post().cookies[admission.TICKET_COOKIE].value
+        request = RequestFactory().post('/voting/')
+        request.COOKIES[admission.TICKET_COOKIE] = cookie
+        self.assertFalse(admission.is_retry(request))
+        with mock.patch('election.admission.time.time', return_value=time.time() + admission.RETRY_MAX + 5):
+            self.assertTrue(admission.is_retry(request))
+            self.assertFalse(admission.is_retry(request))
+
+
+class OutboxTests(TestCase):
+
+    class Connection:
+        """Mail connection that refuses ``refused`` addresses, or everything when ``down``."""
+
+        def __init__(self, refused=(), down=False):
+            self.refused, self.down, self.sent = set(refused), down, []
+
+        def open(self):
+            if self.down:
+                raise ConnectionRefusedError('no SMTP server')
+
+        def close(self):
+            pass
+
+        def send_messages(self, messages):
+            for message in messages:
+                if set(message.to) & self.refused:
+                    raise OSError('mailbox unavailable')
+                self.sent.append(message)
+            return len(messages)
+
+    def setUp(self):
+        self.session, _, _ = create_election()
+
+    def message(self, to='voter@example.com', **fields):
+        return OutboxMessage.objects.create(session=self.session, kind='ballot', to=to, subject='Recorded', body='x', **fields)
+
+    def test_claim_leases_due_messages(self):
+        due = self.message()
+        self.message(next_attempt_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual([m.pk for m in outbox.claim()], [due.pk])
+        self.assertEqual(outbox.claim(), [])
+        due.refresh_from_db()
+        self.assertGreater(due.next_attempt_at, timezone.now() + outbox.LEASE - timedelta(seconds=5))
+
+    def test_sent_retried_and_failed(self):
+        good, bad = self.message(), self.message(to='bad@example.com')
+        last_try = self.message(to='bad@example.com', attempts=outbox.MAX_ATTEMPTS - 1)
+        connection = self.Connection(refused=['bad@example.com'])
+        before = timezone.now()
+        self.assertEqual(outbox.deliver(outbox.claim(), connection), (1, 1, 1))
+        self.assertEqual([m.to for m in connection.sent], [['voter@example.com']])
+
+        good.refresh_from_db(), bad.refresh_from_db(), last_try.refresh_from_db()
+        self.assertEqual((good.status, good.attempts, good.last_error), ('sent', 1, ''))
+        self.assertEqual((bad.status, bad.attempts), ('pending', 1))
+        self.assertIn('mailbox unavailable', bad.last_error)
+        delay = (bad.next_attempt_at - before).total_seconds()
+        self.assertTrue(0.8 * outbox.BACKOFF_BASE <= delay <= 1.2 * outbox.BACKOFF_BASE + 1, delay)
+        self.assertEqual((last_try.status, last_try.attempts), ('failed', outbox.MAX_ATTEMPTS))
+
+    def test_unreachable_server_retries_the_batch(self):
+        messages = [self.message(), self.message()]
+        self.assertEqual(outbox.deliver(outbox.claim(), self.Connection(down=True)), (0, 2, 0))
+        for message in messages:
+            message.refresh_from_db()
+            self.assertEqual((message.status, message.attempts), ('pending', 1))
+            self.assertIn('ConnectionRefusedError', message.last_error)
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        with mock.patch('election.outbox.random.uniform', return_value=1):
+            delays = [outbox.backoff(attempt).total_seconds() for attempt in range(1, 5)]
+            self.assertEqual(delays, [30, 60, 120, 240])
+            self.assertEqual(outbox.backoff(30).total_seconds(), outbox.BACKOFF_MAX)
+
+    def test_send_pending(self):
+        for i in range(3):
+            self.message(to=f'voter{i}@example.com')
+        self.assertEqual(outbox.send_pending(batch_size=2), (3, 0, 0))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f'voter{i}@example.com' for i in range(3)])
+
+
+class EligibilityTests(TestCase):
+
+    def setUp(self):
+        self.session, _, _ = create_election()
+        self.other, _, _ = create_election(name='2026')
+
+    def test_empty_roll_is_open(self):
+        self.assertTrue(eligibility.is_eligible(self.session, email='anyone@example.com'))
+
+    def test_roll_is_checked_normalised(self):
+        EligibleMember.objects.create(session=self.session, email=' Member@Example.COM ', member_id=' m-7 ')
+        self.assertTrue(eligibility.is_eligible(self.session, email='member@example.com'))
+        self.assertTrue(eligibility.is_eligible(self.session, email='MEMBER@example.com '))
+        self.assertTrue(eligibility.is_eligible(self.session, member_id='M-7'))
+        self.assertFalse(eligibility.is_eligible(self.session, email='stranger@example.com'))
+        self.assertFalse(eligibility.is_eligible(self.session))
+        # Another session's roll is its own
+        self.assertTrue(eligibility.is_eligible(self.other, email='stranger@example.com'))
+
+    def test_saves_and_deletes_invalidate_the_roll(self):
+        first = EligibleMember.objects.create(session=self.session, email='first@example.com')
+        self.assertFalse(eligibility.is_eligible(self.session, email='second@example.com'))
+        with self.assertNumQueries(0):
+            eligibility.is_eligible(self.session, email='second@example.com')
+        EligibleMember.objects.create(session=self.session, email='second@example.com')
+        self.assertTrue(eligibility.is_eligible(self.session, email='second@example.com'))
+        first.delete()
+        self.assertFalse(eligibility.is_eligible(self.session, email='first@example.com'))
+
+    def test_other_workers_reload_on_a_new_version(self):
+        EligibleMember.objects.create(session=self.session, email='first@example.com')
+        self.assertFalse(eligibility.is_eligible(self.session, email='bulk@example.com'))
+        # A bulk import skips the signals; the importer bumps the shared version
+        EligibleMember.objects.bulk_create([EligibleMember(session=self.session, email='bulk@example.com')])
+        self.assertFalse(eligibility.is_eligible(self.session, email='bulk@example.com'))
+        cache.incr(eligibility._version_key(self.session.id))
+        self.assertTrue(eligibility.is_eligible(self.session, email='bulk@example.com'))
+
+
+class BreakdownTests(TestCase):
+
+    def setUp(self):
+        self.session, self.position, _ = create_election()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def test_bad_filter_is_a_400(self):
+        params = {'session': self.session.id, 'position': self.position.id, 'training_year': 'abc'}
+        response = self.client.get(reverse('admin_breakdown'), params)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('training_year', str(list(response.context['messages'])[0]))
+        self.assertEqual(self.client.get(reverse('admin_breakdown_api'), params).status_code, 400)
+
+        params['training_year'] = '2023'
+        self.assertEqual(self.client.get(reverse('admin_breakdown'), params).status_code, 200)
@@ -0,0 +1,279 @@
+"""
+Token-bucket rate limiting for the public endpoints.
+
+Every client gets a bucket per rule that holds up to ``burst`` tokens and
+refills at ``per_minute`` tokens a minute; a request takes one token or is
+refused with 429 and a Retry-After of the time until the next token. Rules
+are keyed by URL name (the ``session_`` scoped variants share the rule and
+buckets of their unscoped name) and have two scopes:
+
+* ``ip``: checked by ``RateLimitMiddleware`` before the view runs and
+  before anything reads the request body;
+* ``email``: checked by the view through ``email_throttled`` once the
+  submitted address has been validated.
+
+Buckets live in the shared ``throttle`` cache so every worker sees the same
+counts. A bucket is two integers updated with atomic ``incr``: the tokens
+taken, and the time (in ms) refilling is counted from. Tokens earned beyond
+``burst`` are forfeited by moving that time forward, and refused requests
+hand their token back. When the shared cache fails, or with
+``ELECTION_RATE_LIMIT_SHARED = False``, each worker keeps its own buckets in
+memory instead.
+
+Settings::
+
+    ELECTION_RATE_LIMITS = {
+        # URL name: {'ip'/'email': (burst, tokens per minute), 'methods': [...]}
+        'voting': {'methods': ['POST'], 'ip': (120, 60), 'email': (30, 20)},
+    }
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.utils import timezone
+
+from . import admission
+from .sqlite_cache import named_cache
+
+
+logger = logging.getLogger(__name__)
+
+RULES = getattr(settings, 'ELECTION_RATE_LIMITS', {})
+SHARED = getattr(settings, 'ELECTION_RATE_LIMIT_SHARED', True)
+# Header carrying the client address when behind a proxy, e.g. 'HTTP_X_REAL_IP'
+CLIENT_IP_HEADER = getattr(settings, 'ELECTION_CLIENT_IP_HEADER', None)
+
+BUCKET_TTL = 3600   # seconds; an idle bucket is forgotten (i.e. full again) after this
+LOG_SIZE = 100
+
+# Shared across worker processes (see sqlite_cache)
+cache = named_cache('throttle')
+
+
+# --- Rules ---
+def rule_for(request):
+    """(rule name, rule) for the request's URL, or (None, None)."""
+    match = getattr(request, 'resolver_match', None)
+    name = match.url_name if match else None
+    if not name:
+        return None, None
+    for candidate in (name, name.removeprefix('session_')):
+        rule = RULES.get(candidate)
+        if rule is not None:
+            methods = rule.get('methods')
+            if methods and request.method not in methods:
+                return None, None
+            return candidate, rule
+    return None, None
+
+
+def client_ip(request):
+    if CLIENT_IP_HEADER and request.META.get(CLIENT_IP_HEADER):
+        return request.META[CLIENT_IP_HEADER].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _bucket_key(rule_name, scope, client):
+    digest = hashlib.sha256(client.lower().encode()).hexdigest()[:16]
+    return f'election:throttle:{rule_name}:{scope}:{digest}'
+
+
+# --- Buckets ---
+def _take_shared(key, burst, per_minute):
+    rate = per_minute / 60000  # tokens per ms
+    now = time.time_ns() // 1_000_000
+    used_key, base_key = f'{key}:used', f'{key}:base'
+    ttl = max(BUCKET_TTL, math.ceil(2 * 60 * burst / per_minute))
+    try:
+        used = cache.incr(used_key)
+    except ValueError:
+        cache.add(base_key, now, ttl)
+        cache.add(used_key, 0, ttl)
+        used = cache.incr(used_key)
+    base = cache.get(base_key, now)
+
+    earned = (now - base) * rate
+    if earned > used - 1:
+        # The bucket was already full before this request
+        advance = int((earned - (used - 1)) / rate)
+        if advance:
+            try:
+                cache.incr(base_key, advance)
+            except ValueError:
+                pass
+        earned = used - 1
+    if used <= burst + earned:
+        return 0
+    cache.decr(used_key)
+    return (used - burst - earned) / rate / 1000
+
+
+class LocalBuckets:
+    """In-process token buckets, least recently used evicted past ``size``."""
+
+    def __init__(self, size=10000):
+        self.size = size
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, burst, per_minute):
+        rate = per_minute / 60
+        now = time.monotonic()
+        with self.lock:
+            tokens, stamp = self.buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - stamp) * rate)
+            if tokens >= 1:
+                tokens, wait = tokens - 1, 0
+            else:
+                wait = (1 - tokens) / rate
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.size:
+                self.buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+local_buckets = LocalBuckets()
+
+
+def take(key, burst, per_minute):
+    """Seconds until ``key`` may try again; 0 when the request is allowed."""
+    if SHARED:
+        try:
+            return _take_shared(key, burst, per_minute)
+        except Exception:
+            logger.warning('Shared rate limit cache failed; using in-process buckets', exc_info=True)
+    return local_buckets.take(key, burst, per_minute)
+
+
+# --- Checks ---
+def check(request, scope, client):
+    """A 429 response when ``client`` is out of tokens for the request's rule, else None."""
+    rule_name, rule = rule_for(request)
+    if not rule or scope not in rule or not client:
+        return None
+    burst, per_minute = rule[scope]
+    key = _bucket_key(rule_name, scope, client)
+    wait = take(key, burst, per_minute)
+    if not wait:
+        return None
+    retry_after = max(1, math.ceil(wait))
+    _note(key, rule_name, scope, client, retry_after)
+    return throttled_response(request, retry_after)
+
+
+def email_throttled(request, email):
+    """Per-address check for views, once ``email`` has been validated."""
+    return check(request, 'email', (email or '').strip().lower())
+
+
+def throttled_response(request, retry_after):
+    if request.resolver_match.url_name.endswith('_api'):
+        response = JsonResponse({'error': 'Too many requests', 'retry_after': retry_after}, status=429)
+    else:
+        response = render(request, 'election/throttled.html', {'retry_after': retry_after}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+class RateLimitMiddleware:
+    """Applies the ``ip`` scope of ``ELECTION_RATE_LIMITS`` before the view (and CSRF) run."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # The waiting page's automatic re-post was already counted when it was first sent
+        if getattr(view_func, 'admission_controlled', False) and admission.is_retry(request):
+            return None
+        return check(request, 'ip', client_ip(request))
+
+
+# --- Panel ---
+def _minute_key(moment=None):
+    return f'election:throttle:refused:{(moment or timezone.now()).strftime("%Y%m%d%H%M")}'
+
+
+def _count(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def _note(key, rule_name, scope, client, retry_after):
+    """Count the refusal and log the client, at most once a minute per bucket."""
+    try:
+        _count(_minute_key(), 600)
+        refused = _count(f'{key}:refused', BUCKET_TTL)
+        if not cache.add(f'{key}:noted', 1, 60):
+            return
+        log = [entry for entry in cache.get('election:throttle:log', []) if entry['key'] != key]
+        log.insert(0, {
+            'key': key,
+            'rule': rule_name,
+            'scope': scope,
+            'client': client,
+            'at': timezone.now(),
+            'retry_after': retry_after,
+            'refused': refused,
+        })
+        cache.set('election:throttle:log', log[:LOG_SIZE], BUCKET_TTL)
+    except Exception:
+        logger.warning('Could not record a throttled request', exc_info=True)
+
+
+def stats():
+    """Rules, refusals over the last minutes and the recently throttled clients."""
+    log = cache.get('election:throttle:log', [])
+    counts = cache.get_many([f"{entry['key']}:refused" for entry in log])
+    now = timezone.now()
+    minutes = [now - timedelta(minutes=m) for m in range(10)]
+    return {
+        'shared': SHARED,
+        'rules': [
+            {
+                'name': name,
+                'methods': rule.get('methods') or ['any'],
+                'scopes': [(scope, rule[scope]) for scope in ('ip', 'email') if scope in rule],
+            }
+            for name, rule in RULES.items()
+        ],
+        'recent': [
+            {
+                'minute': timezone.localtime(m).strftime('%H:%M'),
+                'refused': cache.get(_minute_key(m)) or 0,
+            }
+            for m in minutes
+        ],
+        'clients': [
+            {**entry, 'refused': counts.get(f"{entry['key']}:refused", entry['refused'])}
+            for entry in log
+        ],
+    }
+
+
+def forgive(key):
+    """Refill a client's bucket and drop it from the log (e.g. a shared hospital address)."""
+    if not key.startswith('election:throttle:'):
+        return
+    cache.delete_many([f'{key}:used', f'{key}:base', f'{key}:refused', f'{key}:noted'])
+    log = cache.get('election:throttle:log', [])
+    cache.set('election:throttle:log', [entry for entry in log if entry['key'] != key], BUCKET_TTL)
+    local_buckets.buckets.pop(key, None)
@@ -0,0 +1,95 @@
+"""
+Signed ballot tokens.
+
+After the first step of the ballot the voter's identity travels in a signed,
+expiring cookie instead of an ``email`` query parameter. The token carries the
+voter id, the session id, a snapshot of the profile fields later steps need,
+and the positions already voted, so every following step authenticates and
+resumes without looking the voter up. The database's unique (voter, position)
+constraint stays the final guard against a stale token.
+"""
+from django.conf import settings
+from django.core import signing
+from django.utils.dateparse import parse_date
+
+from .models import Voter
+
+
+SALT = 'election.ballot'
+MAX_AGE = getattr(settings, 'ELECTION_BALLOT_TOKEN_AGE', 2 * 60 * 60)
+
+# Profile fields kept in the token (needed by the vote path's rollups)
+PROFILE_FIELDS = ('full_name', 'gender', 'designation', 'last_training_date')
+
+
+def cookie_name(session):
+    return f'ballot_{session.pk}'
+
+
+class BallotToken:
+    def __init__(self, session_id, voter_id, profile, voted=()):
+        self.session_id = session_id
+        self.voter_id = voter_id
+        self.profile = profile
+        self.voted = set(voted)
+
+    @classmethod
+    def for_voter(cls, voter, voted=()):
+        profile = {field: getattr(voter, field) for field in PROFILE_FIELDS}
+        if profile['last_training_date']:
+            profile['last_training_date'] = profile['last_training_date'].isoformat()
+        return cls(voter.session_id, voter.pk, profile, voted)
+
+    def voter(self):
+        """An unsaved stand-in for the Voter row, built from the token alone."""
+        profile = dict(self.profile)
+        if profile['last_training_date']:
+            profile['last_training_date'] = parse_date(profile['last_training_date'])
+        voter = Voter(id=self.voter_id, session_id=self.session_id, **profile)
+        voter._state.adding = False
+        voter._state.db = 'default'
+        return voter
+
+    def has_voted(self, position_id):
+        return int(position_id) in self.voted
+
+    def mark_voted(self, position_id):
+        self.voted.add(int(position_id))
+
+    def dumps(self):
+        return signing.dumps(
+            {'s': self.session_id, 'v': self.voter_id, 'p': self.profile, 'd': sorted(self.voted)},
+            salt=SALT,
+            compress=True,
+        )
+
+
+def read_token(request, session):
+    """The valid token for ``session`` from the request cookies, or None."""
+    value = request.COOKIES.get(cookie_name(session))
+    if not value:
+        return None
+    try:
+        data = signing.loads(value, salt=SALT, max_age=MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if data.get('s') != session.pk:
+        return None
+    return BallotToken(data['s'], data['v'], data['p'], data['d'])
+
+
+def write_token(response, session, token):
+    response.set_cookie(
+        cookie_name(session),
+        token.dumps(),
+        max_age=MAX_AGE,
+        httponly=True,
+        samesite='Lax',
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
+    return response
+
+
+def clear_token(response, session):
+    response.delete_cookie(cookie_name(session), samesite='Lax')
+    return response
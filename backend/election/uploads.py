@@ -0,0 +1,203 @@
+"""
+Streaming, size-capped candidate photo uploads.
+
+Django's default handlers hold small uploads in memory and accept files of
+any size, and the photo is only decoded (by ``ImageField``) after the whole
+body has arrived. ``CappedImageUploadHandler`` streams each file straight to
+a temporary file instead and, while the chunks arrive:
+
+* stops at ``MAX_BYTES``, skipping the rest of the file;
+* reads the real format and dimensions from the JPEG or PNG header (never
+  more than ``HEADER_WINDOW`` bytes buffered) and skips anything that is not
+  a JPEG or PNG, or is larger than ``MAX_SIDE`` / ``MAX_PIXELS``.
+
+A skipped file never reaches ``request.FILES``; its reason is kept in
+``request.upload_errors`` for the view to show. Upload handlers must be in
+place before anything reads ``request.POST``, and ``CsrfViewMiddleware``
+does, so ``capped_photo_upload`` exempts the view from the middleware and
+runs the same CSRF check itself once the handler is installed.
+"""
+import os
+import struct
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.http import HttpResponse
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+
+MAX_BYTES = getattr(settings, 'ELECTION_PHOTO_MAX_BYTES', 8 * 1024 * 1024)
+MAX_SIDE = getattr(settings, 'ELECTION_PHOTO_MAX_SIDE', 10000)
+MAX_PIXELS = getattr(settings, 'ELECTION_PHOTO_MAX_PIXELS', 50_000_000)
+# The JPEG frame header can sit behind large EXIF/ICC segments
+HEADER_WINDOW = 256 * 1024
+# The photo plus the text fields of the form
+MAX_REQUEST_BYTES = MAX_BYTES + 256 * 1024
+
+PHOTO_FIELDS = ('photo',)
+CONTENT_TYPES = {'JPEG': 'image/jpeg', 'PNG': 'image/png'}
+
+# JPEG start-of-frame markers; C4, C8 and CC share the range but are not frames
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+# --- Header sniffing ---
+def sniff_image(header):
+    """
+    (format, width, height) from the first bytes of a file; None if more bytes
+    are needed. Raises ValueError for anything but a JPEG or PNG.
+    """
+    if len(header) < 8:
+        if not (b'\x89PNG\r\n\x1a\n'.startswith(header) or b'\xff\xd8'.startswith(header[:2])):
+            raise ValueError("not a JPEG or PNG image")
+        return None
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        if len(header) < 24:
+            return None
+        if header[12:16] != b'IHDR':
+            raise ValueError("damaged PNG header")
+        width, height = struct.unpack('>II', header[16:24])
+        return 'PNG', width, height
+    if header.startswith(b'\xff\xd8'):
+        return _sniff_jpeg(header)
+    raise ValueError("not a JPEG or PNG image")
+
+
+def _sniff_jpeg(header):
+    index = 2
+    while True:
+        if index >= len(header):
+            return None
+        if header[index] != 0xFF:
+            raise ValueError("damaged JPEG header")
+        # Markers are 0xFF followed by the code, with optional 0xFF padding
+        while index < len(header) and header[index] == 0xFF:
+            index += 1
+        if index >= len(header):
+            return None
+        marker = header[index]
+        index += 1
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            continue  # no length field
+        if marker in (0xD9, 0xDA):
+            raise ValueError("JPEG without a frame header")
+        if index + 2 > len(header):
+            return None
+        (length,) = struct.unpack('>H', header[index:index + 2])
+        if marker in _JPEG_SOF:
+            if index + 7 > len(header):
+                return None
+            height, width = struct.unpack('>HH', header[index + 3:index + 7])
+            return 'JPEG', width, height
+        index += length
+
+
+# --- Upload handler ---
+class CappedImageUploadHandler(FileUploadHandler):
+    """Streams photo uploads to a temporary file, enforcing the caps above."""
+
+    def __init__(self, request=None, fields=PHOTO_FIELDS):
+        super().__init__(request)
+        self.fields = fields
+        self.errors = {}
+        # Not ``self.file``: the parser closes that on every skip, which
+        # would also delete an earlier, already accepted upload
+        self.upload = None
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.upload = None
+        if field_name not in self.fields:
+            self.reject("Unexpected file upload.")
+        self.header = b''
+        self.image = None
+        self.upload = TemporaryUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > MAX_BYTES:
+            self.reject(f"The photo is larger than {filesizeformat(MAX_BYTES)}.")
+        if self.image is None:
+            self.header += raw_data
+            try:
+                self.image = sniff_image(self.header[:HEADER_WINDOW])
+            except ValueError:
+                self.reject("The photo must be a JPEG or PNG image.")
+            if self.image:
+                self.check_dimensions(*self.image)
+                self.header = b''
+            elif len(self.header) >= HEADER_WINDOW:
+                self.reject("The photo's image header could not be read.")
+        self.upload.write(raw_data)
+        return None
+
+    def check_dimensions(self, image_format, width, height):
+        if not width or not height:
+            self.reject("The photo's image header could not be read.")
+        if max(width, height) > MAX_SIDE or width * height > MAX_PIXELS:
+            self.reject(f"The photo is {width}×{height} pixels; please upload a smaller image.")
+
+    def file_complete(self, file_size):
+        upload, self.upload = self.upload, None
+        if self.image is None:
+            # Ended before a complete header: empty or truncated
+            self.errors[self.field_name] = "The photo's image header could not be read."
+            _discard(upload)
+            return None
+        image_format, width, height = self.image
+        upload.seek(0)
+        upload.size = file_size
+        upload.content_type = CONTENT_TYPES[image_format]
+        upload.image_size = (width, height)
+        return upload
+
+    def upload_interrupted(self):
+        _discard(self.upload)
+        self.upload = None
+
+    def reject(self, message):
+        self.errors[self.field_name] = message
+        _discard(self.upload)
+        self.upload = None
+        raise SkipFile(message)
+
+
+def _discard(upload):
+    if upload is None:
+        return
+    path = upload.temporary_file_path()
+    try:
+        upload.close()
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# --- View decorator ---
+def capped_photo_upload(view):
+    """Parse the view's uploads with ``CappedImageUploadHandler``; CSRF is checked inside."""
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_errors = {}
+        if request.method == 'POST':
+            try:
+                declared = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                declared = 0
+            if declared > MAX_REQUEST_BYTES:
+                # Refused before a byte of the body is read
+                return HttpResponse(
+                    f"The upload is too large; photos may be at most {filesizeformat(MAX_BYTES)}.",
+                    status=413, content_type='text/plain; charset=utf-8',
+                )
+            handler = CappedImageUploadHandler(request)
+            request.upload_handlers = [handler]
+            request.upload_errors = handler.errors
+        return protected(request, *args, **kwargs)
+
+    return wrapper
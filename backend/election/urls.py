@@ -8,5 +8,15 @@ urlpatterns = [
     path('nomination/success/', views.nomination_success_view, name='nomination_success'),  # Add this line
     path('voting/', views.voting_view, name='voting'),
     path('results/', views.public_results_view, name='public_results'),  # NEW
+    path('api/vote_counts/', views.vote_counts_api, name='vote_counts_batch_api'),
     path('api/vote_counts/<int:position_id>/', views.vote_counts_api, name='vote_counts_api'),
+    path('receipt/', views.receipt_view, name='receipt_lookup'),
+    path('receipt/<str:code>/', views.receipt_view, name='receipt'),
+
+    # Session-scoped variants, for running overlapping elections side by side
+    path('s/<int:session_id>/nomination/', views.nomination_view, name='session_nomination'),
+    path('s/<int:session_id>/voting/', views.voting_view, name='session_voting'),
+    path('s/<int:session_id>/results/', views.public_results_view, name='session_public_results'),
+    path('s/<int:session_id>/api/vote_counts/', views.vote_counts_api, name='session_vote_counts_batch_api'),
+    path('s/<int:session_id>/api/vote_counts/<int:position_id>/', views.vote_counts_api, name='session_vote_counts_api'),
 ]
\ No newline at end of file
@@ -1,26 +1,29 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
+from django.http import Http404, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from django.contrib import messages
-from django.db.models import Count, Q
+from django.db import transaction
 
+from .admission import admission_control
+from .ballot import get_ballot, find_entry, next_entry
+from .casting import cast_vote, upsert_voter
+from .counts import get_counts, live_session_id, tally_version
+from .eligibility import is_eligible
 from .forms import NominationForm, VoteForm
-from .models import Session, Position, Voter, Nomination, Vote
+from .models import Session, Position, Vote
+from .outbox import queue_nomination_confirmation
+from .receipts import issue_receipt, lookup, normalize_code
+from .results import get_results
+from .scoping import get_public_session, session_url
+from .throttle import email_throttled
+from .tokens import BallotToken, read_token, write_token, clear_token
+from .uploads import capped_photo_upload
 
 
 
 
 
-# --- Helper for vote counts ---
-def get_vote_counts(session, position):
-    votes = (
-        Vote.objects.filter(session=session, position=position)
-        .values('nominee_id')
-        .annotate(count=Count('id'))
-    )
-    return {v['nominee_id']: v['count'] for v in votes}
-
-
-
 def home(request):
     """Home page with main navigation"""
     current_session = Session.objects.filter(
@@ -36,28 +39,41 @@ def home(request):
     
     return render(request, 'election/home.html', context)
 
-def nomination_view(request):
-    # Get the current open nomination session
-    current_session = Session.objects.filter(status='Nominations Open').first()
+@capped_photo_upload
+def nomination_view(request, session_id=None):
+    # Get the current open nomination session (or the one in the URL)
+    current_session = get_public_session(session_id, ['Nominations Open'])
 
     if not current_session:
         return render(request, 'election/nomination_closed.html')
 
     if request.method == 'POST':
-        form = NominationForm(request.POST, request.FILES)
+        form = NominationForm(request.POST, request.FILES, session=current_session)
+        # Photos refused by the upload handler never reach request.FILES
+        for field, error in request.upload_errors.items():
+            form.add_error(field if field in form.fields else None, error)
         if form.is_valid():
             nomination = form.save(commit=False)
             nomination.session = current_session
 
+            throttled = email_throttled(request, nomination.email)
+            if throttled:
+                return throttled
+            # Reject addresses that are not on the member roll (in-memory check)
+            if not is_eligible(current_session, email=nomination.email):
+                messages.error(request, "This email is not on the eligible member roll for this session.")
             # Prevent duplicate submission per session
-            if current_session.nomination_set.filter(email=nomination.email).exists():
+            elif current_session.nomination_set.filter(email=nomination.email).exists():
                 messages.error(request, "You have already submitted a nomination for this session.")
             else:
-                nomination.save()
+                # The confirmation email is queued with the nomination, or not at all
+                with transaction.atomic():
+                    nomination.save()
+                    queue_nomination_confirmation(nomination)
                 # Redirect to thank you page instead of showing message
                 return redirect('nomination_success')
     else:
-        form = NominationForm()
+        form = NominationForm(session=current_session)
 
     return render(request, 'election/nomination_form.html', {
         'form': form,
@@ -71,137 +87,109 @@ def nomination_success_view(request):
 
 
 
-def get_next_available_position(session, positions, current_position):
+def get_next_available_position(session, current_position):
     """Find the next position that has approved candidates"""
-    current_index = list(positions).index(current_position)
-    
-    for position in positions[current_index + 1:]:
-        if Nomination.objects.filter(
-            session=session, 
-            desired_position=position, 
-            approved=True
-        ).exists():
-            return position
-    
-    return None
+    entry = next_entry(get_ballot(session), current_position)
+    return entry['position'] if entry else None
+
 
+def _issue_receipt(request, session, voter):
+    """Issue the completion receipt; the code is shown once on the completion page."""
+    code = issue_receipt(session, voter)
+    if code:
+        request.session['ballot_receipt'] = code
 
-def voting_view(request):
-    session = Session.objects.filter(status='Voting Open').first()
+
+@admission_control
+def voting_view(request, session_id=None):
+    session = get_public_session(session_id, ['Voting Open'])
     
     # Check if results are published - redirect to results page
     if not session:
-        published_session = Session.objects.filter(status='Results Published').first()
+        published_session = get_public_session(session_id, ['Results Published'])
         if published_session:
-            return redirect('public_results')
+            return redirect(session_url('public_results', session_id))
         return render(request, 'election/voting_closed.html')
 
-    # Get all positions ordered
-    positions = Position.objects.all().order_by('order')
+    # Redirects stay on the scoped URL when the session came from the path
+    voting_url = session_url('voting', session_id)
+
+    # Cached ballot: ordered positions that have approved candidates
+    ballot = get_ballot(session)
+
+    # Signed ballot cookie: identifies the voter and their progress without a lookup
+    token = read_token(request, session)
+    if request.GET.get('restart') == 'true':
+        return clear_token(redirect(voting_url), session)
     
     # Determine which position to show
     next_position_id = request.GET.get('position')
-    email = request.POST.get('email') or request.GET.get('email')
     
     if next_position_id:
-        position = positions.get(id=next_position_id)
+        entry = find_entry(ballot, next_position_id)
+        if entry:
+            position, candidates = entry['position'], entry['candidates']
+        else:
+            position, candidates = Position.objects.for_session(session).get(id=next_position_id), []
+    elif token and request.GET.get('completed') != 'true':
+        # Resume at the first position this voter has not voted for yet
+        entry = next((e for e in ballot if not token.has_voted(e['position'].id)), None)
+        if entry is None:
+            return _complete(request, session, token.voter(), voting_url)
+        position, candidates = entry['position'], entry['candidates']
+    elif ballot:
+        # First position with candidates
+        position, candidates = ballot[0]['position'], ballot[0]['candidates']
     else:
-        # Find first position with candidates
-        position = None
-        for pos in positions:
-            if Nomination.objects.filter(
-                session=session, 
-                desired_position=pos, 
-                approved=True
-            ).exists():
-                position = pos
-                break
-        
-        if not position:
-            # No positions available - redirect to fresh voting with completion message
-            return redirect('/voting/?completed=true')
-
-    # Fetch existing voter if any
-    voter = None
-    if email:
-        voter = Voter.objects.filter(session=session, email=email).first()
-
-    # Check if voter has already voted for this position
-    already_voted = False
-    if voter:
-        already_voted = Vote.objects.filter(
-            session=session,
-            voter=voter,
-            position=position
-        ).exists()
+        # No positions available - redirect to fresh voting with completion message
+        return redirect(f'{voting_url}?completed=true')
+
+    voter = token.voter() if token else None
+    already_voted = bool(token and token.has_voted(position.id))
 
     if request.method == 'POST':
-        form = VoteForm(request.POST, session=session, position=position)
-        if form.is_valid():
-            # Create or update voter
-            voter, created = Voter.objects.update_or_create(
-                session=session,
-                email=form.cleaned_data['email'],
-                defaults={
+        form = VoteForm(request.POST, session=session, position=position, candidates=candidates, identified=bool(token))
+        if form.is_valid() and not token and not is_eligible(session, email=form.cleaned_data['email']):
+            messages.error(request, "This email is not on the eligible member roll for this session.")
+        elif form.is_valid():
+            if not token:
+                throttled = email_throttled(request, form.cleaned_data['email'])
+                if throttled:
+                    return throttled
+                # First step: create or update the voter, then pick up any earlier progress
+                voter, created = upsert_voter(session, form.cleaned_data['email'], {
                     'full_name': form.cleaned_data['full_name'],
                     'gender': form.cleaned_data['gender'],
                     'designation': form.cleaned_data['designation'],
                     'workplace_address': form.cleaned_data['workplace_address'],
                     'last_training_date': form.cleaned_data['last_training_date'],
-                }
-            )
+                })
+                voted = [] if created else Vote.objects.filter(session=session, voter=voter).values_list('position_id', flat=True)
+                token = BallotToken.for_voter(voter, voted)
 
             # Check if already voted for this position
-            if Vote.objects.filter(session=session, voter=voter, position=position).exists():
+            if token.has_voted(position.id):
                 messages.warning(request, "You have already voted for this position.")
-                # Find next available position
-                next_position = get_next_available_position(session, positions, position)
-                if next_position:
-                    return redirect(f'/voting/?position={next_position.id}&email={voter.email}')
-                else:
-                    # All done - show completion alert
-                    return redirect('/voting/?completed=true')
+                return _continue(request, session, voter, token, position, voting_url)
 
             # Save vote
-            candidate_id = form.cleaned_data['candidate']
-            candidate = Nomination.objects.get(id=candidate_id)
-            Vote.objects.create(
-                session=session,
-                voter=voter,
-                position=position,
-                nominee=candidate
+            candidate_id = int(form.cleaned_data['candidate'])
+            candidate = next(c for c in candidates if c.id == candidate_id)
+            completes_ballot = all(
+                token.has_voted(e['position'].id) for e in ballot if e['position'].id != position.id
             )
-
-            # Find next available position with candidates
-            next_position = get_next_available_position(session, positions, position)
-            
-            if next_position:
-                return redirect(f'/voting/?position={next_position.id}&email={voter.email}&voted=true')
-            else:
-                # All positions voted - show completion alert and fresh form
-                return redirect('/voting/?completed=true')
+            if not cast_vote(session, voter, position, candidate, form.cleaned_data.get('ranking'), completes_ballot):
+                # Stale token (e.g. a second tab): the vote was already recorded
+                messages.warning(request, "You have already voted for this position.")
+            token.mark_voted(position.id)
+            return _continue(request, session, voter, token, position, voting_url, voted=True)
     else:
-        form = VoteForm(session=session, position=position)
-        
-        # Pre-fill voter data if exists
-        if voter:
-            form.fields['full_name'].initial = voter.full_name
-            form.fields['email'].initial = voter.email
-            form.fields['gender'].initial = voter.gender
-            form.fields['designation'].initial = voter.designation
-            form.fields['workplace_address'].initial = voter.workplace_address
-            form.fields['last_training_date'].initial = voter.last_training_date
-
-    # Get candidates without vote counts
-    candidates = Nomination.objects.filter(
-        session=session, 
-        desired_position=position, 
-        approved=True
-    )
+        form = VoteForm(session=session, position=position, candidates=candidates, identified=bool(token))
 
     # Check if showing success message
     show_success = request.GET.get('voted') == 'true'
     show_complete = request.GET.get('completed') == 'true'
+    receipt_code = request.session.pop('ballot_receipt', None) if show_complete else None
 
     context = {
         'form': form,
@@ -213,62 +201,107 @@ def voting_view(request):
         'is_first_vote': not voter,
         'show_success': show_success,
         'show_complete': show_complete,
+        'receipt_code': receipt_code,
+        'voting_url': voting_url,
     }
     
     return render(request, 'election/voting.html', context)
-# --- API for real-time vote counts ---
-def vote_counts_api(request, position_id):
-    session = Session.objects.filter(status='Voting Open').first()
-    if not session:
-        return JsonResponse([], safe=False)
 
-    position = Position.objects.get(id=position_id)
-    vote_counts = get_vote_counts(session, position)
 
-    data = [{'nomination_id': k, 'count': v} for k, v in vote_counts.items()]
-    return JsonResponse(data, safe=False)
+def _continue(request, session, voter, token, position, voting_url, voted=False):
+    """Redirect to the next position (carrying the refreshed token) or finish the ballot."""
+    next_position = get_next_available_position(session, position)
+    while next_position and token.has_voted(next_position.id):
+        next_position = get_next_available_position(session, next_position)
+    if not next_position:
+        # All positions voted - show completion alert and fresh form
+        return _complete(request, session, voter, voting_url)
+    suffix = '&voted=true' if voted else ''
+    return write_token(redirect(f'{voting_url}?position={next_position.id}{suffix}'), session, token)
+
+
+def _complete(request, session, voter, voting_url):
+    _issue_receipt(request, session, voter)
+    # The finished ballot needs no token; a shared device starts fresh
+    return clear_token(redirect(f'{voting_url}?completed=true'), session)
+# --- API for real-time vote counts ---
+def _count_rows(counts):
+    return [{'nomination_id': k, 'count': v} for k, v in counts.items()]
+
+
+def vote_counts_api(request, position_id=None, session_id=None):
+    """
+    Counts of one position, or of several with ``?positions=1,2`` (all when
+    omitted). The tally version is the ETag: an unchanged poll gets a 304
+    without touching the database.
+    """
+    session_id = live_session_id(session_id)
+    if not session_id:
+        return JsonResponse([] if position_id else {'positions': {}}, safe=False)
+
+    version = tally_version(session_id)
+    etag = f'"{session_id}-{version}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        counts = get_counts(session_id, version)
+        if position_id is not None:
+            if position_id not in counts:
+                raise Http404("Position not found")
+            response = JsonResponse(_count_rows(counts[position_id]), safe=False)
+        else:
+            wanted = request.GET.get('positions')
+            try:
+                ids = [int(p) for p in wanted.split(',') if p] if wanted else list(counts)
+            except ValueError:
+                return JsonResponse({'error': 'positions must be a comma-separated list of ids'}, status=400)
+            response = JsonResponse({
+                'positions': {str(p): _count_rows(counts[p]) for p in ids if p in counts},
+            })
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 
 # Add this to your existing views.py
 
-def public_results_view(request):
+def public_results_view(request, session_id=None):
     """Public results page for voters"""
     
     # Get session with published results
-    session = Session.objects.filter(status='Results Published').first()
+    session = get_public_session(session_id, ['Results Published'])
     
     if not session:
         # If no published results, check if voting is still open
-        session = Session.objects.filter(status='Voting Open').first()
+        session = get_public_session(session_id, ['Voting Open'])
         if session:
             return render(request, 'election/results_not_published.html', {'session': session})
         else:
             return render(request, 'election/results_not_published.html')
     
-    # Get results by position
-    positions = Position.objects.all().order_by('order')
-    results = []
-    
-    for position in positions:
-        candidates = Nomination.objects.filter(
-            session=session,
-            desired_position=position,
-            approved=True
-        ).annotate(
-            vote_count=Count('votes', filter=Q(votes__session=session, votes__position=position))
-        ).order_by('-vote_count')
-        
-        if candidates.exists():
-            results.append({
-                'position': position,
-                'candidates': candidates,
-                'total_votes': sum(c.vote_count for c in candidates)
-            })
+    # Frozen snapshot once published, otherwise briefly cached live tallies
+    results = get_results(session)
     
     context = {
         'results': results,
         'session': session,
     }
     
-    return render(request, 'election/public_results.html', context)
\ No newline at end of file
+    return render(request, 'election/public_results.html', context)
+
+
+def receipt_view(request, code=None):
+    """Public receipt check: confirms what was recorded for a receipt code"""
+    if code is None and request.GET.get('code'):
+        return redirect('receipt', code=normalize_code(request.GET['code']))
+
+    summary = lookup(code) if code else None
+    response = render(request, 'election/receipt.html', {
+        'code': code,
+        'summary': summary,
+    })
+    if code:
+        # Receipts never change once issued; misses are cached briefly
+        patch_cache_control(response, public=True, max_age=3600 if summary else 60)
+    return response
@@ -0,0 +1,82 @@
+"""
+Worker warm-up.
+
+Passenger spawns application processes on demand, so without warm-up the
+first request a new worker serves pays for compiling templates, building the
+URL resolver, opening the database connection and loading the ballot. The
+WSGI entry points call ``ElectionConfig.warm_up()`` right after the
+application is created, moving that cost to spawn time.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+
+
+logger = logging.getLogger(__name__)
+
+HOT_TEMPLATES = getattr(settings, 'ELECTION_WARMUP_TEMPLATES', [
+    'election/home.html',
+    'election/voting.html',
+    'election/voting_closed.html',
+    'election/nomination_form.html',
+    'election/public_results.html',
+    'election/results_not_published.html',
+    'election/receipt.html',
+    'election/waiting.html',
+    'admin/dashboard.html',
+    'admin/results.html',
+])
+
+HOT_URLS = ['home', 'voting', 'nomination', 'public_results', 'receipt_lookup', 'admin_dashboard']
+
+
+def _templates():
+    for name in HOT_TEMPLATES:
+        get_template(name)
+
+
+def _urls():
+    resolver = get_resolver()
+    resolver.url_patterns  # import every URLconf
+    for name in HOT_URLS:
+        reverse(name)
+    resolver.resolve('/voting/')
+
+
+def _database():
+    # PRAGMAs are applied by the connection_created receiver in signals.py
+    connection.ensure_connection()
+
+
+def _ballot():
+    from .ballot import get_ballot
+    from .models import Session
+
+    session = Session.objects.filter(status='Voting Open').order_by('-created_at').first()
+    if session:
+        get_ballot(session)
+
+
+STEPS = [
+    ('templates', _templates),
+    ('urls', _urls),
+    ('database', _database),
+    ('ballot', _ballot),
+]
+
+
+def warm_up():
+    """Run every warm-up step; returns {step: seconds}. A failing step is logged, not raised."""
+    timings = {}
+    for name, step in STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception('Warm-up step %s failed', name)
+        timings[name] = time.perf_counter() - started
+    return timings
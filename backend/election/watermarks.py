@@ -0,0 +1,24 @@
+"""
+Rebuilding rollups without holding SQLite's write lock.
+
+SQLite transactions begin IMMEDIATE (see settings.py): every atomic() block
+takes the single write lock when it starts, so a rebuild that counted inside
+one would stall every ballot until it finished. Rebuilds therefore split the
+rows they count at a watermark, the newest id when they start. Rows up to
+the watermark are counted outside any transaction; the short transaction
+that writes the result first counts only the rows past it.
+
+SQLite hands out ids under its write lock, so no row below the watermark can
+still be uncommitted. PostgreSQL sequences can commit out of order, but its
+transactions never block ballots, so there everything is counted inside.
+"""
+from django.db import connection
+from django.db.models import Max
+
+
+def split_at_watermark(rows):
+    """(rows to count outside the transaction, rows to count inside it)."""
+    if connection.vendor != 'sqlite':
+        return rows.none(), rows
+    last = rows.aggregate(last=Max('id'))['last'] or 0
+    return rows.filter(id__lte=last), rows.filter(id__gt=last)
@@ -1,13 +1,21 @@
 from .settings import *
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 DEBUG = False
 ALLOWED_HOSTS = ['abedintechemail.com', 'www.abedintechemail.com', '*']
 
 # Use environment variable for SECRET_KEY
 SECRET_KEY = os.environ.get('SECRET_KEY', SECRET_KEY)  # Falls back to settings.py
 
-# Database - already using SQLite (no password needed)
+# Database - SQLite unless ELECTION_DATABASE=postgres is set (see settings.py)
+
+# Email - confirmations must leave the server; the file and console
+# backends would keep them here without any error
+if os.environ.get('ELECTION_EMAIL_BACKEND', 'smtp') != 'smtp':
+    raise ImproperlyConfigured("ELECTION_EMAIL_BACKEND must be 'smtp' in production.")
+EMAIL_BACKEND = EMAIL_BACKENDS['smtp']
 
 # Security
 SECURE_SSL_REDIRECT = False
@@ -44,8 +44,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'election.middleware.SessionProfileMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'election.throttle.RateLimitMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -72,16 +73,92 @@ TEMPLATES = [
 WSGI_APPLICATION = 'kbaa_election.wsgi.application'
 
 
+# Caches
+# Shared by every Passenger worker on the host: one SQLite file in WAL mode
+# (see election.sqlite_cache). Ballot, results and session entries get their
+# own tables so a burst in one cannot evict the others.
+CACHE_PATH = BASE_DIR / 'cache.sqlite3'
+CACHES = {
+    'default': {
+        'BACKEND': 'election.sqlite_cache.SQLiteCache',
+        'LOCATION': CACHE_PATH,
+        'OPTIONS': {'table': 'cache_default', 'MAX_ENTRIES': 5000},
+    },
+    'ballot': {
+        'BACKEND': 'election.sqlite_cache.SQLiteCache',
+        'LOCATION': CACHE_PATH,
+        'OPTIONS': {'table': 'cache_ballot', 'MAX_ENTRIES': 500},
+    },
+    'results': {
+        'BACKEND': 'election.sqlite_cache.SQLiteCache',
+        'LOCATION': CACHE_PATH,
+        'OPTIONS': {'table': 'cache_results', 'MAX_ENTRIES': 500},
+    },
+    'sessions': {
+        'BACKEND': 'election.sqlite_cache.SQLiteCache',
+        'LOCATION': CACHE_PATH,
+        'TIMEOUT': None,
+        'OPTIONS': {'table': 'cache_sessions', 'MAX_ENTRIES': 20000},
+    },
+    'throttle': {
+        'BACKEND': 'election.sqlite_cache.SQLiteCache',
+        'LOCATION': CACHE_PATH,
+        'OPTIONS': {'table': 'cache_throttle', 'MAX_ENTRIES': 50000},
+    },
+}
+
+
+# Sessions and messages
+# Staff pages use cached_db sessions; public pages use signed-cookie sessions
+# so anonymous voters never write to django_session (see election.middleware).
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+ELECTION_PUBLIC_SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+ELECTION_PUBLIC_SESSION_COOKIE_NAME = 'public_session'
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
 
 
-# Database - SQLite for both local and production
+
+
+# Database - SQLite by default; ELECTION_DATABASE=postgres switches to the
+# PostgreSQL profile below (configured from POSTGRES_* environment variables).
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Take the write lock when a transaction starts, so concurrent ballots
+        # wait for it (up to `timeout` seconds) instead of failing with
+        # "database is locked" when upgrading from a read. Every atomic()
+        # block then holds the lock for its whole run: long jobs count
+        # outside transactions and keep them short (see election.watermarks)
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
     }
 }
 
+if os.environ.get('ELECTION_DATABASE') == 'postgres':
+    # With psycopg's pool every worker keeps POSTGRES_POOL_MIN..MAX open
+    # connections; Django's pool requires CONN_MAX_AGE = 0. Without the pool,
+    # connections persist for CONN_MAX_AGE seconds. Health checks drop a dead
+    # connection at the start of a request instead of failing it.
+    POSTGRES_POOL = os.environ.get('POSTGRES_POOL', '1') == '1'
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'kbaa_election'),
+        'USER': os.environ.get('POSTGRES_USER', 'kbaa'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if POSTGRES_POOL else int(os.environ.get('POSTGRES_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.environ.get('POSTGRES_POOL_MIN', '2')),
+                'max_size': int(os.environ.get('POSTGRES_POOL_MAX', '10')),
+                'timeout': 10,
+            },
+        } if POSTGRES_POOL else {},
+    }
+
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'  # Add this line
@@ -91,6 +168,53 @@ STATICFILES_DIRS = [BASE_DIR / 'static'] if (BASE_DIR / 'static').exists() else
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Candidate photo uploads are streamed to disk and refused past these caps
+ELECTION_PHOTO_MAX_BYTES = 8 * 1024 * 1024
+ELECTION_PHOTO_MAX_SIDE = 10000
+ELECTION_PHOTO_MAX_PIXELS = 50_000_000
+
+# Compressed archives written by `manage.py archive_session`
+ELECTION_ARCHIVE_ROOT = BASE_DIR / 'archives'
+
+# Admission control for ballot submissions: concurrent ballot writes allowed
+# per worker process and across all workers; the rest wait on a queue page
+ELECTION_ADMISSION_PER_WORKER = 4
+ELECTION_ADMISSION_GLOBAL = 12
+
+# Online database snapshots written by `manage.py backup`
+ELECTION_BACKUP_ROOT = BASE_DIR / 'backups'
+
+# Token-bucket rate limits per URL name: (burst, tokens per minute) per client
+# address and per submitted email. Session-scoped URLs share their unscoped
+# name's limits. Members often share a hospital's address, so the per-address
+# buckets are generous and the per-email ones are tight.
+ELECTION_RATE_LIMITS = {
+    'nomination': {'methods': ['POST'], 'ip': (20, 10), 'email': (5, 2)},
+    'voting': {'methods': ['POST'], 'ip': (120, 60), 'email': (30, 20)},
+    'vote_counts_api': {'ip': (60, 60)},
+    'vote_counts_batch_api': {'ip': (60, 60)},
+    'receipt': {'ip': (30, 30)},
+}
+
+# Confirmation emails are queued in the outbox and delivered by
+# `manage.py send_outbox`. ELECTION_EMAIL_BACKEND=smtp sends for real;
+# "file" (the development default) writes each message to EMAIL_FILE_PATH
+# and "console" prints them. production_settings only allows smtp.
+EMAIL_BACKENDS = {
+    'smtp': 'django.core.mail.backends.smtp.EmailBackend',
+    'console': 'django.core.mail.backends.console.EmailBackend',
+    'file': 'django.core.mail.backends.filebased.EmailBackend',
+}
+EMAIL_BACKEND = EMAIL_BACKENDS[os.environ.get('ELECTION_EMAIL_BACKEND', 'file' if DEBUG else 'smtp')]
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '1') == '1'
+EMAIL_TIMEOUT = 30
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'KBAA Election <election@kbaa.org>')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
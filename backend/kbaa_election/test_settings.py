@@ -0,0 +1,17 @@
+from .settings import *
+
+# The test suite must never share cache.sqlite3 with a running site: each
+# alias gets its own in-process cache instead
+CACHES = {
+    alias: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': f'tests-{alias}',
+        **({'TIMEOUT': config['TIMEOUT']} if 'TIMEOUT' in config else {}),
+    }
+    for alias, config in CACHES.items()
+}
+
+# On a file rather than in memory, so the backup tests can open it with a
+# second connection as the online backup does
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['TEST'] = {'NAME': BASE_DIR / 'test_db.sqlite3'}
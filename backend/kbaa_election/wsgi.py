@@ -9,8 +9,12 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.apps import apps
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kbaa_election.settings')
 
 application = get_wsgi_application()
+
+# Pay the cold-start cost when the worker spawns, not on its first request
+apps.get_app_config('election').warm_up()
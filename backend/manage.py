@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kbaa_election.settings')
+    # Tests run against in-process caches, never the site's cache file
+    settings_module = 'kbaa_election.test_settings' if sys.argv[1:2] == ['test'] else 'kbaa_election.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
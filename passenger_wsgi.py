@@ -9,5 +9,18 @@ backend_path = f'/home/{CPANEL_USERNAME}/kbaa_election/backend'
 if backend_path not in sys.path:
     sys.path.insert(0, backend_path)
 
+# Checkout-relative fallback (local runs and profiling)
+local_backend = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+if local_backend not in sys.path:
+    sys.path.append(local_backend)
+
 # Django settings
-os.environ['DJANGO_SETTINGS_MODULE'] = 'kbaa_election.production
\ No newline at end of file
+os.environ['DJANGO_SETTINGS_MODULE'] = 'kbaa_election.production_settings'
+
+from django.apps import apps  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+application = get_wsgi_application()
+
+# Pay the cold-start cost when Passenger spawns the worker, not on the first voter
+apps.get_app_config('election').warm_up()